@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from datetime import date
+from fitness_app.serializers import SparseFieldsetMixin
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     age = serializers.SerializerMethodField(read_only=True)
     password = serializers.CharField(write_only=True, required=True, min_length=6)
 
@@ -40,6 +40,7 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated, IsOwner]
+    ordering = ('id',)
 
     def get_queryset(self):
         return User.objects.filter(id=self.request.user.id)
@@ -3,11 +3,20 @@ import numpy as np
 def ajustar_treino(historico_treinos):
     """
     Função para ajustar a carga de treino baseada no histórico de treinos.
-    Aqui você pode implementar a lógica de ajuste real conforme os dados do usuário.
+
+    Aceita o resumo já agregado no banco ({"total": n, "carga_media": x},
+    ver workouts.history.resumo_historico) ou, por compatibilidade, a lista
+    de treinos com a chave "carga".
     """
+    if isinstance(historico_treinos, dict):
+        total = historico_treinos.get("total") or 0
+        carga_media = historico_treinos.get("carga_media")
+    else:
+        total = len(historico_treinos)
+        carga_media = sum([treino["carga"] for treino in historico_treinos]) / total if total else None
+
     # Exemplo simples de ajuste de carga baseado no histórico de treinos
-    if len(historico_treinos) > 0:
-        carga_media = sum([treino["carga"] for treino in historico_treinos]) / len(historico_treinos)
+    if total > 0 and carga_media is not None:
         carga_ideal = carga_media * 1.1  # Aumenta a carga em 10% como exemplo
         return {"carga": carga_ideal, "reps": 10}  # Retorna sugestão de carga e repetições
-    return {"carga": 50, "reps": 10}  # Valor padrão
\ No newline at end of file
+    return {"carga": 50, "reps": 10}  # Valor padrão
@@ -0,0 +1,118 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .router import normalizar_texto
+
+# Cortesias que não mudam a pergunta ("oi, me diga por favor ...")
+_CORTESIAS = re.compile(
+    r'^(?:(?:oi|ola|ei|e ai|bom dia|boa tarde|boa noite)\b\s*)+'
+    r'|\b(?:por favor|pfv|pf|me diga|me diz|me fala|me explica|me explique)\b'
+)
+# Perguntas em primeira pessoa dependem de quem pergunta: nunca vão para o cache
+PALAVRAS_PESSOAIS = frozenset({
+    'eu', 'me', 'mim', 'comigo', 'meu', 'minha', 'meus', 'minhas',
+    'sou', 'estou', 'tenho', 'fiz', 'faco', 'preciso', 'devo', 'consigo',
+})
+# Mensagens longas costumam descrever a situação de quem pergunta
+MAX_PROMPT_CHARS = 200
+
+
+def normalizar_prompt(texto):
+    """
+    Forma canônica da pergunta: minúsculas, sem acentos, sem pontuação e com espaços simples.
+
+    Com CHAT_CACHE_STRIP_FILLERS, cumprimentos e cortesias também saem, então
+    "Oi! Me diga, por favor: quantas calorias tem um ovo?" e "quantas calorias
+    tem um ovo" caem na mesma entrada.
+    """
+    texto = normalizar_texto(texto)
+    if settings.CHAT_CACHE_STRIP_FILLERS:
+        texto = ' '.join(_CORTESIAS.sub(' ', texto).split())
+    return texto
+
+
+def chave_cache(mensagem):
+    """
+    Chave da resposta no cache, ou None se a resposta não pode ser compartilhada entre usuários.
+    """
+    normalizado = normalizar_prompt(mensagem)
+    if not normalizado or len(normalizado) > MAX_PROMPT_CHARS:
+        return None
+    if PALAVRAS_PESSOAIS.intersection(normalizado.split()):
+        return None
+    # Modelos diferentes respondem diferente
+    return f'{settings.OPENAI_MODEL}:{normalizado}'
+
+
+class TTLCache:
+    """
+    Cache LRU com expiração, em memória do processo.
+
+    ``get``/``set`` são O(1) (OrderedDict); ao passar de ``maxsize`` sai a
+    entrada usada há mais tempo. O lock permite o uso a partir do event loop
+    e das threads do sync_to_async.
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.bypassed = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires = item
+                if expires > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, self._clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.bypassed = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'bypassed': self.bypassed,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+# Um por processo: cada worker tem o seu cache e as suas métricas
+respostas = TTLCache(settings.CHAT_CACHE_MAX_ENTRIES, settings.CHAT_CACHE_TTL)
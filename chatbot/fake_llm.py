@@ -0,0 +1,139 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.requests += 1
+        try:
+            time.sleep(server.delay)
+            if payload.get('stream'):
+                self._stream(payload)
+            else:
+                self._complete(payload)
+        except ConnectionError:
+            # Cliente desistiu (timeout ou desconexão no meio do stream)
+            with server.lock:
+                server.disconnects += 1
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _complete(self, payload):
+        body = json.dumps({
+            'object': 'chat.completion',
+            'model': payload.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': self.server.reply}, 'finish_reason': 'stop'}],
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, payload):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, token in enumerate(re.findall(r'\S+\s*', self.server.reply)):
+            if i:
+                time.sleep(self.server.token_delay)
+            chunk = {
+                'object': 'chat.completion.chunk',
+                'model': payload.get('model'),
+                'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}],
+            }
+            self._chunk(f'data: {json.dumps(chunk)}\n\n')
+        self._chunk('data: [DONE]\n\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _chunk(self, text):
+        data = text.encode()
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Backlog padrão (5) recusaria conexões nos testes de carga
+    request_queue_size = 1024
+
+
+class FakeLLMServer:
+    """
+    Servidor local que imita ``POST /chat/completions`` da OpenAI.
+
+    ``delay`` é a latência até a resposta (ou até o primeiro token, com
+    ``stream=True``); no stream cada palavra de ``reply`` vira um chunk SSE,
+    separado por ``token_delay``. Cada requisição roda na sua própria thread,
+    então o servidor nunca é o gargalo; ``peak`` registra quantas completions
+    chegaram a estar em curso ao mesmo tempo e ``disconnects`` quantas o
+    cliente abandonou. Uso::
+
+        with FakeLLMServer(delay=0.5) as llm:
+            ...  # settings.OPENAI_BASE_URL = llm.url
+    """
+
+    def __init__(self, delay=0.5, reply='Resposta do modelo de teste.', token_delay=0.05, host='127.0.0.1', port=0):
+        self._server = _Server((host, port), _Handler)
+        self._server.delay = delay
+        self._server.reply = reply
+        self._server.token_delay = token_delay
+        self._server.lock = threading.Lock()
+        self._server.in_flight = 0
+        self._server.peak = 0
+        self._server.requests = 0
+        self._server.disconnects = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    @property
+    def in_flight(self):
+        return self._server.in_flight
+
+    @property
+    def peak(self):
+        return self._server.peak
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    @property
+    def disconnects(self):
+        return self._server.disconnects
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from ai import trainer
+from progress.models import ProgressEntry
+from workouts.exercises import ultima_carga
+from workouts.history import resumo_historico
+from workouts.models import Workout
+from .router import IntentRouter
+
+# Intenções respondidas com os dados do usuário, sem chamar a OpenAI.
+# A ordem de registro desempata quando mais de uma casa com a mesma prioridade.
+router = IntentRouter()
+
+TREINO_PERNAS = "Agachamento, Leg Press, Cadeira Extensora"
+
+
+@router.intent('peso_atual', ['peso atual'])
+async def peso_atual(user, mensagem):
+    ultimo = await ProgressEntry.objects.filter(user=user).order_by('-date').afirst()
+    if ultimo:
+        data_formatada = ultimo.date.strftime('%d/%m/%Y')
+        return f"Seu peso atual registrado é {ultimo.weight} kg em {data_formatada}."
+    return "Você ainda não registrou nenhum peso."
+
+
+@router.intent('treino_pernas', ['treino de pernas', 'sugestão de treino', 'quero um treino'])
+async def treino_pernas(user, mensagem):
+    treino_existente = await (
+        Workout.objects.filter(user=user, exercises=TREINO_PERNAS).order_by('-created_at', '-id').afirst()
+    )
+    if treino_existente:
+        return f"Seu último treino de pernas foi: {treino_existente.exercises}."
+
+    await Workout.objects.acreate(
+        user=user,
+        workout_type="musculacao",
+        exercises=TREINO_PERNAS,
+        duration=timedelta(minutes=45),
+        intensity="Alta",
+        frequency="3x por semana",
+        series_reps="3x12",
+        carga=60,
+    )
+    return f"Gerei um treino de pernas com base no seu objetivo e já salvei: {TREINO_PERNAS}"
+
+
+@router.intent('carga_rosca_direta', ['carga'], ['rosca direta'])
+async def carga_rosca_direta(user, mensagem):
+    carga = await sync_to_async(ultima_carga)(user, "rosca direta")
+    if carga is not None:
+        return f"Você costuma usar cerca de {carga} kg para rosca direta."
+    return "Ainda não encontrei registros de rosca direta nos seus treinos."
+
+
+@router.intent('carga_ideal', ['carga ideal', 'carga sugerida'])
+async def carga_ideal(user, mensagem):
+    historico = await sync_to_async(resumo_historico)(user)
+    sugestao = trainer.ajustar_treino(historico)
+    return f"Sugestão de carga para treino de pernas: {sugestao['carga']} kg para {sugestao['reps']} repetições."
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import weakref
+
+import httpx
+from django.conf import settings
+
+from .cache import chave_cache, respostas
+
+MAX_TOKENS = 150
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def _timeout():
+    # Conexão falha rápido; a leitura espera a geração do modelo, até OPENAI_TIMEOUT
+    return httpx.Timeout(settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT)
+
+
+def _client():
+    """
+    AsyncClient compartilhado pelo event loop atual.
+
+    Criar um cliente monta o contexto SSL (dezenas de ms de CPU com o loop
+    parado); reaproveitá-lo também mantém as conexões com a OpenAI abertas.
+    Conexões não podem cruzar event loops, daí um cliente por loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = httpx.AsyncClient()
+    return client
+
+
+def _request(mensagem, **extra):
+    headers = {'Authorization': f'Bearer {settings.OPENAI_API_KEY}'} if settings.OPENAI_API_KEY else {}
+    return {
+        'url': f"{settings.OPENAI_BASE_URL.rstrip('/')}/chat/completions",
+        'headers': headers,
+        'timeout': _timeout(),
+        'json': {
+            'model': settings.OPENAI_MODEL,
+            'messages': [{'role': 'user', 'content': mensagem}],
+            'max_tokens': MAX_TOKENS,
+            **extra,
+        },
+    }
+
+
+def _consultar_cache(mensagem):
+    """
+    Retorna ``(chave, resposta em cache ou None)``; a chave é None quando a pergunta é pessoal.
+    """
+    chave = chave_cache(mensagem)
+    if chave is None:
+        respostas.bypass()
+        return None, None
+    return chave, respostas.get(chave)
+
+
+async def chamar_openai(mensagem):
+    """
+    Resposta do modelo para ``mensagem``, sem bloquear o event loop.
+
+    Enquanto a completion é gerada o worker ASGI continua atendendo outras
+    requisições. Falhas de rede, timeout ou HTTP viram uma mensagem de erro
+    para o usuário, como na versão síncrona. Perguntas genéricas são
+    respondidas do cache quando possível; erros nunca entram nele.
+    """
+    chave, em_cache = _consultar_cache(mensagem)
+    if em_cache is not None:
+        return em_cache
+    try:
+        response = await _client().post(**_request(mensagem))
+        response.raise_for_status()
+        resposta = response.json()['choices'][0]['message']['content'].strip()
+    except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+        return f"Erro ao chamar a OpenAI: {str(e) or type(e).__name__}"
+    if chave is not None:
+        respostas.set(chave, resposta)
+    return resposta
+
+
+async def stream_openai(mensagem):
+    """
+    Gera os pedaços de texto da completion à medida que chegam (``stream=True``).
+
+    A resposta de upstream só fica aberta dentro do ``async with``: se o
+    gerador é fechado ou a tarefa cancelada (cliente desconectou), a conexão
+    com a OpenAI é encerrada na hora. Erros de rede e HTTP são propagados
+    (httpx.HTTPError) para quem consome. Uma resposta em cache sai em um único
+    pedaço; só streams completos entram no cache.
+    """
+    chave, em_cache = _consultar_cache(mensagem)
+    if em_cache is not None:
+        yield em_cache
+        return
+
+    partes = []
+    async with _client().stream('POST', **_request(mensagem, stream=True)) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            choices = json.loads(data).get('choices') or [{}]
+            content = (choices[0].get('delta') or {}).get('content')
+            if content:
+                partes.append(content)
+                yield content
+        else:
+            # Conexão terminou sem [DONE]: resposta possivelmente truncada
+            return
+    if chave is not None:
+        respostas.set(chave, ''.join(partes).strip())
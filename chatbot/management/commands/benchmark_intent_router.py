@@ -0,0 +1,69 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from chatbot.router import IntentRouter, normalizar_texto
+
+PALAVRAS = (
+    'treino carga peso dieta proteina agua sono corrida perna braco costas ombro abdomen '
+    'calorias ovo frango arroz feijao suplemento creatina whey alongamento descanso serie '
+    'repeticao intensidade cardio meta gordura massa musculo semana dia hoje ontem amanha'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo por mensagem do roteador de intenções (autômato único) contra a "
+        "cadeia de testes `in`, com intenções sintéticas em quantidades crescentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000', help='Quantidades de intenções, separadas por vírgula.')
+        parser.add_argument('--messages', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, sizes, messages, seed, **options):
+        rng = random.Random(seed)
+        corpus = [' '.join(rng.choices(PALAVRAS, k=rng.randint(4, 16))) for _ in range(messages)]
+
+        self.stdout.write(f"{'intenções':>10} {'roteador':>12} {'cadeia in':>12}")
+        results = []
+        for size in (int(value) for value in sizes.split(',')):
+            frases = [
+                [' '.join(rng.choices(PALAVRAS, k=rng.randint(2, 3))) for _ in range(rng.randint(1, 3))]
+                for _ in range(size)
+            ]
+            router = IntentRouter()
+            for i, grupo in enumerate(frases):
+                router.registrar(f'intent_{i}', None, grupo)
+            router.match('')  # compila fora da medição
+
+            def cadeia(mensagem):
+                # O que gerar_resposta_inteligente fazia: um `in` por frase, em ordem
+                msg = f' {normalizar_texto(mensagem)} '
+                for i, grupo in enumerate(frases):
+                    if any(f' {frase} ' in msg for frase in grupo):
+                        return i
+                return None
+
+            roteador_us = self._per_message(router.match, corpus)
+            cadeia_us = self._per_message(cadeia, corpus)
+            self.stdout.write(f"{size:>10} {roteador_us:>9.1f} µs {cadeia_us:>9.1f} µs")
+            results.append((size, roteador_us, cadeia_us))
+
+        (first, r0, c0), (last, r1, c1) = results[0], results[-1]
+        self.stdout.write(self.style.SUCCESS(
+            f"De {first} para {last} intenções: roteador {r1 / r0:.1f}x, cadeia {c1 / c0:.1f}x."
+        ))
+
+    @staticmethod
+    def _per_message(func, corpus, repeat=3):
+        best = None
+        for _ in range(repeat):
+            start = perf_counter()
+            for mensagem in corpus:
+                func(mensagem)
+            elapsed = perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best / len(corpus) * 1e6
@@ -0,0 +1,94 @@
+import asyncio
+from math import ceil
+from time import perf_counter
+from uuid import uuid4
+
+import httpx
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chatbot.fake_llm import FakeLLMServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga de /chat/chat_ai/ contra um LLM falso local com latência fixa. "
+        "Sem --url, o app ASGI roda neste processo, em um único event loop (equivale a um worker). "
+        "O usuário de teste e suas mensagens são apagados ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--delay', type=float, default=0.5, help='Latência simulada do LLM, em segundos.')
+        parser.add_argument('--workers', type=int, default=3, help='Workers síncronos usados na comparação.')
+        parser.add_argument(
+            '--url',
+            help='Servidor já rodando (ex.: http://127.0.0.1:8000), iniciado com '
+                 'OPENAI_BASE_URL=http://127.0.0.1:<llm-port>/v1 e o mesmo banco.',
+        )
+        parser.add_argument('--llm-port', type=int, default=0, help='Porta do LLM falso (0 = qualquer livre).')
+
+    def handle(self, *args, requests, concurrency, delay, workers, url, llm_port, **options):
+        user = get_user_model().objects.create_user(email=f'loadtest-{uuid4().hex[:8]}@example.com', password=None)
+        token = str(AccessToken.for_user(user))
+        try:
+            with FakeLLMServer(delay=delay, port=llm_port) as llm, override_settings(OPENAI_BASE_URL=llm.url):
+                self.stdout.write(f"LLM falso em {llm.url} ({delay * 1000:.0f} ms por completion)")
+                if url:
+                    transport = None
+                else:
+                    from fitness_app.asgi import application
+                    transport = httpx.ASGITransport(app=application)
+                    url = 'http://localhost'
+                elapsed, latencies, errors = asyncio.run(
+                    self._run(url, transport, token, requests, concurrency)
+                )
+                peak = llm.peak
+        finally:
+            user.delete()
+
+        latencies = np.asarray(latencies) * 1000
+        self.stdout.write(f"requisições: {requests} ({errors} com erro), concorrência {concurrency}")
+        self.stdout.write(f"      tempo: {elapsed:.2f} s  ({requests / elapsed:,.1f} req/s)")
+        if latencies.size:
+            p50, p95 = np.percentile(latencies, [50, 95])
+            self.stdout.write(f"   latência: p50 {p50:.0f} ms, p95 {p95:.0f} ms")
+        self.stdout.write(f"pico de completions simultâneas no LLM: {peak}")
+
+        # Com workers síncronos cada completion prende um worker do início ao fim
+        sync_floor = ceil(requests / workers) * delay
+        style = self.style.SUCCESS if peak > workers and not errors else self.style.WARNING
+        self.stdout.write(style(
+            f"{workers} workers síncronos levariam pelo menos {sync_floor:.1f} s "
+            f"({sync_floor / elapsed:.1f}x mais lento)."
+        ))
+
+    @staticmethod
+    async def _run(url, transport, token, total, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async with httpx.AsyncClient(
+            base_url=url,
+            transport=transport,
+            headers={'Authorization': f'Bearer {token}'},
+            timeout=None,
+            limits=httpx.Limits(max_connections=concurrency),
+        ) as client:
+            async def one(i):
+                nonlocal errors
+                async with semaphore:
+                    start = perf_counter()
+                    response = await client.post('/chat/chat_ai/', json={'user_message': f'Pergunta {i}'})
+                    latencies.append(perf_counter() - start)
+                    if response.status_code != 200 or response.json()['response'].startswith('Erro'):
+                        errors += 1
+
+            start = perf_counter()
+            await asyncio.gather(*(one(i) for i in range(total)))
+            return perf_counter() - start, latencies, errors
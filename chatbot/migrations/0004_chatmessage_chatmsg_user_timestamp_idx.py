@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_rename_response_chatmessage_bot_response_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['user', '-timestamp'], name='chatmsg_user_timestamp_idx'),
+        ),
+    ]
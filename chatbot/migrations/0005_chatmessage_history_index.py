@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 04:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0004_chatmessage_chatmsg_user_timestamp_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatmessage',
+            name='chatmsg_user_timestamp_idx',
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['user', '-timestamp', '-id'], name='chatmsg_user_timestamp_idx'),
+        ),
+    ]
@@ -9,6 +9,10 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Histórico paginado por cursor em (timestamp, id) e "mensagens desde"
+            models.Index(fields=['user', '-timestamp', '-id'], name='chatmsg_user_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.email} - {self.user_message[:30]}'
@@ -0,0 +1,137 @@
+import re
+import unicodedata
+from collections import deque
+from typing import Callable, NamedTuple
+
+
+def normalizar_texto(texto):
+    """
+    Minúsculas, sem acentos, sem pontuação e com espaços simples.
+    """
+    texto = unicodedata.normalize('NFKD', texto.casefold())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', texto).split())
+
+
+class Intent(NamedTuple):
+    nome: str
+    handler: Callable
+    # Cada grupo é uma tupla de frases alternativas; todos os grupos precisam aparecer
+    grupos: tuple
+    prioridade: int
+    ordem: int
+
+
+class _Automato:
+    """
+    Autômato de Aho-Corasick sobre as frases de gatilho.
+
+    A busca percorre a mensagem uma vez, em O(tamanho da mensagem + ocorrências),
+    qualquer que seja o número de frases.
+    """
+
+    def __init__(self, frases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.saida = [()]
+        for frase, saidas in frases.items():
+            estado = 0
+            for c in frase:
+                proximo = self.goto[estado].get(c)
+                if proximo is None:
+                    proximo = len(self.goto)
+                    self.goto[estado][c] = proximo
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.saida.append(())
+                estado = proximo
+            self.saida[estado] += tuple(saidas)
+
+        # Links de falha em largura: o estado de falha de um nó já está pronto quando ele é visitado
+        fila = deque(self.goto[0].values())
+        while fila:
+            estado = fila.popleft()
+            for c, proximo in self.goto[estado].items():
+                fila.append(proximo)
+                falha = self.fail[estado]
+                while falha and c not in self.goto[falha]:
+                    falha = self.fail[falha]
+                self.fail[proximo] = self.goto[falha].get(c, 0)
+                self.saida[proximo] += self.saida[self.fail[proximo]]
+
+    def buscar(self, texto):
+        goto, fail, saida = self.goto, self.fail, self.saida
+        estado = 0
+        for c in texto:
+            while estado and c not in goto[estado]:
+                estado = fail[estado]
+            estado = goto[estado].get(c, 0)
+            if saida[estado]:
+                yield from saida[estado]
+
+
+class IntentRouter:
+    """
+    Registro de intenções cujas frases de gatilho compilam em um único autômato.
+
+    As frases são normalizadas como as mensagens (sem acentos nem pontuação) e
+    casam só com palavras inteiras. Quando várias intenções casam, vence a de
+    maior ``prioridade``; no empate, a registrada primeiro. Uso::
+
+        router = IntentRouter()
+
+        @router.intent('carga_rosca', ['carga'], ['rosca direta'])
+        async def carga_rosca(user, mensagem):
+            ...
+    """
+
+    def __init__(self):
+        self._intents = []
+        self._automato = None
+
+    def intent(self, nome, *grupos, prioridade=0):
+        if not grupos or not all(grupos):
+            raise ValueError(f'A intenção {nome!r} precisa de ao menos uma frase por grupo.')
+
+        def registrar(handler):
+            self.registrar(nome, handler, *grupos, prioridade=prioridade)
+            return handler
+        return registrar
+
+    def registrar(self, nome, handler, *grupos, prioridade=0):
+        grupos = tuple(tuple(normalizar_texto(frase) for frase in grupo) for grupo in grupos)
+        self._intents.append(Intent(nome, handler, grupos, prioridade, len(self._intents)))
+        self._automato = None
+
+    @property
+    def intents(self):
+        return tuple(self._intents)
+
+    def _compilar(self):
+        frases = {}
+        for i, intent in enumerate(self._intents):
+            for g, grupo in enumerate(intent.grupos):
+                for frase in grupo:
+                    # Espaços nas pontas: só casa palavras inteiras
+                    frases.setdefault(f' {frase} ', set()).add((i, g))
+        return _Automato(frases)
+
+    def match(self, mensagem):
+        """
+        Intenção da mensagem, ou None se nenhuma casar.
+        """
+        if self._automato is None:
+            self._automato = self._compilar()
+
+        grupos_vistos = {}
+        for i, g in self._automato.buscar(f' {normalizar_texto(mensagem)} '):
+            grupos_vistos[i] = grupos_vistos.get(i, 0) | (1 << g)
+
+        melhor = None
+        for i, vistos in grupos_vistos.items():
+            intent = self._intents[i]
+            if vistos != (1 << len(intent.grupos)) - 1:
+                continue
+            if melhor is None or (-intent.prioridade, intent.ordem) < (-melhor.prioridade, melhor.ordem):
+                melhor = intent
+        return melhor
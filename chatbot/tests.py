@@ -1,7 +1,21 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from time import perf_counter
+
 import pytest
+from django.test import AsyncClient, AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+from chatbot.cache import TTLCache, chave_cache, respostas
+from chatbot.fake_llm import FakeLLMServer
+from chatbot.intents import router
+from chatbot.llm import chamar_openai, stream_openai
 from chatbot.models import ChatMessage
+from chatbot.router import IntentRouter
+from chatbot.views import chat_ai
+from fitness_app.query_plans import uses_index
 
 @pytest.fixture
 def user():
@@ -24,3 +38,342 @@ def test_chat_ai(client, user):
 
     # Verificar se a mensagem foi salva no banco de dados
     assert ChatMessage.objects.count() == 1
+
+
+class ChatMessageQueryPlanTest(TestCase):
+    def test_history_uses_user_timestamp_index(self):
+        user = get_user_model().objects.create_user(email="planuser@example.com", password="testpassword")
+        queryset = ChatMessage.objects.filter(user=user)
+        self.assertTrue(uses_index(queryset, 'chatmsg_user_timestamp_idx'))
+
+
+class AsyncChatTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.llm = FakeLLMServer(delay=0.3, reply='Beba água.').start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.llm.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        respostas.clear()
+        self.user = get_user_model().objects.create_user(email="asyncchat@example.com", password="testpassword")
+        self.client = AsyncClient()
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.settings_override = override_settings(OPENAI_BASE_URL=self.llm.url)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    async def test_requires_jwt(self):
+        response = await self.client.post('/chat/chat_ai/', {'user_message': 'Oi'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.client.post(
+            '/chat/chat_ai/', {'user_message': 'Oi'}, headers={'Authorization': 'Bearer invalido'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_empty_message(self):
+        response = await self.client.post('/chat/chat_ai/', {'user_message': '  '}, content_type='application/json', headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_local_intent_skips_llm(self):
+        requests_before = self.llm.requests
+        response = await self.client.post('/chat/chat_ai/', {'user_message': 'Qual meu peso atual?'}, headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['response'], "Você ainda não registrou nenhum peso.")
+        self.assertEqual(self.llm.requests, requests_before)
+        self.assertEqual(await ChatMessage.objects.filter(user=self.user).acount(), 1)
+
+    async def test_concurrent_requests_share_the_event_loop(self):
+        # Direto na view: o cliente de testes serializa as requisições quando há
+        # middleware síncrono (whitenoise); o ASGIHandler dá um contexto por requisição
+        factory = AsyncRequestFactory()
+        requests = [
+            factory.post(
+                '/chat/chat_ai/', {'user_message': f'Pergunta {i}'}, content_type='application/json', headers=self.auth
+            )
+            for i in range(8)
+        ]
+        started = perf_counter()
+        responses = await asyncio.gather(*(chat_ai(request) for request in requests))
+        elapsed = perf_counter() - started
+
+        self.assertEqual({json.loads(response.content)['response'] for response in responses}, {'Beba água.'})
+        # Em série seriam 8 x 0,3 s
+        self.assertLess(elapsed, 8 * 0.3 / 2)
+        self.assertGreater(self.llm.peak, 1)
+        self.assertEqual(await ChatMessage.objects.filter(user=self.user).acount(), 8)
+
+    async def test_llm_timeout_returns_error_message(self):
+        with override_settings(OPENAI_TIMEOUT=0.05):
+            response = await self.client.post('/chat/chat_ai/', {'user_message': 'Demorado'}, headers=self.auth)
+        self.assertTrue(response.json()['response'].startswith('Erro ao chamar a OpenAI'))
+
+
+def _parse_events(chunks):
+    events = []
+    for block in b''.join(chunks).decode().split('\n\n'):
+        if block:
+            name, data = block.split('\n')
+            events.append((name.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+    return events
+
+
+class ChatStreamTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.llm = FakeLLMServer(delay=0.05, token_delay=0.1, reply='Beba dois litros de água por dia.').start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.llm.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        respostas.clear()
+        self.user = get_user_model().objects.create_user(email="streamchat@example.com", password="testpassword")
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.settings_override = override_settings(OPENAI_BASE_URL=self.llm.url)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def request(self, message, **extra):
+        return AsyncRequestFactory().post(
+            '/chat/chat_ai/', {'user_message': message, **extra}, content_type='application/json', headers=self.auth
+        )
+
+    async def test_tokens_arrive_before_completion_ends(self):
+        response = await chat_ai(self.request('Quanto de água?', stream=True))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        started = perf_counter()
+        chunks, arrivals = [], []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk)
+            arrivals.append(perf_counter() - started)
+
+        events = _parse_events(chunks)
+        tokens = [data['text'] for name, data in events if name == 'token']
+        self.assertEqual(len(tokens), 7)
+        self.assertEqual(''.join(tokens), 'Beba dois litros de água por dia.')
+        # Primeiro token bem antes do fim da geração (6 x 0,1 s entre tokens)
+        self.assertLess(arrivals[0], arrivals[-1] - 0.4)
+
+        name, done = events[-1]
+        self.assertEqual(name, 'done')
+        message = await ChatMessage.objects.aget(pk=done['id'])
+        self.assertEqual(message.bot_response, 'Beba dois litros de água por dia.')
+
+    async def test_disconnect_closes_upstream_without_saving(self):
+        response = await chat_ai(self.request('Quanto de água?', stream=True))
+        first_chunk = asyncio.Event()
+
+        async def consume():
+            async for _ in response.streaming_content:
+                first_chunk.set()
+
+        disconnects = self.llm.disconnects
+        task = asyncio.create_task(consume())
+        await first_chunk.wait()
+        # O que o ASGIHandler faz quando recebe http.disconnect
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        for _ in range(50):
+            if self.llm.disconnects > disconnects:
+                break
+            await asyncio.sleep(0.02)
+        self.assertEqual(self.llm.disconnects, disconnects + 1)
+        self.assertEqual(self.llm.in_flight, 0)
+        self.assertFalse(await ChatMessage.objects.filter(user=self.user).aexists())
+
+    async def test_local_intent_streams_single_event(self):
+        response = await chat_ai(self.request('Qual meu peso atual?', stream='true'))
+        events = _parse_events([chunk async for chunk in response.streaming_content])
+        self.assertEqual([name for name, _ in events], ['token', 'done'])
+        self.assertEqual(events[1][1]['response'], "Você ainda não registrou nenhum peso.")
+
+
+class ChatCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.llm = FakeLLMServer(delay=0, token_delay=0, reply='Cerca de 70 kcal.').start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.llm.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        respostas.clear()
+        self.settings_override = override_settings(OPENAI_BASE_URL=self.llm.url)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_key_ignores_case_accents_punctuation_and_fillers(self):
+        self.assertEqual(
+            chave_cache('Oi! Me diga, por favor:   QUANTAS calorias tem um ovo?'),
+            chave_cache('quantas calorias tem um ovo'),
+        )
+        self.assertEqual(chave_cache('Proteína do feijão'), chave_cache('proteina do feijao'))
+
+    def test_personal_or_long_questions_are_not_cached(self):
+        self.assertIsNone(chave_cache('Quantas calorias eu devo comer?'))
+        self.assertIsNone(chave_cache('Minha dieta tem ovo demais?'))
+        self.assertIsNone(chave_cache('ovo ' * 60))
+
+    def test_lru_eviction_and_ttl(self):
+        now = [0.0]
+        cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)  # "b" é a menos usada
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        now[0] = 11
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['expirations'], 1)
+        self.assertEqual(cache.stats()['hit_rate'], 0.5)
+
+    async def test_equivalent_questions_hit_the_cache(self):
+        requests_before = self.llm.requests
+        self.assertEqual(await chamar_openai('Quantas calorias tem um ovo?'), 'Cerca de 70 kcal.')
+        self.assertEqual(await chamar_openai('quantas calorias tem um OVO'), 'Cerca de 70 kcal.')
+        self.assertEqual([part async for part in stream_openai('Quantas calorias tem um ovo')], ['Cerca de 70 kcal.'])
+        self.assertEqual(self.llm.requests, requests_before + 1)
+        self.assertEqual(respostas.stats()['hits'], 2)
+
+    async def test_personal_questions_and_errors_always_call_the_model(self):
+        requests_before = self.llm.requests
+        await chamar_openai('Quantas calorias eu gasto correndo?')
+        await chamar_openai('Quantas calorias eu gasto correndo?')
+        self.assertEqual(self.llm.requests, requests_before + 2)
+        self.assertEqual(respostas.stats()['bypassed'], 2)
+
+        with override_settings(OPENAI_BASE_URL='http://127.0.0.1:9/v1'):
+            self.assertTrue((await chamar_openai('Quantas calorias tem uma maçã?')).startswith('Erro'))
+        self.assertEqual(respostas.stats()['size'], 0)
+
+    def test_stats_endpoint_is_admin_only(self):
+        client = APIClient()
+        user = get_user_model().objects.create_user(email="cachestats@example.com", password="testpassword")
+        client.force_authenticate(user=user)
+        self.assertEqual(client.get('/chat/cache-stats/').status_code, 403)
+        user.is_staff = True
+        user.save()
+        response = client.get('/chat/cache-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_rate', response.data)
+
+
+# (mensagem, intenção esperada)
+INTENT_CASES = [
+    ('Qual meu peso atual?', 'peso_atual'),
+    ('PESO ATUAL', 'peso_atual'),
+    ('peso-atual', 'peso_atual'),
+    ('Me passa um treino de pernas', 'treino_pernas'),
+    ('Tem alguma sugestao de treino?', 'treino_pernas'),
+    ('Sugestão de treino pra hoje', 'treino_pernas'),
+    ('quero um treino novo', 'treino_pernas'),
+    ('Qual carga uso na rosca direta?', 'carga_rosca_direta'),
+    ('Rosca direta: que carga?', 'carga_rosca_direta'),
+    # Os dois grupos casam, mas carga_rosca_direta foi registrada antes
+    ('Qual a carga ideal na rosca direta?', 'carga_rosca_direta'),
+    ('Qual a carga ideal?', 'carga_ideal'),
+    ('carga sugerida para hoje', 'carga_ideal'),
+    ('Quantas calorias tem um ovo?', None),
+    ('rosca direta', None),
+    ('Qual o peso atualizado?', None),
+    ('descarga ideal', None),
+    ('', None),
+]
+
+
+class IntentRouterTest(SimpleTestCase):
+    def test_corpus(self):
+        for mensagem, esperado in INTENT_CASES:
+            with self.subTest(mensagem=mensagem):
+                intent = router.match(mensagem)
+                self.assertEqual(intent.nome if intent else None, esperado)
+
+    def test_priority_overrides_registration_order(self):
+        local = IntentRouter()
+        local.registrar('generica', None, ['treino'])
+        local.registrar('especifica', None, ['treino'], ['costas'], prioridade=1)
+        self.assertEqual(local.match('treino de costas').nome, 'especifica')
+        self.assertEqual(local.match('treino de pernas').nome, 'generica')
+
+    def test_overlapping_triggers(self):
+        local = IntentRouter()
+        local.registrar('a', None, ['de perna'])
+        local.registrar('b', None, ['treino de perna forte'])
+        local.registrar('c', None, ['perna forte'], prioridade=2)
+        self.assertEqual(local.match('um treino de perna forte').nome, 'c')
+        self.assertEqual(local.match('treino de perna').nome, 'a')
+
+    def test_registering_recompiles(self):
+        local = IntentRouter()
+        self.assertIsNone(local.match('alongamento'))
+        local.registrar('alongamento', None, ['Alongamento'])
+        self.assertEqual(local.match('alongamento').nome, 'alongamento')
+
+
+class ChatHistoryTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email="historyuser@example.com", password="testpassword")
+        other = User.objects.create_user(email="otherhistory@example.com", password="testpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        base = datetime(2025, 4, 1, 12, 0, tzinfo=dt_timezone.utc)
+        self.messages = []
+        for i in range(5):
+            message = ChatMessage.objects.create(user=self.user, user_message=f'm{i}', bot_response=f'r{i}')
+            # Duas mensagens no mesmo instante: o id desempata
+            ChatMessage.objects.filter(pk=message.pk).update(timestamp=base + timedelta(minutes=min(i, 3)))
+            self.messages.append(message.pk)
+        ChatMessage.objects.create(user=other, user_message='alheia', bot_response='x')
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [item['id'] for item in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_newest_first_across_pages_with_ties(self):
+        self.assertEqual(self.walk('/chat/history/?page_size=2'), self.messages[::-1])
+
+    def test_since_returns_newer_messages_oldest_first(self):
+        ids = self.walk('/chat/history/?page_size=1&since=2025-04-01T12:01:00Z')
+        self.assertEqual(ids, self.messages[2:])
+
+    def test_since_accepts_unencoded_offset(self):
+        response = self.client.get('/chat/history/', {'since': '2025-04-01T15:01:30 03:00'})
+        self.assertEqual([item['id'] for item in response.data['results']], self.messages[2:])
+
+    def test_invalid_since(self):
+        for since in ('ontem', '2025-02-30T10:00:00Z', '2025-13-45T00:00:00'):
+            with self.subTest(since=since):
+                response = self.client.get('/chat/history/', {'since': since})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('since', response.data)
+
+    def test_history_queries_use_index(self):
+        queryset = ChatMessage.objects.filter(user=self.user)
+        self.assertTrue(uses_index(queryset.order_by('-timestamp', '-id'), 'chatmsg_user_timestamp_idx'))
+        since = datetime(2025, 4, 1, tzinfo=dt_timezone.utc)
+        self.assertTrue(uses_index(
+            queryset.filter(timestamp__gt=since).order_by('timestamp', 'id'), 'chatmsg_user_timestamp_idx'
+        ))
@@ -1,7 +1,9 @@
 # chatbot/urls.py
 from django.urls import path
-from .views import chat_ai
+from .views import ChatHistoryView, cache_stats, chat_ai
 
 urlpatterns = [
     path('chat_ai/', chat_ai, name='chat_ai'),
+    path('cache-stats/', cache_stats, name='chat-cache-stats'),
+    path('history/', ChatHistoryView.as_view(), name='chat-history'),
 ]
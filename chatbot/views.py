@@ -1,99 +1,222 @@
-import openai
+import json
+from contextlib import aclosing
+
+import httpx
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework import status
-from workouts.models import Workout
-from progress.models import ProgressEntry
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from fitness_app.mixins import ValuesListMixin
 from chatbot.models import ChatMessage
-from ai import trainer
-from decouple import config
-from datetime import datetime
-
-# Definindo a chave da API do OpenAI
-openai.api_key = config("OPENAI_API_KEY")
-
-def chamar_openai(mensagem):
+from chatbot.serializers import ChatMessageSerializer
+from chatbot.cache import respostas
+from chatbot.intents import router
+from chatbot.llm import chamar_openai, stream_openai
+
+
+async def autenticar(request):
+    """
+    Autenticação JWT do DRF para views assíncronas.
+
+    A validação do token é só criptografia (não bloqueia); o usuário é buscado
+    com o ORM assíncrono. Retorna None sem cabeçalho Authorization e levanta
+    AuthenticationFailed para token inválido ou usuário inativo.
+    """
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    token = authenticator.get_validated_token(raw_token)
     try:
-        # Usando o novo método da API do OpenAI
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",  # Modelo recomendado (pode ser "gpt-4")
-            messages=[{"role": "user", "content": mensagem}],
-            max_tokens=150
-        )
-        return response.choices[0].message['content'].strip()
-    except Exception as e:
-        return f"Erro ao chamar a OpenAI: {str(e)}"
-
-def gerar_resposta_inteligente(user, mensagem):
-    msg = mensagem.lower()
-
-    if "peso atual" in msg:
-        ultimo = ProgressEntry.objects.filter(user=user).order_by('-date').first()
-        if ultimo:
-            data_formatada = ultimo.date.strftime('%d/%m/%Y')
-            return f"Seu peso atual registrado é {ultimo.weight} kg em {data_formatada}."
-        return "Você ainda não registrou nenhum peso."
-
-    elif "treino de pernas" in msg or "sugestão de treino" in msg or "quero um treino" in msg:
-        treino_existente = Workout.objects.filter(user=user, focus="pernas").order_by('-created_at').first()
-        if treino_existente:
-            return f"Seu último treino de pernas foi: {treino_existente.exercises}."
-
-        sugestao = "Agachamento, Leg Press, Cadeira Extensora"
-        Workout.objects.create(
-            user=user,
-            workout_type="musculacao",
-            focus="pernas",
-            exercises=sugestao,
-            duration=45,
-            intensity="Alta",
-            frequency="3x por semana",
-            series_reps="3x12",
-            carga=60,
-            load="media"
-        )
-        return f"Gerei um treino de pernas com base no seu objetivo e já salvei: {sugestao}"
-
-    elif "carga" in msg and "rosca direta" in msg:
-        treino = Workout.objects.filter(user=user, exercises__icontains="rosca direta").order_by('-created_at').first()
-        if treino:
-            return f"Você costuma usar cerca de {treino.carga} kg para rosca direta."
-        return "Ainda não encontrei registros de rosca direta nos seus treinos."
-
-    elif "carga ideal" in msg or "carga sugerida" in msg:
-        historico = Workout.objects.filter(user=user, focus="pernas").order_by('-created_at')[:5]
-        historico_treinos = []
-
-        for treino in historico:
-            try:
-                carga_num = float(treino.carga)
-                historico_treinos.append({"carga": carga_num})
-            except (ValueError, TypeError):
-                continue
-
-        sugestao = trainer.ajustar_treino(historico_treinos)
-        return f"Sugestão de carga para treino de pernas: {sugestao['carga']} kg para {sugestao['reps']} repetições."
-
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise AuthenticationFailed('O token não contém identificação de usuário reconhecível.')
+    user = await get_user_model().objects.filter(**{jwt_settings.USER_ID_FIELD: user_id}).afirst()
+    if user is None or not user.is_active:
+        raise AuthenticationFailed('Usuário não encontrado ou inativo.')
+    return user
+
+
+def _nao_autenticado(detail):
+    response = JsonResponse({'detail': detail}, status=status.HTTP_401_UNAUTHORIZED)
+    response['WWW-Authenticate'] = 'Bearer realm="api"'
+    return response
+
+
+def _ler_mensagem(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+async def resposta_local(user, mensagem):
+    """
+    Resposta calculada a partir dos dados do usuário, ou None se a mensagem deve ir para a OpenAI.
+
+    Todas as frases de gatilho estão em um único autômato (chatbot.intents):
+    o custo por mensagem não cresce com o número de intenções.
+    """
+    intent = router.match(mensagem)
+    if intent is None:
+        return None
+    return await intent.handler(user, mensagem)
+
+
+async def gerar_resposta_inteligente(user, mensagem):
+    resposta = await resposta_local(user, mensagem)
+    if resposta is None:
+        resposta = await chamar_openai(mensagem)
+    return resposta
+
+
+def _evento(nome, dados):
+    return f"event: {nome}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+async def _eventos(user, user_message):
+    """
+    Eventos SSE da resposta: ``token`` a cada pedaço de texto e, no fim,
+    ``done`` com a mensagem já salva (ou ``error``, sem salvar nada).
+
+    Se o cliente desconecta, o ASGIHandler cancela a tarefa que consome este
+    gerador: o cancelamento chega em ``stream_openai``, que fecha a conexão com
+    a OpenAI, e a mensagem incompleta não é gravada.
+    """
+    partes = []
+    local = await resposta_local(user, user_message)
+    if local is not None:
+        partes.append(local)
+        yield _evento('token', {'text': local})
     else:
-        return chamar_openai(mensagem)
+        try:
+            async with aclosing(stream_openai(user_message)) as tokens:
+                async for token in tokens:
+                    partes.append(token)
+                    yield _evento('token', {'text': token})
+        except (httpx.HTTPError, ValueError) as e:
+            yield _evento('error', {'detail': f"Erro ao chamar a OpenAI: {str(e) or type(e).__name__}"})
+            return
+
+    bot_response = ''.join(partes).strip()
+    message = await ChatMessage.objects.acreate(user=user, user_message=user_message, bot_response=bot_response)
+    yield _evento('done', {'id': message.id, 'response': bot_response})
+
+
+def _quer_stream(request, data):
+    if 'text/event-stream' in request.headers.get('Accept', ''):
+        return True
+    return str(data.get('stream', '')).lower() in ('1', 'true')
+
+
+@csrf_exempt
+@require_POST
+async def chat_ai(request):
+    """
+    Chat com a IA, assíncrono de ponta a ponta.
+
+    Sob ASGI (fitness_app.asgi) a espera pela OpenAI não ocupa um worker: um
+    único processo atende muitas conversas simultâneas. Mesmo contrato da
+    versão DRF: ``{"user_message": ...}`` -> ``{"response": ...}``.
+
+    Com ``"stream": true`` (ou ``Accept: text/event-stream``) a resposta é
+    enviada como server-sent events, token a token, à medida que a OpenAI gera.
+    """
+    try:
+        user = await autenticar(request)
+    except AuthenticationFailed as exc:
+        return _nao_autenticado(exc.detail if isinstance(exc.detail, str) else 'Token inválido ou expirado.')
+    if user is None:
+        return _nao_autenticado('As credenciais de autenticação não foram fornecidas.')
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def chat_ai(request):
-    user = request.user
-    user_message = request.data.get('user_message', '').strip()
+    data = _ler_mensagem(request)
+    if data is None:
+        return JsonResponse({'error': 'JSON inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+    user_message = str(data.get('user_message', '')).strip()
 
     if not user_message:
-        return Response({'error': 'A mensagem não pode estar vazia.'}, status=status.HTTP_400_BAD_REQUEST)
+        return JsonResponse({'error': 'A mensagem não pode estar vazia.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if _quer_stream(request, data):
+        response = StreamingHttpResponse(_eventos(user, user_message), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Desliga o buffer de proxies (nginx), senão os tokens chegam todos juntos no fim
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
-    bot_response = gerar_resposta_inteligente(user, user_message)
+    bot_response = await gerar_resposta_inteligente(user, user_message)
 
     # Salvando a mensagem do usuário e a resposta do bot no banco
-    ChatMessage.objects.create(
+    await ChatMessage.objects.acreate(
         user=user,
         user_message=user_message,
         bot_response=bot_response
     )
 
-    return Response({'response': bot_response}, status=status.HTTP_200_OK)
+    return JsonResponse({'response': bot_response}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    Métricas do cache de respostas da OpenAI (acertos, taxa de acerto, evicções) deste processo.
+    """
+    return Response(respostas.stats())
+
+
+def parse_since(value):
+    # "+" do fuso chega como espaço quando o cliente não codifica a query string
+    try:
+        since = parse_datetime(value.strip().replace(' ', '+'))
+    except ValueError:
+        # Bem formada, mas impossível (ex.: 30 de fevereiro)
+        since = None
+    if since is None:
+        raise ValidationError({'since': ['Use data/hora ISO 8601, ex.: 2025-04-01T12:00:00Z.']})
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+class ChatHistoryView(ValuesListMixin, generics.ListAPIView):
+    """
+    Histórico do chat do usuário, paginado por cursor em (timestamp, id).
+
+    Sem parâmetros, vem da mensagem mais recente para a mais antiga. Com
+    ``?since=<data/hora>`` vêm só as mensagens posteriores, da mais antiga para
+    a mais nova: o cliente sincroniza o que falta seguindo os links ``next``.
+    Nos dois casos a consulta é uma busca por intervalo no índice
+    (user, -timestamp, -id).
+    """
+    serializer_class = ChatMessageSerializer
+    permission_classes = [IsAuthenticated]
+
+    @property
+    def ordering(self):
+        if 'since' in self.request.query_params:
+            return ('timestamp', 'id')
+        return ('-timestamp', '-id')
+
+    def get_queryset(self):
+        queryset = ChatMessage.objects.filter(user=self.request.user)
+        since = self.request.query_params.get('since')
+        if since is not None:
+            queryset = queryset.filter(timestamp__gt=parse_since(since))
+        return queryset
@@ -6,6 +6,8 @@ class DietFilter(filters.FilterSet):
     calories__lte = filters.NumberFilter(field_name="calories", lookup_expr="lte")
     protein__gte = filters.NumberFilter(field_name="protein", lookup_expr="gte")
     carbs__lte = filters.NumberFilter(field_name="carbs", lookup_expr="lte")
+    date__gte = filters.DateFilter(field_name="date", lookup_expr="gte")
+    date__lte = filters.DateFilter(field_name="date", lookup_expr="lte")
 
     class Meta:
         model = Diet
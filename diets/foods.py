@@ -0,0 +1,118 @@
+import csv
+import re
+import unicodedata
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+FOODS_CSV = Path(__file__).resolve().parent / 'data' / 'foods.csv'
+MACROS = ('calories', 'protein', 'carbs', 'fat')
+TOKEN = re.compile(r'[a-z0-9%]+')
+
+
+class Food(NamedTuple):
+    id: int
+    name: str
+    calories: float
+    protein: float
+    carbs: float
+    fat: float
+
+
+def normalizar(texto):
+    """
+    Minúsculas e sem acentos, para busca ("Feijão" casa com "feij" e "feijao").
+    """
+    sem_acento = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    return sem_acento.lower()
+
+
+def tokens(texto):
+    return TOKEN.findall(normalizar(texto))
+
+
+class FoodIndex:
+    """
+    Índice de prefixos em memória sobre a tabela de alimentos.
+
+    Guarda as palavras distintas dos nomes numa lista ordenada (``keys``) e,
+    em paralelo, os alimentos que contêm cada palavra (``postings``). Um
+    prefixo vira uma busca binária seguida da varredura só das palavras que
+    começam com ele.
+    """
+
+    def __init__(self, foods):
+        self.foods = tuple(foods)
+        self.by_id = {food.id: food for food in self.foods}
+        self.names = tuple(normalizar(food.name) for food in self.foods)
+
+        words = {}
+        for position, food in enumerate(self.foods):
+            for word in tokens(food.name):
+                words.setdefault(word, set()).add(position)
+        self.keys = sorted(words)
+        self.postings = [frozenset(words[key]) for key in self.keys]
+
+    def _prefix_matches(self, prefix):
+        matches = set()
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            matches |= self.postings[i]
+            i += 1
+        return matches
+
+    def search(self, query, limit=10):
+        """
+        Alimentos cujo nome tem, para cada palavra da busca, uma palavra que começa com ela.
+
+        Nomes que começam com a busca vêm primeiro; depois, os mais curtos.
+        """
+        words = tokens(query)
+        if not words:
+            return []
+
+        candidates = None
+        # Palavras mais longas primeiro: costumam ser as mais seletivas
+        for word in sorted(set(words), key=len, reverse=True):
+            matches = self._prefix_matches(word)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+
+        query = ' '.join(words)
+        ranked = sorted(
+            candidates,
+            key=lambda position: (not self.names[position].startswith(query), len(self.names[position]), self.names[position]),
+        )
+        return [self.foods[position] for position in ranked[:limit]]
+
+    def get(self, food_id):
+        return self.by_id.get(food_id)
+
+
+def read_foods(path=FOODS_CSV):
+    with open(path, newline='', encoding='utf-8') as file:
+        return [
+            Food(int(row['id']), row['name'], *(float(row[macro]) for macro in MACROS))
+            for row in csv.DictReader(file)
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_index():
+    """
+    Índice da tabela embutida, carregado uma única vez por processo (worker).
+    """
+    return FoodIndex(read_foods())
+
+
+def macros_for(items):
+    """
+    Soma os macros de ``[(food, gramas), ...]`` (valores da tabela são por 100 g).
+    """
+    totals = dict.fromkeys(MACROS, 0.0)
+    for food, grams in items:
+        for macro in MACROS:
+            totals[macro] += getattr(food, macro) * grams / 100
+    return {macro: round(value, 1) for macro, value in totals.items()}
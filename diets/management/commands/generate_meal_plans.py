@@ -0,0 +1,81 @@
+import secrets
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from diets.models import DAILY_TARGETS, Diet
+from diets.planner import build_plan, rng_for, sample_macros
+from fitness_app.versioning import bump_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera planos alimentares de vários dias para os usuários com objetivo definido, em lotes. "
+        "Usuários que já têm refeições no período são ignorados, então o job pode ser reexecutado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Dias de plano por usuário.')
+        parser.add_argument('--start-date', type=date.fromisoformat, help='Primeiro dia (AAAA-MM-DD); padrão: amanhã.')
+        parser.add_argument('--seed', type=int, help='Semente base; com a mesma semente o plano de cada usuário se repete.')
+        parser.add_argument('--goal', choices=sorted(DAILY_TARGETS), help='Restringe a um objetivo.')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Usuários por transação.')
+
+    def handle(self, *args, days, start_date, seed, goal, chunk_size, **options):
+        if days < 1:
+            raise CommandError('--days deve ser positivo.')
+        start_date = start_date or timezone.localdate() + timedelta(days=1)
+        end_date = start_date + timedelta(days=days - 1)
+        if seed is None:
+            seed = secrets.randbits(32)
+        self.stdout.write(f"Semente: {seed}")
+
+        users = (
+            get_user_model().objects.filter(is_active=True, fitness_goal__in=DAILY_TARGETS)
+            .order_by('id').values_list('id', 'fitness_goal')
+        )
+        if goal:
+            users = users.filter(fitness_goal=goal)
+
+        created = planned = 0
+        last_id = 0
+        while True:
+            chunk = list(users.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1][0]
+            users_done, rows = self.plan_chunk(chunk, seed, start_date, end_date, days)
+            planned += users_done
+            created += rows
+            self.stdout.write(f"Usuários até id={last_id} processados ({planned} planos, {created} refeições).")
+
+        self.stdout.write(self.style.SUCCESS(f"Planos gerados: {planned} usuários, {created} refeições."))
+
+    def plan_chunk(self, chunk, seed, start_date, end_date, days):
+        busy = set(
+            Diet.objects.filter(user_id__in=[user_id for user_id, _ in chunk], date__range=(start_date, end_date))
+            .values_list('user_id', flat=True).distinct()
+        )
+        by_goal = defaultdict(list)
+        for user_id, goal in chunk:
+            if user_id not in busy:
+                by_goal[goal].append(user_id)
+
+        # Um sorteio vetorizado por objetivo para todo o lote; cada usuário tem seu gerador
+        diets = []
+        for goal, user_ids in by_goal.items():
+            macros = sample_macros(goal, days, [rng_for(seed, user_id) for user_id in user_ids])
+            for user_id, user_macros in zip(user_ids, macros):
+                diets.extend(build_plan(user_id, goal, start_date, days, user_macros))
+
+        with transaction.atomic():
+            Diet.objects.bulk_create(diets, batch_size=1000)
+            for user_ids in by_goal.values():
+                for user_id in user_ids:
+                    bump_version('diets', user_id)
+
+        return sum(len(user_ids) for user_ids in by_goal.values()), len(diets)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diets', '0002_dietfeedback'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diet',
+            index=models.Index(fields=['user', 'date'], name='diet_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diets', '0003_diet_diet_user_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='diet',
+            name='diet_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='diet',
+            index=models.Index(fields=['user', 'date', 'id'], name='diet_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 04:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diets', '0004_extend_diet_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='diet',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+    ]
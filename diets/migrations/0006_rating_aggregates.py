@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 04:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diets', '0005_alter_diet_date_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DietRatingAggregate',
+            fields=[
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.BigIntegerField(default=0)),
+                ('total_sq', models.BigIntegerField(default=0)),
+                ('diet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='diets.diet')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MealRatingAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.BigIntegerField(default=0)),
+                ('total_sq', models.BigIntegerField(default=0)),
+                ('meal', models.CharField(choices=[('breakfast', 'Café da manhã'), ('lunch', 'Almoço'), ('dinner', 'Jantar'), ('snack', 'Lanche'), ('afternoon_snack', 'Lanche da Tarde')], max_length=20)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'meal'), name='meal_rating_unique')],
+            },
+        ),
+    ]
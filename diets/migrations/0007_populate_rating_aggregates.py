@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, F, Sum
+
+
+def popular_agregados(apps, schema_editor):
+    DietFeedback = apps.get_model('diets', 'DietFeedback')
+    DietRatingAggregate = apps.get_model('diets', 'DietRatingAggregate')
+    MealRatingAggregate = apps.get_model('diets', 'MealRatingAggregate')
+    totais = dict(count=Count('id'), total=Sum('rating'), total_sq=Sum(F('rating') * F('rating')))
+
+    # Agrupamento feito no banco; uma linha por dieta e por (usuário, refeição)
+    por_dieta = DietFeedback.objects.values('diet_id').annotate(**totais).order_by()
+    DietRatingAggregate.objects.bulk_create(
+        [DietRatingAggregate(**row) for row in por_dieta.iterator()], batch_size=1000
+    )
+    por_refeicao = (
+        DietFeedback.objects.values('diet__user_id', 'diet__meal')
+        .annotate(**totais).order_by()
+    )
+    MealRatingAggregate.objects.bulk_create([
+        MealRatingAggregate(
+            user_id=row.pop('diet__user_id'), meal=row.pop('diet__meal'), **row
+        )
+        for row in por_refeicao.iterator()
+    ], batch_size=1000)
+
+
+def limpar_agregados(apps, schema_editor):
+    apps.get_model('diets', 'DietRatingAggregate').objects.all().delete()
+    apps.get_model('diets', 'MealRatingAggregate').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diets', '0006_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_agregados, limpar_agregados),
+    ]
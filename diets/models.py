@@ -2,6 +2,8 @@ from django.db import models
 from django.conf import settings
 from accounts.models import User
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from fitness_app.ratings import RatingAggregate
 
 # Função de validação para valores positivos
 def validate_positive(value):
@@ -16,6 +18,15 @@ MEAL_CHOICES = [
     ('afternoon_snack', 'Lanche da Tarde')
 ]
 
+# Metas diárias de macronutrientes (g) por objetivo; calorias = 4*P + 4*C + 9*G
+DAILY_TARGETS = {
+    'perda de peso': {'protein': 120, 'carbs': 150, 'fat': 50},
+    'ganho muscular': {'protein': 160, 'carbs': 330, 'fat': 80},
+    'flexibilidade': {'protein': 100, 'carbs': 250, 'fat': 65},
+}
+for _target in DAILY_TARGETS.values():
+    _target['calories'] = 4 * _target['protein'] + 4 * _target['carbs'] + 9 * _target['fat']
+
 class Diet(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="diets")
     meal = models.CharField(max_length=20, choices=MEAL_CHOICES)
@@ -23,7 +34,8 @@ class Diet(models.Model):
     protein = models.FloatField(validators=[validate_positive])
     carbs = models.FloatField(validators=[validate_positive])
     fat = models.FloatField(validators=[validate_positive])
-    date = models.DateField(auto_now_add=True)
+    # Padrão é o dia atual; planos de refeição gravam dias futuros
+    date = models.DateField(default=timezone.localdate)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -31,6 +43,10 @@ class Diet(models.Model):
     class Meta:
         verbose_name = "Dieta"
         verbose_name_plural = "Dietas"
+        indexes = [
+            # Listagem/filtro por data das refeições do usuário
+            models.Index(fields=['user', 'date', 'id'], name='diet_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.meal.capitalize()} - {self.user.email} ({self.date})"
@@ -67,3 +83,20 @@ class DietFeedback(models.Model):
     def __str__(self):
         return f"Feedback de {self.user.email} - Nota {self.rating}"
 
+
+
+class DietRatingAggregate(RatingAggregate):
+    diet = models.OneToOneField(Diet, on_delete=models.CASCADE, primary_key=True, related_name='rating')
+
+
+class MealRatingAggregate(RatingAggregate):
+    """
+    Avaliações do usuário por tipo de refeição (usado por generate_diet).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    meal = models.CharField(max_length=20, choices=MEAL_CHOICES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'meal'], name='meal_rating_unique'),
+        ]
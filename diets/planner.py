@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+import numpy as np
+
+from .models import DAILY_TARGETS, Diet
+
+# Refeições do plano por objetivo
+PLAN_MEALS = {
+    'perda de peso': ['breakfast', 'lunch', 'afternoon_snack', 'dinner'],
+    'ganho muscular': ['breakfast', 'lunch', 'afternoon_snack', 'dinner', 'snack'],
+    'flexibilidade': ['breakfast', 'lunch', 'dinner'],
+}
+
+# Fração típica do dia em cada refeição; o sorteio (Dirichlet) varia em torno dela
+MEAL_SHARES = {
+    'breakfast': 0.25,
+    'lunch': 0.35,
+    'afternoon_snack': 0.10,
+    'dinner': 0.30,
+    'snack': 0.10,
+}
+# Quanto maior, mais próximas das frações típicas ficam as refeições sorteadas
+CONCENTRATION = 40
+
+MACROS = ('protein', 'carbs', 'fat')
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0])
+
+
+def rng_for(seed, user_id):
+    """
+    Gerador reprodutível por (semente, usuário), independente da ordem no lote.
+    """
+    return np.random.default_rng(np.random.SeedSequence([seed, user_id]))
+
+
+def sample_macros(goal, days, rngs):
+    """
+    Sorteia os macros de ``days`` dias para cada gerador em ``rngs``.
+
+    Retorna um array ``(usuários, dias, refeições, 3)`` em gramas (proteína,
+    carboidrato, gordura), arredondado em 0,1 g, em que cada dia soma
+    exatamente as metas de DAILY_TARGETS do objetivo.
+    """
+    meals = PLAN_MEALS[goal]
+    target = np.array([DAILY_TARGETS[goal][macro] for macro in MACROS], dtype=float)
+    shares = np.array([MEAL_SHARES[meal] for meal in meals])
+    alpha = shares / shares.sum() * CONCENTRATION
+
+    # (usuários, dias, macros, refeições): cada macro distribuído entre as refeições do dia
+    fractions = np.stack([rng.dirichlet(alpha, size=(days, len(MACROS))) for rng in rngs])
+    grams = fractions.transpose(0, 1, 3, 2) * target
+
+    # Arredonda e devolve o resíduo à maior refeição, para o dia fechar exato na meta
+    rounded = np.round(grams, 1)
+    residual = target - rounded.sum(axis=2)
+    largest = grams.argmax(axis=2)
+    u, d, m = np.indices(largest.shape)
+    rounded[u, d, largest, m] += residual
+    return np.round(rounded, 1)
+
+
+def build_plan(user_id, goal, start_date, days, macros):
+    """
+    Converte o array de macros de um usuário ``(dias, refeições, 3)`` em objetos Diet.
+    """
+    calories = np.round(macros @ KCAL_PER_GRAM, 1)
+    meals = PLAN_MEALS[goal]
+    return [
+        Diet(
+            user_id=user_id,
+            date=start_date + timedelta(days=day),
+            meal=meal,
+            calories=float(calories[day, index]),
+            protein=float(macros[day, index, 0]),
+            carbs=float(macros[day, index, 1]),
+            fat=float(macros[day, index, 2]),
+        )
+        for day in range(days)
+        for index, meal in enumerate(meals)
+    ]
@@ -0,0 +1,27 @@
+from fitness_app.ratings import apply_ratings
+
+from .models import Diet, DietRatingAggregate, MealRatingAggregate
+
+
+def record_diet_feedbacks(feedbacks, sign=1):
+    """
+    Atualiza os agregados por dieta e por (usuário, refeição) com ``feedbacks``.
+
+    Deve rodar na mesma transação que grava (ou apaga) os DietFeedback.
+    """
+    feedbacks = list(feedbacks)
+    diets = {
+        feedback.diet_id: feedback.diet
+        for feedback in feedbacks if feedback._meta.get_field('diet').is_cached(feedback)
+    }
+    missing = {feedback.diet_id for feedback in feedbacks} - set(diets)
+    if missing:
+        diets.update(Diet.objects.only('id', 'user_id', 'meal').in_bulk(missing))
+
+    apply_ratings(DietRatingAggregate, [
+        ((('diet_id', feedback.diet_id),), feedback.rating) for feedback in feedbacks
+    ], sign)
+    apply_ratings(MealRatingAggregate, [
+        ((('user_id', diets[feedback.diet_id].user_id), ('meal', diets[feedback.diet_id].meal)), feedback.rating)
+        for feedback in feedbacks if feedback.diet_id in diets
+    ], sign)
@@ -1,9 +1,10 @@
-from datetime import timedelta
 from rest_framework import serializers
-from .models import Diet, Workout, DietFeedback
+from fitness_app.serializers import SparseFieldsetMixin
+from .foods import get_index, macros_for
+from .models import MEAL_CHOICES, Diet, DietFeedback
 
 
-class DietSerializer(serializers.ModelSerializer):
+class DietSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Diet
         fields = '__all__'
@@ -14,39 +15,31 @@ class DietSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class WorkoutSerializer(serializers.ModelSerializer):
-    duration_display = serializers.SerializerMethodField()
+class FoodItemSerializer(serializers.Serializer):
+    food_id = serializers.IntegerField()
+    grams = serializers.FloatField(min_value=0.1, max_value=5000)
 
-    class Meta:
-        model = Workout
-        fields = [
-            'id',
-            'workout_type',
-            'intensity',
-            'duration',           # usado para criar/editar
-            'duration_display',   # usado para exibir formatado
-            'created_at',
-            'exercises',
-            'series_reps',
-            'frequency',
-            'carga'
-        ]
-        read_only_fields = ['id', 'created_at', 'user', 'duration_display']
-
-    def get_duration_display(self, obj):
-        if isinstance(obj.duration, timedelta):
-            total_seconds = int(obj.duration.total_seconds())
-            hours, remainder = divmod(total_seconds, 3600)
-            minutes, _ = divmod(remainder, 60)
-
-            if hours > 0:
-                return f"{hours}h {minutes}min"
-            return f"{minutes} min"
-        return None
+    def validate_food_id(self, value):
+        food = get_index().get(value)
+        if food is None:
+            raise serializers.ValidationError('Alimento não encontrado.')
+        return food
+
+
+class DietFromFoodsSerializer(serializers.Serializer):
+    """
+    Refeição montada a partir de alimentos da tabela; os macros são calculados aqui.
+    """
+    meal = serializers.ChoiceField(choices=MEAL_CHOICES)
+    date = serializers.DateField(required=False)
+    items = FoodItemSerializer(many=True, allow_empty=False, max_length=100)
 
     def create(self, validated_data):
-        validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
+        items = [(item['food_id'], item['grams']) for item in validated_data['items']]
+        diet_data = {'meal': validated_data['meal'], **macros_for(items)}
+        if 'date' in validated_data:
+            diet_data['date'] = validated_data['date']
+        return Diet.objects.create(user=self.context['request'].user, **diet_data)
 
 
 class DietFeedbackSerializer(serializers.ModelSerializer):
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from fitness_app.versioning import connect_version_signals
+
+from .models import Diet, DietFeedback
+from .ratings import record_diet_feedbacks
+
+connect_version_signals(Diet, 'diets')
+
+
+@receiver(post_save, sender=DietFeedback)
+def rating_feedback_created(sender, instance, created, raw=False, **kwargs):
+    # Feedbacks são só acrescentados; edições de nota não alteram os agregados.
+    if created and not raw:
+        record_diet_feedbacks([instance], 1)
+
+
+@receiver(post_delete, sender=DietFeedback)
+def rating_feedback_deleted(sender, instance, **kwargs):
+    record_diet_feedbacks([instance], -1)
@@ -1,6 +1,20 @@
-from django.test import TestCase
+import json
+from base64 import b64encode
+from io import StringIO
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from diets.models import Diet
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from fitness_app.query_plans import uses_index
+from diets.models import DAILY_TARGETS, Diet, DietFeedback, MealRatingAggregate
+from diets.foods import get_index
+from diets.planner import rng_for, sample_macros
+from diets.views import DietViewSet
 from datetime import date
 
 User = get_user_model()
@@ -27,3 +41,218 @@ class DietModelTest(TestCase):
             fat=20
         )
         self.assertEqual(str(diet), f"Lunch - {self.user.email} ({diet.date})")
+
+
+class DietQueryPlanTest(TestCase):
+    def test_diet_list_uses_user_date_index(self):
+        user = User.objects.create_user(email="planuser@example.com", password="securepassword")
+        request = Request(APIRequestFactory().get('/diets/diets/', {'date': '2025-04-06'}))
+        request.user = user
+        queryset = DietViewSet(request=request).get_queryset()
+        self.assertTrue(uses_index(queryset, 'diet_user_date_idx'))
+
+
+class DietPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="pageuser@example.com", password="securepassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # Todas as refeições caem na mesma data: a ordem depende do desempate por id
+        self.diets = [
+            Diet.objects.create(user=self.user, meal='lunch', calories=500, protein=30, carbs=60, fat=15)
+            for _ in range(5)
+        ]
+
+    def test_cursor_walks_forward_and_back_without_gaps(self):
+        response = self.client.get('/diets/diets/', {'page_size': 2})
+        seen = [item['id'] for item in response.data['results']]
+        self.assertIsNone(response.data['previous'])
+
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen.extend(item['id'] for item in response.data['results'])
+
+        self.assertEqual(seen, sorted((d.id for d in self.diets), reverse=True))
+
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([item['id'] for item in previous.data['results']], seen[2:4])
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get('/diets/diets/', {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_position_returns_404(self):
+        for position in (['garbage', 1], ['2025-01-01', 'abc'], [{}, 1]):
+            with self.subTest(position=position):
+                query = urlencode({'p': json.dumps(position)})
+                cursor = b64encode(query.encode('ascii')).decode('ascii')
+                response = self.client.get('/diets/diets/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class DietDailyTotalsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="dailyuser@example.com", password="securepassword", fitness_goal='perda de peso')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        meals = [('2025-04-01', 'lunch', 600), ('2025-04-01', 'lunch', 200), ('2025-04-01', 'dinner', 500), ('2025-04-02', 'breakfast', 300)]
+        for day, meal, calories in meals:
+            diet = Diet.objects.create(user=self.user, meal=meal, calories=calories, protein=30, carbs=50, fat=10)
+            Diet.objects.filter(pk=diet.pk).update(date=day)
+
+    def test_daily_totals_with_meal_breakdown(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/diets/diets/daily/', {'date__gte': '2025-04-01', 'date__lte': '2025-04-30'})
+        self.assertEqual(response.status_code, 200)
+        first_day = response.data['results'][0]
+        self.assertEqual(first_day['totals']['calories'], 1300)
+        self.assertEqual(first_day['totals']['protein'], 90)
+        self.assertEqual([(m['meal'], m['entries']) for m in first_day['meals']], [('dinner', 1), ('lunch', 2)])
+        self.assertEqual(first_day['adherence']['protein'], 0.75)
+        # A data de uma refeição pode mudar: nem intervalos passados ficam em cache sem revalidar
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotIn('max-age', response['Cache-Control'])
+
+    def test_open_range_is_not_cached(self):
+        response = self.client.get('/diets/diets/daily/')
+        self.assertEqual(response.data['results'], [])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    @override_settings(DATA_VERSIONS_ENABLED=True)
+    def test_not_modified_keeps_cache_control(self):
+        params = {'date__gte': '2025-04-01', 'date__lte': '2025-04-30'}
+        etag = self.client.get('/diets/diets/daily/', params)['ETag']
+        response = self.client.get('/diets/diets/daily/', params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_upper_bound_only_is_limited_to_max_range(self):
+        response = self.client.get('/diets/diets/daily/', {'date__lte': '2026-04-02'})
+        self.assertEqual(response.status_code, 200)
+        # 2025-04-01 fica fora dos 366 dias até 2026-04-02
+        self.assertEqual([day['date'] for day in response.data['results']], [date(2025, 4, 2)])
+
+        response = self.client.get('/diets/diets/daily/', {'date__gte': '2024-01-01', 'date__lte': '2030-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(DATA_VERSIONS_ENABLED=True)
+    def test_default_window_etag_changes_with_the_day(self):
+        with patch('diets.views.timezone.localdate', return_value=date(2025, 4, 30)):
+            etag = self.client.get('/diets/diets/daily/')['ETag']
+            self.assertEqual(self.client.get('/diets/diets/daily/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with patch('diets.views.timezone.localdate', return_value=date(2025, 5, 1)):
+            response = self.client.get('/diets/diets/daily/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_applies_diet_filter_ranges(self):
+        response = self.client.get('/diets/diets/', {'date__gte': '2025-04-02'})
+        self.assertEqual([d['date'] for d in response.data['results']], ['2025-04-02'])
+
+
+class DietPlanTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="planner@example.com", password="securepassword", fitness_goal='ganho muscular')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_every_day_hits_daily_targets(self):
+        macros = sample_macros('perda de peso', 28, [rng_for(7, 1), rng_for(7, 2)])
+        self.assertEqual(macros.shape, (2, 28, 4, 3))
+        target = [DAILY_TARGETS['perda de peso'][m] for m in ('protein', 'carbs', 'fat')]
+        for totals in macros.sum(axis=2).reshape(-1, 3):
+            self.assertEqual([round(value, 1) for value in totals], target)
+        self.assertTrue((macros > 0).all())
+
+    def test_same_seed_generates_same_plan(self):
+        first = self.client.post('/diets/generate-plan/', {'days': 3, 'seed': 42, 'start_date': '2025-05-01'}, format='json')
+        second = self.client.post('/diets/generate-plan/', {'days': 3, 'seed': 42, 'start_date': '2025-05-01'}, format='json')
+        strip = lambda data: [{k: v for k, v in d.items() if k not in ('id', 'created_at', 'updated_at')} for d in data['results']]
+        self.assertEqual(strip(first.data), strip(second.data))
+
+    def test_generate_plan_creates_days_times_meals(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/diets/generate-plan/', {'days': 7, 'start_date': '2025-05-01'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('seed', response.data)
+        self.assertEqual(Diet.objects.filter(user=self.user).count(), 7 * 5)
+        last_day = Diet.objects.filter(user=self.user, date='2025-05-07')
+        self.assertAlmostEqual(sum(d.protein for d in last_day), DAILY_TARGETS['ganho muscular']['protein'], places=6)
+
+    def test_generate_plan_rejects_too_many_days(self):
+        response = self.client.post('/diets/generate-plan/', {'days': 365}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_nightly_command_skips_users_with_meals(self):
+        other = User.objects.create_user(email="planner2@example.com", password="securepassword", fitness_goal='flexibilidade')
+        Diet.objects.create(user=other, meal='lunch', calories=500, protein=30, carbs=60, fat=15, date=date(2025, 5, 2))
+        call_command('generate_meal_plans', days=3, start_date=date(2025, 5, 1), seed=1, stdout=StringIO())
+        self.assertEqual(Diet.objects.filter(user=self.user).count(), 3 * 5)
+        self.assertEqual(Diet.objects.filter(user=other).count(), 1)
+
+
+class FoodSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="foods@example.com", password="securepassword")
+        self.client = APIClient()
+
+    def test_prefix_search_ignores_accents_and_word_order(self):
+        index = get_index()
+        self.assertEqual([f.name for f in index.search('feij')], ['Feijão preto cozido', 'Feijão carioca cozido'])
+        self.assertEqual(index.search('frango peito')[0].name, 'Peito de frango grelhado')
+        self.assertEqual(index.search('graO-de-b')[0].name, 'Grão-de-bico cozido')
+        self.assertEqual(index.search('xyz'), [])
+
+    def test_search_endpoint_does_not_touch_database(self):
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        get_index()
+        with self.assertNumQueries(0):
+            response = self.client.get('/diets/foods/search/', {'q': 'arroz', 'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertTrue(response.data['results'][0]['name'].startswith('Arroz'))
+
+    def test_create_meal_from_foods(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/diets/diets/from-foods/', {
+            'meal': 'lunch',
+            'items': [{'food_id': 1, 'grams': 150}, {'food_id': 19, 'grams': 120}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['protein'], round(2.5 * 1.5 + 32.0 * 1.2, 1))
+        self.assertEqual(response.data['calories'], round(128 * 1.5 + 159 * 1.2, 1))
+
+    def test_unknown_food_is_rejected(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post('/diets/diets/from-foods/', {
+            'meal': 'lunch', 'items': [{'food_id': 999999, 'grams': 100}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Diet.objects.exists())
+
+
+class DietRatingAggregateTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="ratings@example.com", password="securepassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.lunch = Diet.objects.create(user=self.user, meal='lunch', calories=600, protein=35, carbs=70, fat=20)
+        self.dinner = Diet.objects.create(user=self.user, meal='dinner', calories=500, protein=30, carbs=50, fat=15)
+
+    def test_feedback_updates_running_aggregates(self):
+        for diet, rating in [(self.lunch, 5), (self.lunch, 3), (self.dinner, 1)]:
+            self.client.post('/diets/diet-feedback/', {'diet': diet.id, 'rating': rating})
+
+        response = self.client.get('/diets/ratings/', {'diet_id': f'{self.lunch.id},{self.dinner.id}'})
+        meals = {row['meal']: row for row in response.data['meals']}
+        self.assertEqual(meals['lunch'], {'meal': 'lunch', 'count': 2, 'mean': 4.0, 'stddev': 1.0})
+        self.assertEqual(meals['dinner']['mean'], 1.0)
+        self.assertEqual([row['diet_id'] for row in response.data['diets']], [self.lunch.id, self.dinner.id])
+
+        DietFeedback.objects.filter(diet=self.dinner).delete()
+        self.assertEqual(MealRatingAggregate.objects.get(user=self.user, meal='dinner').count, 0)
+
+    def test_invalid_ids_are_rejected(self):
+        response = self.client.get('/diets/ratings/', {'diet_id': 'abc'})
+        self.assertEqual(response.status_code, 400)
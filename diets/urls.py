@@ -2,23 +2,29 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     DietViewSet,
-    WorkoutViewSet,
     generate_diet,
-    generate_workout,
-    log_workout,
+    generate_diet_plan,
+    search_foods,
     provide_feedback,
     diet_feedback,
+    diet_ratings,
 )
+from workouts import views as workout_views
 
 router = DefaultRouter()
 router.register(r'diets', DietViewSet, basename='diet')
-router.register(r'workouts', WorkoutViewSet, basename='workout')
+# Apelido do CRUD canônico de treinos (/workouts/); o basename evita conflito de nomes de rota
+router.register(r'workouts', workout_views.WorkoutViewSet, basename='diets-workout')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('generate-diet/', generate_diet, name='generate_diet'),
-    path('generate-workout/', generate_workout, name='generate_workout'),
-    path('log-workout/', log_workout, name='log_workout'),
+    path('generate-plan/', generate_diet_plan, name='generate_diet_plan'),
+    path('foods/search/', search_foods, name='search_foods'),
+    # Apelidos mantidos por compatibilidade: gravam em workouts.Workout
+    path('generate-workout/', workout_views.generate_workout, name='diets_generate_workout'),
+    path('log-workout/', workout_views.WorkoutViewSet.as_view({'post': 'create'}), name='diets_log_workout'),
     path('feedback/', provide_feedback, name='feedback'),
     path('diet-feedback/', diet_feedback, name='diet_feedback'),
+    path('ratings/', diet_ratings, name='diet_ratings'),
 ]
@@ -1,29 +1,117 @@
-from datetime import timedelta
-from random import randint, choice
-
+from datetime import date, timedelta
+from random import randint, choices
+import secrets
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 
-from .models import Diet, Workout, DietFeedback
-from .serializers import DietSerializer, WorkoutSerializer, DietFeedbackSerializer
-from ai.trainer import ajustar_treino
+from .filters import DietFilter
+from .foods import get_index
+from .models import DAILY_TARGETS, Diet, DietFeedback, DietRatingAggregate, MealRatingAggregate
+from .planner import build_plan, rng_for, sample_macros
+from .serializers import DietFromFoodsSerializer, DietSerializer, DietFeedbackSerializer
+from fitness_app.mixins import ValuesListMixin
+from fitness_app.ratings import MAX_RATING_IDS, PRIOR_MEAN, parse_ids
+from fitness_app.versioning import ConditionalGetMixin, bump_version
 
 
 # ViewSet para Dietas
-class DietViewSet(viewsets.ModelViewSet):
+class DietViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = DietSerializer
     permission_classes = [permissions.IsAuthenticated]
+    version_resource = 'diets'
+    ordering = ('-date', '-id')
+    filterset_class = DietFilter
 
-    def get_queryset(self):
-        user = self.request.user
-        queryset = Diet.objects.filter(user=user)
-
-        date = self.request.query_params.get('date')
-        if date:
-            queryset = queryset.filter(date=date)
+    MACROS = ('calories', 'protein', 'carbs', 'fat')
+    MAX_DAILY_RANGE = 366
 
-        return queryset.order_by('-date')
+    def get_queryset(self):
+        # Filtros por data/macros (DietFilter) são aplicados por filter_queryset
+        return Diet.objects.filter(user=self.request.user).order_by('-date')
+
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        """
+        Totais diários e por refeição (calorias e macros) no intervalo pedido.
+
+        Aceita os mesmos filtros da listagem (``date``, ``date__gte``, ``date__lte``...);
+        sem filtro de data, usa os últimos 30 dias, e só com ``date__lte``, os
+        MAX_DAILY_RANGE dias até essa data. A data de uma refeição pode ser
+        editada, então nenhum intervalo é definitivo: o cliente sempre revalida
+        pelo ETag de versão (o 304 leva o mesmo Cache-Control).
+        """
+        start, end = self._daily_range(request)
+        # A janela padrão anda com o dia atual: o intervalo resolvido também entra no ETag
+        response = self.conditional_response(
+            request, self._daily_totals, start, etag_variant=f'{start.isoformat()}_{end.isoformat()}'
+        )
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def _daily_range(self, request):
+        params = request.query_params
+        today = timezone.localdate()
+        if not any(params.get(name) for name in ('date', 'date__gte', 'date__lte')):
+            return today - timedelta(days=29), today
+
+        filterset = self.filterset_class(params, queryset=Diet.objects.none())
+        filterset.is_valid()
+        bounds = filterset.form.cleaned_data
+        end = bounds.get('date') or bounds.get('date__lte') or today
+        start = bounds.get('date') or bounds.get('date__gte') or end - timedelta(days=self.MAX_DAILY_RANGE - 1)
+        if (end - start).days >= self.MAX_DAILY_RANGE:
+            raise ParseError(f'O intervalo pode ter no máximo {self.MAX_DAILY_RANGE} dias.')
+        return start, end
+
+    def _daily_totals(self, request, start):
+        queryset = self.filter_queryset(self.get_queryset()).filter(date__gte=start)
+
+        # Uma única consulta agrupada por (dia, refeição); os totais do dia saem da soma
+        rows = (
+            queryset.order_by('date', 'meal')
+            .values('date', 'meal')
+            .annotate(entries=Count('id'), **{macro: Sum(macro) for macro in self.MACROS})
+        )
+
+        target = DAILY_TARGETS.get((request.user.fitness_goal or '').lower())
+        days = {}
+        for row in rows:
+            day = days.get(row['date'])
+            if day is None:
+                day = days[row['date']] = {
+                    'date': row['date'],
+                    'totals': dict.fromkeys(self.MACROS, 0),
+                    'meals': [],
+                }
+            day['meals'].append({key: row[key] for key in ('meal', 'entries', *self.MACROS)})
+            for macro in self.MACROS:
+                day['totals'][macro] += row[macro]
+
+        for day in days.values():
+            day['adherence'] = (
+                {macro: round(day['totals'][macro] / target[macro], 2) for macro in self.MACROS}
+                if target else None
+            )
+
+        return Response({'target': target, 'results': list(days.values())})
+
+    @action(detail=False, methods=['post'], url_path='from-foods')
+    def from_foods(self, request):
+        """
+        Cria uma refeição a partir de ``items: [{food_id, grams}]`` da tabela de alimentos.
+        """
+        serializer = DietFromFoodsSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        diet = serializer.save()
+        return Response(DietSerializer(diet).data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -32,19 +120,25 @@ class DietViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-# ViewSet para Treinos
-class WorkoutViewSet(viewsets.ModelViewSet):
-    serializer_class = WorkoutSerializer
-    permission_classes = [permissions.IsAuthenticated]
+# Busca de alimentos (typeahead) na tabela embutida
+MAX_FOOD_RESULTS = 50
 
-    def get_queryset(self):
-        return Workout.objects.filter(user=self.request.user).order_by('-created_at')
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+@api_view(['GET'])
+@authentication_classes([JWTStatelessUserAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def search_foods(request):
+    """
+    Busca por prefixo no índice em memória; não consulta o banco (nem para carregar o usuário).
+    """
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), MAX_FOOD_RESULTS)
+    except ValueError:
+        return Response({'detail': 'limit deve ser um inteiro.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
+    foods = get_index().search(query, limit=limit)
+    return Response({'results': [food._asdict() for food in foods]})
 
 
 # Geração automática de dieta com base no objetivo
@@ -85,9 +179,16 @@ def generate_diet(request):
     if not config:
         return Response({'detail': 'Objetivo de dieta inválido.'}, status=status.HTTP_400_BAD_REQUEST)
 
+    # Refeições mais bem avaliadas pelo usuário têm mais chance de ser sorteadas
+    ratings = {
+        row.meal: row.smoothed_mean
+        for row in MealRatingAggregate.objects.filter(user=user, meal__in=config['meals'])
+    }
+    weights = [ratings.get(meal, PRIOR_MEAN) for meal in config['meals']]
+
     diet = Diet.objects.create(
         user=user,
-        meal=choice(config['meals']),
+        meal=choices(config['meals'], weights=weights)[0],
         calories=randint(*config['calories']),
         protein=randint(*config['protein']),
         carbs=randint(*config['carbs']),
@@ -97,70 +198,66 @@ def generate_diet(request):
     return Response(DietSerializer(diet).data, status=status.HTTP_201_CREATED)
 
 
-# Geração automática de treino com ajuste por IA
+# Geração de plano alimentar de vários dias em uma única requisição
+MAX_PLAN_DAYS = 62
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
-def generate_workout(request):
+def generate_diet_plan(request):
+    """
+    Gera ``days`` dias de refeições para o objetivo, cada dia fechando as metas
+    de DAILY_TARGETS. A mesma ``seed`` gera sempre o mesmo plano para o usuário.
+    """
     user = request.user
-    fitness_goal = request.data.get('fitness_goal') or user.fitness_goal
+    fitness_goal = (request.data.get('fitness_goal') or user.fitness_goal or '').lower()
 
     if not fitness_goal:
         return Response({'detail': 'Objetivo não encontrado na requisição.'}, status=status.HTTP_400_BAD_REQUEST)
+    if fitness_goal not in DAILY_TARGETS:
+        return Response({'detail': 'Objetivo de dieta inválido.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    workout_data = {
-        'perda de peso': (
-            'cardio', 'Alta', timedelta(minutes=45),
-            'Corrida, Bicicleta, Pular corda', '', '5 vezes por semana'
-        ),
-        'ganho muscular': (
-            'musculacao', 'Moderada', timedelta(hours=1),
-            'Supino, Agachamento, Levantamento terra, Flexões',
-            '3 séries de 12 repetições por exercício', '3 vezes por semana'
-        ),
-        'flexibilidade': (
-            'flexibilidade', 'Baixa', timedelta(minutes=30),
-            'Alongamentos gerais', '', '3 vezes por semana'
-        ),
-    }
-
-    config = workout_data.get(fitness_goal.lower())
-    if not config:
-        return Response({'detail': 'Objetivo de treino inválido.'}, status=status.HTTP_400_BAD_REQUEST)
-
-    workout_type, intensity, duration, exercises, series_reps, frequency = config
-
-    workout = Workout.objects.create(
-        user=user,
-        workout_type=workout_type,
-        intensity=intensity,
-        duration=duration,
-        exercises=exercises,
-        series_reps=series_reps,
-        frequency=frequency
-    )
-
-    # Ajuste inteligente com IA
-    historico = list(Workout.objects.filter(user=user).values("intensity", "series_reps", "carga"))
-    for treino in historico:
-        treino.setdefault("carga", 0)
-
-    treino_ajustado = ajustar_treino(historico)
-    workout.intensity = treino_ajustado.get('intensity', intensity)
-    workout.carga = treino_ajustado.get('carga', getattr(workout, 'carga', 0))
-    workout.save()
-
-    return Response(WorkoutSerializer(workout).data, status=status.HTTP_201_CREATED)
-
-
-# Registro manual de treino
-@api_view(['POST'])
-@permission_classes([permissions.IsAuthenticated])
-def log_workout(request):
-    serializer = WorkoutSerializer(data=request.data, context={'request': request})
-    if serializer.is_valid():
-        serializer.save(user=request.user)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        days = int(request.data.get('days', 7))
+        seed = request.data.get('seed')
+        seed = secrets.randbits(32) if seed in (None, '') else int(seed)
+    except (TypeError, ValueError):
+        return Response({'detail': 'Parâmetros days e seed devem ser inteiros.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= days <= MAX_PLAN_DAYS:
+        return Response(
+            {'detail': f'O plano deve ter entre 1 e {MAX_PLAN_DAYS} dias.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if seed < 0:
+        return Response({'detail': 'A seed não pode ser negativa.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    start_date = request.data.get('start_date')
+    if start_date:
+        try:
+            start_date = date.fromisoformat(str(start_date))
+        except ValueError:
+            return Response({'detail': 'start_date deve estar no formato AAAA-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        start_date = timezone.localdate()
+
+    macros = sample_macros(fitness_goal, days, [rng_for(seed, user.id)])[0]
+    diets = build_plan(user.id, fitness_goal, start_date, days, macros)
+    with transaction.atomic():
+        # bulk_create não dispara post_save; a versão dos dados é incrementada aqui
+        Diet.objects.bulk_create(diets)
+        bump_version('diets', user.id)
+
+    return Response({
+        'seed': seed,
+        'fitness_goal': fitness_goal,
+        'target': DAILY_TARGETS[fitness_goal],
+        'results': DietSerializer(diets, many=True).data,
+    }, status=status.HTTP_201_CREATED)
+
+
+# Treinos: /diets/workouts/, /diets/generate-workout/ e /diets/log-workout/ são
+# apelidos das views de workouts (ver diets/urls.py); diets.Workout só existe até
+# a migração `migrate_diet_workouts` ser concluída.
 
 
 # Recebimento de feedback textual (treino ou geral)
@@ -174,6 +271,30 @@ def provide_feedback(request):
     return Response({"detail": "Feedback vazio."}, status=status.HTTP_400_BAD_REQUEST)
 
 
+# Médias das avaliações por tipo de refeição e por dieta
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def diet_ratings(request):
+    """
+    Resumo das avaliações: por refeição e, com ``?diet_id=1,2``, por dieta.
+    """
+    user = request.user
+    diet_ids = parse_ids(request.query_params.get('diet_id', ''))
+    if diet_ids is None or len(diet_ids) > MAX_RATING_IDS:
+        return Response(
+            {'detail': f'diet_id deve ser uma lista de até {MAX_RATING_IDS} IDs separados por vírgula.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    meals = MealRatingAggregate.objects.filter(user=user, count__gt=0).order_by('meal')
+    diets = DietRatingAggregate.objects.filter(diet__user=user, diet_id__in=diet_ids, count__gt=0).order_by('diet_id')
+
+    return Response({
+        'meals': [{'meal': row.meal, **row.as_dict()} for row in meals],
+        'diets': [{'diet_id': row.diet_id, **row.as_dict()} for row in diets],
+    })
+
+
 # Recebimento de feedback de dieta com salvamento no banco
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
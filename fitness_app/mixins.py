@@ -0,0 +1,109 @@
+from functools import lru_cache
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Tipos cujos valores se repetem muito entre linhas (datas, durações, choices):
+# a formatação é memoizada por resposta em vez de refeita a cada linha.
+MEMOIZED_FIELDS = (serializers.DateField, serializers.DurationField, serializers.ChoiceField)
+
+
+def _keep_none(formatter):
+    def format_value(value):
+        return None if value is None else formatter(value)
+    return format_value
+
+
+def _datetime_formatter(field):
+    """
+    Versão em lote de DateTimeField.to_representation para saída ISO 8601.
+
+    O fuso é resolvido uma única vez por resposta, e não a cada linha; é isso
+    que domina o custo do campo no serializer. Retorna None se o campo usa
+    outro formato ou não tem fuso (USE_TZ=False).
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or tz is None:
+        return None
+
+    def format_value(value):
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return _keep_none(format_value)
+
+
+def build_columns(serializer, computed_fields=None):
+    """
+    Traduz os campos legíveis do serializer em colunas de ``.values()``.
+
+    Retorna uma lista de ``(nome, coluna, formatador)`` ou None quando algum
+    campo não pode ser montado a partir de colunas (ex.: SerializerMethodField
+    sem equivalente em ``computed_fields``, campos aninhados ou com ``source``
+    composto); nesse caso quem chama deve usar o serializer normal.
+
+    ``computed_fields`` mapeia ``nome -> (coluna, função)`` para campos
+    calculados, como ``duration_display``.
+    """
+    computed_fields = computed_fields or {}
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in computed_fields:
+            source, formatter = computed_fields[name]
+            columns.append((name, source, lru_cache(maxsize=None)(formatter)))
+            continue
+        if isinstance(field, (serializers.SerializerMethodField, serializers.BaseSerializer)):
+            return None
+        if field.source == '*' or '.' in field.source:
+            return None
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # .values() já devolve o id da FK
+            columns.append((name, field.source, lambda value: value))
+            continue
+
+        formatter = None
+        if isinstance(field, serializers.DateTimeField):
+            formatter = _datetime_formatter(field)
+        formatter = formatter or _keep_none(field.to_representation)
+        if isinstance(field, MEMOIZED_FIELDS):
+            formatter = lru_cache(maxsize=None)(formatter)
+        columns.append((name, field.source, formatter))
+    return columns
+
+
+def format_rows(rows, columns):
+    return [
+        {name: formatter(row[source]) for name, source, formatter in columns}
+        for row in rows
+    ]
+
+
+class ValuesListMixin:
+    """
+    Caminho rápido e somente leitura para a ação ``list``.
+
+    Monta a resposta direto de ``queryset.values()``, sem instanciar models nem
+    executar o serializer linha a linha, produzindo o mesmo JSON do serializer.
+    Respeita ``?fields=`` (SparseFieldsetMixin), filtros e paginação da view.
+    """
+    computed_list_fields = {}
+
+    def list(self, request, *args, **kwargs):
+        columns = build_columns(self.get_serializer(), self.computed_list_fields)
+        if columns is None:
+            return super().list(request, *args, **kwargs)
+
+        # O paginador precisa dos campos de ordenação mesmo que não sejam pedidos
+        ordering = [field.lstrip('-') for field in getattr(self, 'ordering', None) or ()]
+        sources = {source for _, source, _ in columns} | set(ordering) | {'id'}
+
+        rows = self.filter_queryset(self.get_queryset()).values(*sources)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(format_rows(page, columns))
+        return Response(format_rows(rows, columns))
@@ -0,0 +1,142 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginação por cursor em keyset composto (campos de ordenação + id).
+
+    O CursorPagination do DRF posiciona o cursor só pelo primeiro campo da
+    ordenação e usa OFFSET para desempatar, o que degrada em históricos com
+    muitas linhas na mesma data. Aqui o cursor guarda o valor de todos os
+    campos da ordenação e a página seguinte é buscada com
+    ``WHERE (campo, id) < (valor, id_valor)``, sempre O(página) sobre o índice.
+
+    A ordenação vem do atributo ``ordering`` da view (ex.: ``('-date', '-id')``);
+    se o último campo não for único, ``id`` é acrescentado como desempate.
+    Os campos de ordenação não podem ser nulos.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            tiebreaker = '-id' if ordering[-1].startswith('-') else 'id'
+            ordering += (tiebreaker,)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            reverse, position = False, None
+        else:
+            reverse, position = self.cursor.reverse, self._decode_position(self.cursor.position)
+
+        ordering = _invert(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        # Busca uma linha a mais só para saber se existe outra página.
+        try:
+            # O filtro já converte os valores da posição para o tipo de cada campo
+            if position is not None:
+                queryset = queryset.filter(_keyset_filter(ordering, position))
+            results = list(queryset[:self.page_size + 1])
+        except (TypeError, ValueError, ValidationError):
+            # Cursor adulterado com valores que não batem com o tipo do campo
+            raise NotFound(self.invalid_cursor_message)
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        self.position = position
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=json.dumps(position)))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=json.dumps(position)))
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            position.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return position
+
+    def _decode_position(self, encoded):
+        try:
+            position = json.loads(encoded)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+
+def _invert(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+def _keyset_filter(ordering, position):
+    """
+    Monta o filtro "depois da posição" para a ordenação informada.
+
+    Equivale à comparação de tuplas ``(f1, f2, ...) > (v1, v2, ...)`` na
+    direção de cada campo. O limite extra sobre o primeiro campo
+    (``f1 >= v1`` / ``f1 <= v1``) deixa o banco usar o índice como busca
+    por intervalo em vez de filtrar a partir do início.
+    """
+    lookups = []
+    for name in ordering:
+        lookups.append((name.lstrip('-'), 'lt' if name.startswith('-') else 'gt'))
+
+    branches = []
+    for i, (name, op) in enumerate(lookups):
+        equal = {lookups[j][0]: position[j] for j in range(i)}
+        branches.append(Q(**equal, **{f'{name}__{op}': position[i]}))
+
+    leading, op = lookups[0]
+    return Q(**{f'{leading}__{op}e': position[0]}) & reduce(or_, branches)
@@ -0,0 +1,25 @@
+from django.db import connection, transaction
+
+
+def explain(queryset):
+    """
+    Retorna o plano de execução (EXPLAIN) de um queryset.
+
+    Em bases pequenas (testes) o PostgreSQL prefere um seq scan mesmo com
+    índice disponível, então o seq scan é desabilitado só dentro desta
+    transação para o plano refletir o acesso por índice.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+
+def uses_index(queryset, index_name):
+    """
+    Indica se o plano do queryset usa o índice informado sem ordenação extra.
+    """
+    plan = explain(queryset)
+    sorts = 'USE TEMP B-TREE' in plan or 'Sort Key' in plan
+    return index_name in plan and not sorts
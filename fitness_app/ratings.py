@@ -0,0 +1,93 @@
+from collections import defaultdict
+from math import sqrt
+
+from django.db import models, transaction
+from django.db.models import F
+
+# Média a priori usada para suavizar itens com poucas avaliações (escala 1 a 5)
+PRIOR_MEAN = 3.0
+PRIOR_WEIGHT = 2
+# Máximo de IDs aceitos nos endpoints de avaliações (?diet_id=1,2,...)
+MAX_RATING_IDS = 100
+
+
+class RatingAggregate(models.Model):
+    """
+    Contagem, soma e soma dos quadrados das avaliações, mantidas incrementalmente.
+
+    Média e desvio padrão saem desses três números sem varrer os feedbacks.
+    """
+    count = models.PositiveIntegerField(default=0)
+    total = models.BigIntegerField(default=0)
+    total_sq = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def stddev(self):
+        if not self.count:
+            return None
+        variance = self.total_sq / self.count - (self.total / self.count) ** 2
+        return sqrt(max(variance, 0.0))
+
+    @property
+    def smoothed_mean(self):
+        return smoothed_mean(self.count, self.total)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': round(self.mean, 2) if self.count else None,
+            'stddev': round(self.stddev, 2) if self.count else None,
+        }
+
+
+def smoothed_mean(count, total):
+    """
+    Média bayesiana: puxa para PRIOR_MEAN itens com poucas avaliações.
+    """
+    return (total + PRIOR_MEAN * PRIOR_WEIGHT) / (count + PRIOR_WEIGHT)
+
+
+def apply_ratings(model, entries, sign=1):
+    """
+    Soma (sign=1) ou remove (sign=-1) avaliações nos agregados de ``model``.
+
+    ``entries`` é um iterável de ``(lookup, rating)``, em que ``lookup`` é uma
+    tupla de pares ``(campo, valor)`` que identifica a linha do agregado. Cada
+    linha afetada recebe um único UPDATE com F(), então inserções concorrentes
+    não perdem incrementos.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for lookup, rating in entries:
+        delta = deltas[lookup]
+        delta[0] += sign
+        delta[1] += sign * rating
+        delta[2] += sign * rating * rating
+
+    with transaction.atomic():
+        for lookup, (count, total, total_sq) in deltas.items():
+            lookup = dict(lookup)
+            if sign > 0:
+                model.objects.get_or_create(**lookup)
+            # Na remoção não cria linhas: o dono pode estar sendo excluído em cascata.
+            model.objects.filter(**lookup).update(
+                count=F('count') + count,
+                total=F('total') + total,
+                total_sq=F('total_sq') + total_sq,
+            )
+
+
+def parse_ids(value):
+    """
+    Converte ``"1,2,3"`` em uma lista de inteiros; retorna None se algum item for inválido.
+    """
+    try:
+        return [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        return None
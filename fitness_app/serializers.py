@@ -0,0 +1,42 @@
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested_fields(request, param='fields'):
+    """
+    Lê ``?fields=id,date,weight`` e retorna o conjunto de nomes, ou None se ausente.
+    """
+    if request is None:
+        return None
+    raw = request.query_params.get(param)
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Permite ao cliente escolher os campos da resposta com ``?fields=a,b,c``.
+
+    Campos desconhecidos são ignorados. Só afeta a representação: em leituras
+    os campos saem do serializer (o ValuesListMixin monta só as colunas pedidas);
+    em escritas todos os campos continuam validados e gravados, e apenas as
+    chaves da resposta são filtradas.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        wanted = requested_fields(request)
+        if wanted is None or request.method not in SAFE_METHODS:
+            return
+        for name in list(self.fields):
+            if name not in wanted and not self.fields[name].write_only:
+                self.fields.pop(name)
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        wanted = requested_fields(request)
+        if wanted is None or request.method in SAFE_METHODS:
+            return data
+        return {name: value for name, value in data.items() if name in wanted}
@@ -72,6 +72,30 @@ DATABASES = {
         default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"
     )
 }
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Testes com escritores em paralelo precisam de um arquivo: no banco em memória
+    # compartilhado, um segundo escritor falha na hora ("table is locked") em vez de esperar.
+    DATABASES["default"]["TEST"] = {"NAME": BASE_DIR / "test_db.sqlite3"}
+
+# Cache (Redis em produção; memória local no desenvolvimento)
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Versões de dados por usuário (ETag). Exige cache compartilhado entre workers,
+# por isso só liga sozinho com Redis configurado ou em desenvolvimento.
+DATA_VERSIONS_ENABLED = config("DATA_VERSIONS_ENABLED", default=bool(REDIS_URL) or DEBUG, cast=bool)
 
 # Usuário personalizado
 AUTH_USER_MODEL = "accounts.User"
@@ -105,7 +129,29 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
     ],
+    # Paginação por cursor (keyset) em todas as listagens
+    "DEFAULT_PAGINATION_CLASS": "fitness_app.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": config("API_PAGE_SIZE", default=50, cast=int),
 }
+API_MAX_PAGE_SIZE = config("API_MAX_PAGE_SIZE", default=200, cast=int)
+
+# Janela do histórico usada no ajuste automático de treinos (0 desativa o limite)
+WORKOUT_HISTORY_LIMIT = config("WORKOUT_HISTORY_LIMIT", default=20, cast=int)
+WORKOUT_HISTORY_DAYS = config("WORKOUT_HISTORY_DAYS", default=0, cast=int)
+WORKOUT_HISTORY_MAX_LIMIT = 200
+WORKOUT_HISTORY_MAX_DAYS = 365
+
+# Chat: API de chat compatível com a OpenAI (OPENAI_BASE_URL aponta para outro servidor nos testes de carga)
+OPENAI_API_KEY = config("OPENAI_API_KEY", default="")
+OPENAI_BASE_URL = config("OPENAI_BASE_URL", default="https://api.openai.com/v1")
+OPENAI_MODEL = config("OPENAI_MODEL", default="gpt-3.5-turbo")
+OPENAI_TIMEOUT = config("OPENAI_TIMEOUT", default=30, cast=float)
+OPENAI_CONNECT_TIMEOUT = config("OPENAI_CONNECT_TIMEOUT", default=5, cast=float)
+
+# Cache (por processo) das respostas da OpenAI a perguntas genéricas; 0 em qualquer um desliga
+CHAT_CACHE_MAX_ENTRIES = config("CHAT_CACHE_MAX_ENTRIES", default=2000, cast=int)
+CHAT_CACHE_TTL = config("CHAT_CACHE_TTL", default=24 * 3600, cast=int)
+CHAT_CACHE_STRIP_FILLERS = config("CHAT_CACHE_STRIP_FILLERS", default=True, cast=bool)
 
 # JWT Configuração
 SIMPLE_JWT = {
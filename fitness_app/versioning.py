@@ -0,0 +1,125 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def _key(resource, user_id):
+    return f'dataver:{resource}:{user_id}'
+
+
+def _seed():
+    # Se a chave some do cache (expulsão/reinício), o contador recomeça de um valor
+    # novo em vez de 0, para nunca reaproveitar um ETag já entregue.
+    return time.time_ns() // 1000
+
+
+def get_version(resource, user_id):
+    """
+    Versão atual dos dados de ``resource`` do usuário (uma leitura no cache).
+    """
+    key = _key(resource, user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(resource, user_id):
+    """
+    Invalida a versão de ``resource`` do usuário após o commit da transação atual.
+
+    Incrementar antes do commit permitiria que uma leitura concorrente associasse
+    dados antigos à versão nova.
+    """
+    def bump():
+        key = _key(resource, user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _seed(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def connect_version_signals(model, resource):
+    """
+    Incrementa a versão do dono a cada save/delete de ``model`` (que deve ter ``user_id``).
+    """
+    from django.db.models.signals import post_delete, post_save
+
+    def handler(sender, instance, raw=False, **kwargs):
+        if not raw:
+            bump_version(resource, instance.user_id)
+
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=f'dataver-save-{resource}')
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=f'dataver-delete-{resource}')
+
+
+class ConditionalGetMixin:
+    """
+    GET condicional (ETag / If-None-Match) para listagem e detalhe.
+
+    O ETag vem do contador de versão por usuário e recurso (``version_resource``),
+    incrementado pelos sinais de save/delete. Quando o cliente envia o ETag
+    atual, a resposta é 304 antes de qualquer consulta ou serialização.
+    Desligado quando DATA_VERSIONS_ENABLED é falso, porque exige um cache
+    compartilhado entre os workers (Redis) para ser correto.
+
+    Ações cuja resposta depende de algo além dos dados (ex.: uma janela relativa
+    a hoje) passam ``etag_variant`` para que isso também entre no ETag.
+    """
+    version_resource = None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
+    def conditional_response(self, request, handler, *args, etag_variant=None, **kwargs):
+        if not settings.DATA_VERSIONS_ENABLED:
+            return handler(request, *args, **kwargs)
+
+        version = get_version(self.version_resource, request.user.id)
+        tag = f'{self.version_resource}-{request.user.id}-{version}'
+        if etag_variant is not None:
+            tag = f'{tag}-{etag_variant}'
+        etag = f'W/"{tag}"'
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            opaque = etag[2:]
+            matches = parse_etags(if_none_match)
+            if '*' in matches or any(tag.removeprefix('W/') == opaque for tag in matches):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+
+def cached_per_version(resource, user_id, name, compute, timeout=24 * 60 * 60):
+    """
+    Resultado de ``compute()`` em cache enquanto a versão de ``resource`` não mudar.
+
+    A chave inclui a versão atual, então qualquer save/delete do recurso invalida
+    o valor sem precisar apagá-lo (chaves antigas expiram pelo ``timeout``).
+    Sem DATA_VERSIONS_ENABLED não há como invalidar entre workers, e o valor é
+    sempre recalculado.
+    """
+    if not settings.DATA_VERSIONS_ENABLED:
+        return compute()
+
+    key = f'{name}:{user_id}:{get_version(resource, user_id)}'
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
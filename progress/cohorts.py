@@ -0,0 +1,71 @@
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from django.db.models import OuterRef, Subquery
+
+from .models import ProgressEntry
+
+# Janela usada para medir a variação de cada usuário
+LOOKBACK_DAYS = 90
+# Intervalo mínimo entre a primeira e a última medição da janela
+MIN_SPAN_DAYS = 14
+# Abaixo disso o percentil não é informado (coorte pequena demais)
+MIN_COHORT_SIZE = 10
+
+METRIC_FIELDS = {
+    'weight_change_30d': 'weight',
+    'body_fat_change_30d': 'body_fat',
+}
+
+# Colunas anotadas por annotate_changes
+CHANGE_FIELDS = [
+    f'{metric}_{edge}{suffix}'
+    for metric in METRIC_FIELDS
+    for edge in ('first', 'last')
+    for suffix in ('_date', '')
+]
+
+
+def _edge(field, since, first):
+    entries = ProgressEntry.objects.filter(
+        user=OuterRef('pk'), date__gte=since, **{f'{field}__isnull': False}
+    ).order_by('date' if first else '-date')
+    return Subquery(entries.values('date')[:1]), Subquery(entries.values(field)[:1])
+
+
+def annotate_changes(users, today):
+    """
+    Anota cada usuário com a primeira e a última medição de cada métrica na janela.
+
+    Uma consulta para o lote inteiro: as bordas vêm de subconsultas pelo índice (user, date).
+    """
+    since = today - timedelta(days=LOOKBACK_DAYS)
+    annotations = {}
+    for metric, field in METRIC_FIELDS.items():
+        for edge, first in (('first', True), ('last', False)):
+            day, value = _edge(field, since, first)
+            annotations[f'{metric}_{edge}_date'] = day
+            annotations[f'{metric}_{edge}'] = value
+    return users.annotate(**annotations)
+
+
+def change_per_30_days(row, metric):
+    first_date, last_date = row[f'{metric}_first_date'], row[f'{metric}_last_date']
+    if first_date is None or last_date is None:
+        return None
+    span = (last_date - first_date).days
+    if span < MIN_SPAN_DAYS:
+        return None
+    return (row[f'{metric}_last'] - row[f'{metric}_first']) / span * 30
+
+
+def percentile_of(value, quantiles):
+    """
+    Posição (0 a 100) de ``value`` nos 101 quantis, por busca binária.
+
+    Empates contam pela metade, como no percentil "médio" usual.
+    """
+    low = bisect_left(quantiles, value)
+    high = bisect_right(quantiles, value)
+    position = (low + high) / 2
+    return round(min(max(position - 0.5, 0), 100), 1)
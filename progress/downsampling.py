@@ -0,0 +1,41 @@
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: escolhe ``threshold`` índices de uma série
+    preservando a forma visual (picos e vales) para gráficos.
+
+    ``x`` deve ser crescente. Retorna os índices escolhidos, sempre incluindo
+    o primeiro e o último ponto. Séries com até ``threshold`` pontos voltam inteiras.
+    """
+    if threshold < 3:
+        raise ValueError('threshold deve ser pelo menos 3.')
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+
+    # Limites dos buckets internos (o primeiro e o último ponto ficam de fora)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    # Média de cada bucket, usada como terceiro vértice do triângulo do bucket anterior
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Área (x2) do triângulo (ponto anterior escolhido, candidato, média do próximo bucket)
+        area = np.abs(
+            (x[previous] - avg_x[bucket + 1]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y[bucket + 1] - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
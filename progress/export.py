@@ -0,0 +1,101 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+COLUMNS = ('date', 'weight', 'body_fat', 'muscle_mass')
+CSV_HEADER = ['Date', 'Weight', 'Body Fat', 'Muscle Mass']
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """
+    Pseudo-arquivo para csv.writer: devolve a linha em vez de guardá-la.
+    """
+    def write(self, value):
+        return value
+
+
+def _rows(entries):
+    # iterator() com chunk_size mantém o consumo de memória constante (cursor no servidor no Postgres)
+    for day, *values in entries.values_list(*COLUMNS).iterator(chunk_size=CHUNK_SIZE):
+        yield (day.isoformat(), *values)
+
+
+def _blocks(rows):
+    while True:
+        block = list(islice(rows, CHUNK_SIZE))
+        if not block:
+            return
+        yield block
+
+
+async def _ablocks(entries):
+    # Cada bloco é lido em uma thread (sync_to_async mantém a mesma thread e conexão
+    # entre as chamadas), sem bloquear o event loop. QuerySet.aiterator() não serve:
+    # com values_list() ele executa a consulta no próprio event loop.
+    blocks = _blocks(_rows(entries))
+    next_block = sync_to_async(next)
+    while (block := await next_block(blocks, None)) is not None:
+        yield block
+
+
+# Cada formato é (abertura, codificador de bloco, fechamento); o codificador
+# recebe o bloco e se é o primeiro. Assim as versões síncrona e assíncrona do
+# streaming produzem exatamente o mesmo conteúdo.
+
+def csv_format():
+    writer = csv.writer(_Echo())
+    return writer.writerow(CSV_HEADER), lambda block, first: ''.join(writer.writerow(row) for row in block), ''
+
+
+def ndjson_format():
+    return '', lambda block, first: ''.join(json.dumps(dict(zip(COLUMNS, row))) + '\n' for row in block), ''
+
+
+def columnar_format():
+    """
+    Documento JSON em blocos de colunas: ``{"columns": [...], "blocks": [{"date": [...], ...}, ...]}``.
+
+    Cada bloco tem até CHUNK_SIZE linhas; os nomes das colunas não se repetem por linha.
+    """
+    def encode(block, first):
+        columns = dict(zip(COLUMNS, map(list, zip(*block))))
+        return ('' if first else ',') + json.dumps(columns, separators=(',', ':'))
+    return json.dumps({'columns': COLUMNS})[:-1] + ', "blocks": [', encode, ']}'
+
+
+def stream(output_format, entries):
+    head, encode, tail = output_format()
+    if head:
+        yield head
+    for i, block in enumerate(_blocks(_rows(entries))):
+        yield encode(block, i == 0)
+    if tail:
+        yield tail
+
+
+async def astream(output_format, entries):
+    """
+    Mesmo conteúdo de ``stream`` como iterador assíncrono, para servidores ASGI.
+
+    Com um iterador síncrono o Django consome tudo com ``list()`` antes de
+    enviar o primeiro byte; aqui cada bloco sai assim que é lido do banco.
+    """
+    head, encode, tail = output_format()
+    if head:
+        yield head
+    first = True
+    async for block in _ablocks(entries):
+        yield encode(block, first)
+        first = False
+    if tail:
+        yield tail
+
+
+FORMATS = {
+    'csv': (csv_format, 'text/csv', 'csv'),
+    'ndjson': (ndjson_format, 'application/x-ndjson', 'ndjson'),
+    'columnar': (columnar_format, 'application/json', 'json'),
+}
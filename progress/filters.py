@@ -0,0 +1,29 @@
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+
+from .models import ProgressEntry
+
+
+class ProgressEntryFilter(filters.FilterSet):
+    start_date = filters.DateFilter(field_name="date", lookup_expr="gte")
+    end_date = filters.DateFilter(field_name="date", lookup_expr="lte")
+
+    class Meta:
+        model = ProgressEntry
+        fields = ['start_date', 'end_date']
+
+
+def date_window(params):
+    """
+    Lê ``start_date``/``end_date`` como o ProgressEntryFilter e retorna ``(início, fim)``.
+
+    Datas ausentes vêm como None; datas inválidas geram 400 (ValidationError).
+    """
+    filterset = ProgressEntryFilter(params, queryset=ProgressEntry.objects.none())
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    bounds = filterset.form.cleaned_data
+    start, end = bounds.get('start_date'), bounds.get('end_date')
+    if start and end and start > end:
+        raise ValidationError({'end_date': ['end_date deve ser igual ou posterior a start_date.']})
+    return start, end
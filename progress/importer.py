@@ -0,0 +1,120 @@
+import csv
+import io
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from fitness_app.versioning import bump_version
+from .models import ProgressEntry
+from .serializers import ProgressEntrySerializer
+from .trend import mark_stale
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+VALUE_FIELDS = ('weight', 'body_fat', 'muscle_mass')
+
+# Cabeçalhos aceitos: nomes dos campos ou os do export ("Body Fat", "Muscle Mass")
+HEADER_ALIASES = {
+    'date': 'date', 'data': 'date',
+    'weight': 'weight', 'peso': 'weight',
+    'body fat': 'body_fat', 'body_fat': 'body_fat',
+    'muscle mass': 'muscle_mass', 'muscle_mass': 'muscle_mass',
+}
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_rows(uploaded_file):
+    """
+    Lê o CSV em streaming, linha a linha, devolvendo ``(número da linha, dados)``.
+
+    Colunas desconhecidas são ignoradas; células vazias viram None.
+    """
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise ImportFormatError('Arquivo vazio.')
+    except UnicodeDecodeError:
+        raise ImportFormatError('O arquivo deve estar em UTF-8.')
+
+    columns = [HEADER_ALIASES.get(name.strip().lower()) for name in header]
+    if 'date' not in columns or 'weight' not in columns:
+        raise ImportFormatError('O cabeçalho deve ter as colunas date e weight.')
+
+    try:
+        for row in reader:
+            if not any(cell.strip() for cell in row):
+                continue
+            data = {
+                field: (cell.strip() or None)
+                for field, cell in zip(columns, row) if field is not None
+            }
+            yield reader.line_num, data
+    except UnicodeDecodeError:
+        raise ImportFormatError('O arquivo deve estar em UTF-8.')
+
+
+def import_progress(user, uploaded_file, context, batch_size=BATCH_SIZE):
+    """
+    Valida e grava as medições em lotes, com upsert em (user, date).
+
+    Cada linha é validada com ProgressEntrySerializer e cada lote é gravado em um
+    único INSERT ... ON CONFLICT DO UPDATE, na sua própria transação. Linhas
+    inválidas são rejeitadas sem interromper a importação; se uma data aparece
+    mais de uma vez no arquivo, vale a última.
+    """
+    rows = read_rows(uploaded_file)
+    report = {'inserted': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+    # Mesmas regras do POST de uma medição, exceto a checagem de data repetida (resolvida pelo upsert)
+    serializer = ProgressEntrySerializer(context={**context, 'upsert': True})
+    update_fields = None
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        valid = {}
+        for line, data in batch:
+            try:
+                validated = serializer.run_validation(data)
+            except ValidationError as exc:
+                report['rejected'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'line': line, 'errors': exc.detail})
+                continue
+            valid[validated['date']] = validated
+
+        if update_fields is None:
+            # Só atualiza as colunas presentes no arquivo
+            present = set().union(*(data.keys() for _, data in batch))
+            update_fields = [field for field in VALUE_FIELDS if field in present]
+
+        if valid:
+            _upsert(user, valid, update_fields, report)
+
+    if report['inserted'] or report['updated']:
+        # bulk_create não dispara sinais: versão e tendência são tratadas aqui
+        bump_version('progress', user.id)
+        mark_stale([user.id])
+    return report
+
+
+def _upsert(user, valid, update_fields, report):
+    with transaction.atomic():
+        existing = set(
+            ProgressEntry.objects.filter(user=user, date__in=list(valid)).values_list('date', flat=True)
+        )
+        ProgressEntry.objects.bulk_create(
+            [ProgressEntry(user=user, **values) for values in valid.values()],
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=update_fields,
+        )
+    report['updated'] += len(existing)
+    report['inserted'] += len(valid) - len(existing)
@@ -0,0 +1,56 @@
+from collections import defaultdict
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from progress.cohorts import CHANGE_FIELDS, METRIC_FIELDS, annotate_changes, change_per_30_days
+from progress.models import CohortPercentiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os percentis de variação de peso e gordura corporal por objetivo "
+        "(coortes de User.fitness_goal). Rode periodicamente (ex.: diariamente)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Usuários por consulta.')
+
+    def handle(self, *args, chunk_size, **options):
+        today = timezone.localdate()
+        goals = [value for value, _ in get_user_model().FITNESS_GOALS]
+        users = get_user_model().objects.filter(is_active=True, fitness_goal__in=goals).order_by('id')
+
+        values = defaultdict(list)
+        last_id = 0
+        while True:
+            chunk = list(
+                annotate_changes(users.filter(id__gt=last_id), today)
+                .values('id', 'fitness_goal', *CHANGE_FIELDS)[:chunk_size]
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1]['id']
+            for row in chunk:
+                for metric in METRIC_FIELDS:
+                    change = change_per_30_days(row, metric)
+                    if change is not None:
+                        values[(row['fitness_goal'], metric)].append(change)
+
+        now = timezone.now()
+        for goal in goals:
+            for metric in METRIC_FIELDS:
+                sample = values.get((goal, metric))
+                if not sample:
+                    CohortPercentiles.objects.filter(fitness_goal=goal, metric=metric).delete()
+                    continue
+                quantiles = np.percentile(np.asarray(sample), np.arange(101)).round(4).tolist()
+                CohortPercentiles.objects.update_or_create(
+                    fitness_goal=goal, metric=metric,
+                    defaults={'quantiles': quantiles, 'sample_size': len(sample), 'computed_at': now},
+                )
+                self.stdout.write(f"{goal} / {metric}: {len(sample)} usuários.")
+
+        self.stdout.write(self.style.SUCCESS("Coortes atualizadas."))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0004_rename_body_fat_percentage_progressentry_body_fat_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='progressentry',
+            index=models.Index(fields=['user', 'date'], name='progress_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0005_progressentry_progress_user_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='progressentry',
+            name='progress_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='progressentry',
+            index=models.Index(fields=['user', 'date', 'id'], name='progress_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 04:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_alter_user_options_alter_user_managers_and_more'),
+        ('progress', '0006_extend_progress_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeightTrend',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='weight_trend', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('origin', models.DateField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('sum_x', models.FloatField(default=0)),
+                ('sum_y', models.FloatField(default=0)),
+                ('sum_xx', models.FloatField(default=0)),
+                ('sum_xy', models.FloatField(default=0)),
+                ('ewma', models.FloatField(blank=True, null=True)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('stale', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
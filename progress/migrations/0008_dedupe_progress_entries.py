@@ -0,0 +1,33 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def remover_duplicadas(apps, schema_editor):
+    """
+    Mantém só a medição mais recente (maior id) de cada (usuário, data).
+    """
+    ProgressEntry = apps.get_model('progress', 'ProgressEntry')
+    WeightTrend = apps.get_model('progress', 'WeightTrend')
+
+    duplicadas = list(
+        ProgressEntry.objects.values('user_id', 'date')
+        .annotate(total=Count('id'), manter=Max('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    for grupo in duplicadas:
+        ProgressEntry.objects.filter(user_id=grupo['user_id'], date=grupo['date']).exclude(id=grupo['manter']).delete()
+
+    # Sem sinais nas migrações: a tendência desses usuários é recalculada na próxima leitura
+    WeightTrend.objects.filter(user_id__in={grupo['user_id'] for grupo in duplicadas}).update(stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0007_weight_trend'),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_duplicadas, migrations.RunPython.noop),
+    ]
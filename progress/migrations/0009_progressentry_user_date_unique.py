@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 04:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0008_dedupe_progress_entries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='progressentry',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='progress_user_date_unique'),
+        ),
+    ]
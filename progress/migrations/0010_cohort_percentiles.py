@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0009_progressentry_user_date_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortPercentiles',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fitness_goal', models.CharField(choices=[('perda de peso', 'Perda de Peso'), ('ganho muscular', 'Ganho Muscular'), ('flexibilidade', 'Flexibilidade')], max_length=50)),
+                ('metric', models.CharField(choices=[('weight_change_30d', 'Variação de peso a cada 30 dias'), ('body_fat_change_30d', 'Variação de gordura corporal a cada 30 dias')], max_length=30)),
+                ('quantiles', models.JSONField()),
+                ('sample_size', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fitness_goal', 'metric'), name='cohort_goal_metric_unique')],
+            },
+        ),
+    ]
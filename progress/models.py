@@ -8,5 +8,67 @@ class ProgressEntry(models.Model):
     body_fat = models.FloatField(null=True, blank=True)  # <-- esse campo deve existir
     muscle_mass = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Consultas por intervalo de datas (start_date/end_date) do usuário
+            models.Index(fields=['user', 'date', 'id'], name='progress_user_date_idx'),
+        ]
+        constraints = [
+            # Uma medição por dia; a importação faz upsert nesta chave
+            models.UniqueConstraint(fields=['user', 'date'], name='progress_user_date_unique'),
+        ]
+
     def __str__(self):
         return f"{self.user.email} - {self.date}"
+
+
+class WeightTrend(models.Model):
+    """
+    Estado incremental da tendência de peso do usuário (ver progress/trend.py).
+
+    Guarda as somas da regressão linear peso x dias (``x`` contado a partir de
+    ``origin``) e o último valor da média móvel exponencial (EWMA). Novas
+    medições atualizam o estado em O(1); edições, exclusões e medições com data
+    anterior à última marcam ``stale`` e o estado é recalculado na próxima leitura.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='weight_trend')
+    origin = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    sum_x = models.FloatField(default=0)
+    sum_y = models.FloatField(default=0)
+    sum_xx = models.FloatField(default=0)
+    sum_xy = models.FloatField(default=0)
+    ewma = models.FloatField(null=True, blank=True)
+    last_date = models.DateField(null=True, blank=True)
+    stale = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Tendência de {self.user.email}"
+
+
+class CohortPercentiles(models.Model):
+    """
+    Percentis (0 a 100) de uma métrica entre os usuários com o mesmo objetivo.
+
+    Gerado periodicamente por ``build_progress_cohorts``; ``quantiles`` tem
+    101 valores crescentes, e a posição de um usuário sai de uma busca binária.
+    """
+    METRICS = [
+        ('weight_change_30d', 'Variação de peso a cada 30 dias'),
+        ('body_fat_change_30d', 'Variação de gordura corporal a cada 30 dias'),
+    ]
+
+    fitness_goal = models.CharField(max_length=50, choices=User.FITNESS_GOALS)
+    metric = models.CharField(max_length=30, choices=METRICS)
+    quantiles = models.JSONField()
+    sample_size = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fitness_goal', 'metric'], name='cohort_goal_metric_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.fitness_goal} - {self.metric} ({self.sample_size} usuários)"
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from fitness_app.serializers import SparseFieldsetMixin
 from .models import ProgressEntry
 
-class ProgressEntrySerializer(serializers.ModelSerializer):
+class ProgressEntrySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = ProgressEntry
         fields = '__all__'
@@ -22,6 +23,20 @@ class ProgressEntrySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("A massa muscular não pode ser negativa.")
         return value
 
+    def validate(self, attrs):
+        # Na importação o upsert resolve datas repetidas; não consulta o banco linha a linha
+        if self.context.get('upsert'):
+            return attrs
+        request = self.context.get('request')
+        day = attrs.get('date', getattr(self.instance, 'date', None))
+        if request is not None and day is not None:
+            duplicates = ProgressEntry.objects.filter(user=request.user, date=day)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError({'date': 'Já existe uma medição nesta data.'})
+        return attrs
+
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from fitness_app.versioning import connect_version_signals
+
+from .models import ProgressEntry
+from .trend import mark_stale, record_entry
+
+connect_version_signals(ProgressEntry, 'progress')
+
+
+@receiver(post_save, sender=ProgressEntry)
+def trend_entry_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_entry(instance)
+    else:
+        # Edição de medição antiga: recalcula tudo na próxima leitura
+        mark_stale([instance.user_id])
+
+
+@receiver(post_delete, sender=ProgressEntry)
+def trend_entry_deleted(sender, instance, **kwargs):
+    mark_stale([instance.user_id])
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Avg, Count, DateField, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Cast
+
+from .models import ProgressEntry
+
+METRICS = ('weight', 'body_fat', 'muscle_mass')
+DELTA_DAYS = (7, 30, 90)
+
+
+def _entries(start, end, outer):
+    entries = ProgressEntry.objects.filter(user=outer)
+    if start:
+        entries = entries.filter(date__gte=start)
+    if end:
+        entries = entries.filter(date__lte=end)
+    return entries.order_by('-date', '-id')
+
+
+def _latest(start, end, field, outer=None, **filters):
+    entries = _entries(start, end, outer or OuterRef('pk')).filter(**filters)
+    return Subquery(entries.values(field)[:1])
+
+
+def progress_stats(user_id, start=None, end=None):
+    """
+    Estatísticas do progresso do usuário na janela ``[start, end]`` em uma única consulta.
+
+    Média/mínimo/máximo saem de agregados filtrados sobre o join com as entradas;
+    o último valor de cada métrica e o peso de 7/30/90 dias antes da última
+    entrada vêm de subconsultas escalares pelo índice (user, date, id).
+    """
+    window = Q()
+    if start:
+        window &= Q(progressentry__date__gte=start)
+    if end:
+        window &= Q(progressentry__date__lte=end)
+
+    annotations = {
+        'total_entries': Count('progressentry', filter=window),
+        'first_date': Min('progressentry__date', filter=window),
+        'latest_date': _latest(start, end, 'date'),
+    }
+    for metric in METRICS:
+        annotations[f'{metric}_avg'] = Avg(f'progressentry__{metric}', filter=window)
+        annotations[f'{metric}_min'] = Min(f'progressentry__{metric}', filter=window)
+        annotations[f'{metric}_max'] = Max(f'progressentry__{metric}', filter=window)
+        annotations[f'{metric}_latest'] = _latest(start, end, metric, **{f'{metric}__isnull': False})
+
+    # Peso da última entrada com data <= (data da última entrada - N dias)
+    latest_date = _latest(start, end, 'date', outer=OuterRef(OuterRef('pk')))
+    for days in DELTA_DAYS:
+        cutoff = Cast(latest_date - Value(timedelta(days=days)), DateField())
+        annotations[f'weight_{days}d_ago'] = _latest(start, end, 'weight', date__lte=cutoff)
+
+    row = (
+        get_user_model().objects.filter(pk=user_id)
+        .values('pk').annotate(**annotations).values(*annotations).get()
+    )
+
+    stats = {
+        'total_entries': row['total_entries'],
+        'first_date': row['first_date'],
+        'latest_date': row['latest_date'],
+        # Chaves do formato anterior, mantidas para os clientes existentes
+        'avg_weight': row['weight_avg'],
+        'max_weight': row['weight_max'],
+        'min_weight': row['weight_min'],
+        'avg_body_fat': row['body_fat_avg'],
+    }
+    for metric in METRICS:
+        stats[metric] = {
+            key: row[f'{metric}_{key}'] for key in ('latest', 'avg', 'min', 'max')
+        }
+
+    latest_weight = row['weight_latest']
+    stats['weight']['delta'] = {
+        f'{days}d': (
+            round(latest_weight - row[f'weight_{days}d_ago'], 2)
+            if row[f'weight_{days}d_ago'] is not None else None
+        )
+        for days in DELTA_DAYS
+    }
+    return stats
@@ -1,7 +1,29 @@
-from rest_framework.test import APITestCase, APIClient
+import io
+import json
+import warnings
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import close_old_connections
+from django.test import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
 from accounts.models import User
-from progress.models import ProgressEntry
+from fitness_app.query_plans import uses_index
+from progress.cohorts import percentile_of
+from progress.downsampling import lttb
+from progress.models import CohortPercentiles, ProgressEntry, WeightTrend
+from progress.trend import get_trend, recompute
+from progress.views import ProgressEntryViewSet
 
 class ProgressTests(APITestCase):
 
@@ -35,7 +57,7 @@ class ProgressTests(APITestCase):
         )
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 1)
+        self.assertGreaterEqual(len(response.data['results']), 1)
 
     def test_filter_progress_by_date(self):
         ProgressEntry.objects.create(
@@ -45,5 +67,346 @@ class ProgressTests(APITestCase):
             user=self.user, date="2025-04-06", weight=78.5
         )
         response = self.client.get(self.url + '?start_date=2025-04-05')
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['date'], "2025-04-06")
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['date'], "2025-04-06")
+
+    def test_date_range_uses_user_date_index(self):
+        request = Request(APIRequestFactory().get(self.url, {'start_date': '2025-04-01', 'end_date': '2025-04-30'}))
+        request.user = self.user
+        view = ProgressEntryViewSet(request=request, format_kwarg=None)
+        queryset = view.filter_queryset(view.get_queryset())
+        self.assertIn('"date" >=', str(queryset.query))
+        self.assertTrue(uses_index(queryset, 'progress_user_date_idx'))
+
+    def test_list_supports_sparse_fieldset(self):
+        ProgressEntry.objects.create(user=self.user, date="2025-04-01", weight=80.0, body_fat=20.5)
+        response = self.client.get(self.url, {'fields': 'date,weight,body_fat'})
+        self.assertEqual(response.data['results'], [{'date': '2025-04-01', 'weight': 80.0, 'body_fat': 20.5}])
+
+    def test_sparse_fieldset_does_not_drop_written_fields(self):
+        response = self.client.post(f'{self.url}?fields=id', {'date': '2025-04-05', 'weight': 79.5, 'body_fat': 19.0})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(list(response.data), ['id'])
+        entry = ProgressEntry.objects.get(pk=response.data['id'])
+        self.assertEqual((str(entry.date), entry.weight, entry.body_fat), ('2025-04-05', 79.5, 19.0))
+
+    @override_settings(DATA_VERSIONS_ENABLED=True)
+    def test_conditional_get_with_etag(self):
+        first = self.client.get(self.url)
+        etag = first['ETag']
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProgressEntry.objects.create(user=self.user, date="2025-04-10", weight=77.0)
+
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed['ETag'], etag)
+
+
+class ProgressStatsTests(APITestCase):
+    def setUp(self):
+        # Ids de usuário se repetem entre testes; limpa versões/estatísticas em cache
+        cache.clear()
+        self.user = User.objects.create_user(email='statsuser@example.com', password='teste123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        readings = [
+            ('2025-01-01', 90.0, 25.0, 35.0),
+            ('2025-03-02', 86.0, None, None),
+            ('2025-03-25', 84.0, 22.0, 36.5),
+            ('2025-04-01', 83.0, None, 37.0),
+        ]
+        for day, weight, body_fat, muscle_mass in readings:
+            ProgressEntry.objects.create(user=self.user, date=day, weight=weight, body_fat=body_fat, muscle_mass=muscle_mass)
+
+    def test_stats_in_a_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/progress/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(data['total_entries'], 4)
+        self.assertEqual(data['avg_weight'], 85.75)
+        self.assertEqual(data['weight']['latest'], 83.0)
+        self.assertEqual(data['weight']['delta'], {'7d': -1.0, '30d': -3.0, '90d': -7.0})
+        self.assertEqual(data['body_fat']['latest'], 22.0)
+        self.assertEqual(data['muscle_mass'], {'latest': 37.0, 'avg': 36.166666666666664, 'min': 35.0, 'max': 37.0})
+
+    def test_stats_respect_date_window(self):
+        response = self.client.get('/progress/stats/', {'start_date': '2025-03-01', 'end_date': '2025-03-31'})
+        self.assertEqual(response.data['total_entries'], 2)
+        self.assertEqual(response.data['weight']['latest'], 84.0)
+        self.assertEqual(response.data['weight']['delta']['7d'], -2.0)
+        self.assertEqual(response.data['weight']['delta']['30d'], None)
+
+        response = self.client.get('/progress/stats/', {'start_date': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(DATA_VERSIONS_ENABLED=True)
+    def test_stats_cached_until_entries_change(self):
+        self.client.get('/progress/stats/')
+        with self.assertNumQueries(0):
+            self.client.get('/progress/stats/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProgressEntry.objects.create(user=self.user, date='2025-04-02', weight=82.0)
+        response = self.client.get('/progress/stats/')
+        self.assertEqual(response.data['weight']['latest'], 82.0)
+
+
+class ProgressExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='exportuser@example.com', password='teste123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        ProgressEntry.objects.create(user=self.user, date='2025-04-02', weight=79.5, muscle_mass=38.0)
+        ProgressEntry.objects.create(user=self.user, date='2025-04-01', weight=80.0, body_fat=20.0)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_includes_muscle_mass(self):
+        response = self.client.get('/progress/export/')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(self.content(response).splitlines(), [
+            'Date,Weight,Body Fat,Muscle Mass',
+            '2025-04-01,80.0,20.0,',
+            '2025-04-02,79.5,,38.0',
+        ])
+
+    def test_ndjson_with_date_range(self):
+        response = self.client.get('/progress/export/', {'output': 'ndjson', 'start_date': '2025-04-02'})
+        lines = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(lines, [{'date': '2025-04-02', 'weight': 79.5, 'body_fat': None, 'muscle_mass': 38.0}])
+
+    def test_columnar_blocks(self):
+        response = self.client.get('/progress/export/', {'output': 'columnar'})
+        data = json.loads(self.content(response))
+        self.assertEqual(data['columns'], ['date', 'weight', 'body_fat', 'muscle_mass'])
+        self.assertEqual(data['blocks'], [{
+            'date': ['2025-04-01', '2025-04-02'], 'weight': [80.0, 79.5],
+            'body_fat': [20.0, None], 'muscle_mass': [None, 38.0],
+        }])
+
+    def test_empty_columnar_is_valid_json(self):
+        response = self.client.get('/progress/export/', {'output': 'columnar', 'start_date': '2030-01-01'})
+        self.assertEqual(json.loads(self.content(response))['blocks'], [])
+
+    def test_unknown_output_is_rejected(self):
+        response = self.client.get('/progress/export/', {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_asgi_export_is_not_buffered(self):
+        await ProgressEntry.objects.acreate(user=self.user, date='2025-04-03', weight=79.0)
+        auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        with patch('progress.export.CHUNK_SIZE', 2):
+            response = await self.async_client.get('/progress/export/', {'output': 'columnar'}, headers=auth)
+            self.assertTrue(response.is_async)
+            # Um iterador síncrono cairia no list() do Django, que avisa antes de bufferizar
+            with warnings.catch_warnings():
+                warnings.filterwarnings('error', 'StreamingHttpResponse must consume synchronous iterators')
+                parts = [part async for part in response]
+        # Abertura, um pedaço por bloco de 2 linhas e fechamento
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(json.loads(b''.join(parts))['blocks'][1], {
+            'date': ['2025-04-03'], 'weight': [79.0], 'body_fat': [None], 'muscle_mass': [None],
+        })
+
+    async def test_export_streams_through_the_deployed_asgi_app(self):
+        # O Procfile serve a API inteira por fitness_app.asgi (uvicorn)
+        from fitness_app.asgi import application
+
+        # Como nos clientes de teste do Django: fechar a conexão no fim da requisição
+        # encerraria a transação do teste
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+        auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        transport = httpx.ASGITransport(app=application)
+        with warnings.catch_warnings():
+            warnings.filterwarnings('error', 'StreamingHttpResponse must consume synchronous iterators')
+            async with httpx.AsyncClient(transport=transport, base_url='http://localhost') as client:
+                response = await client.get('/progress/export/', params={'output': 'ndjson'}, headers=auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([json.loads(line)['date'] for line in response.text.splitlines()], ['2025-04-01', '2025-04-02'])
+
+
+class ProgressSeriesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='seriesuser@example.com', password='teste123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        start = date(2025, 1, 6)  # segunda-feira
+        ProgressEntry.objects.bulk_create([
+            ProgressEntry(user=self.user, date=start + timedelta(days=i), weight=80 + (i % 7), body_fat=20.0 if i < 7 else None)
+            for i in range(14)
+        ])
+
+    def test_weekly_buckets_computed_in_database(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/progress/series/', {'bucket': 'week', 'metrics': 'weight,body_fat'})
+        first, second = response.data['results']
+        self.assertEqual(first['date'], date(2025, 1, 6))
+        self.assertEqual(first['count'], 7)
+        self.assertEqual(first['weight'], {'avg': 83.0, 'min': 80.0, 'max': 86.0})
+        self.assertEqual(second['body_fat'], None)
+
+    def test_max_points_downsamples_with_lttb(self):
+        response = self.client.get('/progress/series/', {'metrics': 'weight', 'max_points': 5})
+        results = response.data['results']
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[0]['date'], date(2025, 1, 6))
+        self.assertEqual(results[-1]['date'], date(2025, 1, 19))
+        self.assertIn(86.0, [row['weight'] for row in results])
+
+    def test_invalid_parameters(self):
+        response = self.client.get('/progress/series/', {'bucket': 'year', 'metrics': 'height', 'max_points': 1})
+        self.assertEqual(set(response.data), {'bucket', 'metrics', 'max_points'})
+
+    def test_lttb_keeps_extremes(self):
+        x = np.arange(1000)
+        y = np.sin(x / 50.0)
+        y[500] = 10
+        chosen = lttb(x, y, 50)
+        self.assertEqual(len(chosen), 50)
+        self.assertEqual((chosen[0], chosen[-1]), (0, 999))
+        self.assertIn(500, chosen)
+        self.assertTrue((np.diff(chosen) > 0).all())
+
+
+class WeightTrendTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='trenduser@example.com', password='teste123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        start = date(2025, 1, 1)
+        for i in range(10):
+            ProgressEntry.objects.create(user=self.user, date=start + timedelta(days=7 * i), weight=90 - 0.5 * i)
+
+    def test_incremental_state_matches_full_recompute(self):
+        get_trend(self.user.id)
+        ProgressEntry.objects.create(user=self.user, date=date(2025, 3, 20), weight=85.0)
+        ProgressEntry.objects.create(user=self.user, date=date(2025, 3, 21), weight=84.8)
+        incremental = WeightTrend.objects.get(user=self.user)
+        self.assertFalse(incremental.stale)
+
+        full = recompute(self.user.id)
+        for field in ('count', 'sum_x', 'sum_y', 'sum_xx', 'sum_xy', 'ewma'):
+            self.assertAlmostEqual(getattr(incremental, field), getattr(full, field), places=6)
+
+    def test_editing_past_entry_triggers_recompute(self):
+        get_trend(self.user.id)
+        entry = ProgressEntry.objects.get(user=self.user, date=date(2025, 1, 1))
+        entry.weight = 100
+        entry.save()
+        self.assertTrue(WeightTrend.objects.get(user=self.user).stale)
+        self.assertEqual(get_trend(self.user.id).sum_y, sum(90 - 0.5 * i for i in range(1, 10)) + 100)
+
+    def test_trend_endpoint_projects_eta(self):
+        response = self.client.get('/progress/trend/', {'target_weight': 80})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertAlmostEqual(response.data['slope_per_week'], -0.5)
+        self.assertEqual(response.data['status'], 'on_track')
+        self.assertEqual(response.data['eta_date'], response.data['last_date'] + timedelta(days=response.data['eta_days']))
+
+        response = self.client.get('/progress/trend/', {'target_weight': 95})
+        self.assertEqual(response.data['status'], 'moving_away')
+
+    def test_trend_rejects_non_finite_target(self):
+        for value in ('nan', 'inf', '-inf', '0'):
+            with self.subTest(target_weight=value):
+                response = self.client.get('/progress/trend/', {'target_weight': value})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ProgressImportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='importuser@example.com', password='teste123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        ProgressEntry.objects.create(user=self.user, date='2025-04-01', weight=81.0, body_fat=21.0)
+
+    def upload(self, content):
+        upload = SimpleUploadedFile('scale.csv', content.encode('utf-8'), content_type='text/csv')
+        return self.client.post('/progress/import/', {'file': upload}, format='multipart')
+
+    def test_upsert_reports_counts(self):
+        response = self.upload(
+            'Date,Weight,Body Fat,Extra\n'
+            '2025-04-01,80.5,20.5,x\n'
+            '2025-04-02,80.0,,x\n'
+            '2025-04-03,-1,,x\n'
+            'ontem,79.0,,x\n'
+            '\n'
+            '2025-04-04,79.5,19.0,x\n'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['inserted'], response.data['updated'], response.data['rejected']), (2, 1, 2))
+        self.assertEqual([error['line'] for error in response.data['errors']], [4, 5])
+        self.assertEqual(ProgressEntry.objects.get(user=self.user, date='2025-04-01').weight, 80.5)
+        self.assertEqual(ProgressEntry.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(get_trend(self.user.id).count, 3)
+
+    def test_sparse_fieldset_does_not_affect_import(self):
+        upload = SimpleUploadedFile('scale.csv', b'Date,Weight\n2025-04-02,80.0\n', content_type='text/csv')
+        response = self.client.post('/progress/import/?fields=id', {'file': upload}, format='multipart')
+        self.assertEqual(response.data['inserted'], 1)
+        self.assertEqual(ProgressEntry.objects.get(user=self.user, date='2025-04-02').weight, 80.0)
+
+    def test_missing_columns_keep_existing_values(self):
+        self.upload('date,weight\n2025-04-01,80.0\n')
+        entry = ProgressEntry.objects.get(user=self.user, date='2025-04-01')
+        self.assertEqual((entry.weight, entry.body_fat), (80.0, 21.0))
+
+    def test_invalid_header_is_rejected(self):
+        response = self.upload('foo,bar\n1,2\n')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_duplicate_date_rejected_on_create(self):
+        response = self.client.post('/progress/', {'date': '2025-04-01', 'weight': 80})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('date', response.data)
+
+
+class CohortPercentileTests(APITestCase):
+    def setUp(self):
+        today = date.today()
+        # 12 usuários perdendo de 0 a 1.1 kg em 30 dias
+        for i in range(12):
+            user = User.objects.create_user(
+                email=f'cohort{i}@example.com', password='teste123', fitness_goal='perda de peso'
+            )
+            ProgressEntry.objects.create(user=user, date=today - timedelta(days=30), weight=90.0)
+            ProgressEntry.objects.create(user=user, date=today, weight=90.0 - i / 10)
+        self.user = User.objects.get(email='cohort9@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_build_command_stores_quantiles(self):
+        call_command('build_progress_cohorts', chunk_size=5, stdout=io.StringIO())
+        cohort = CohortPercentiles.objects.get(fitness_goal='perda de peso', metric='weight_change_30d')
+        self.assertEqual(cohort.sample_size, 12)
+        self.assertEqual(len(cohort.quantiles), 101)
+        self.assertAlmostEqual(cohort.quantiles[0], -1.1)
+        self.assertAlmostEqual(cohort.quantiles[100], 0.0)
+        self.assertFalse(CohortPercentiles.objects.filter(metric='body_fat_change_30d').exists())
+
+    def test_endpoint_returns_percentile(self):
+        call_command('build_progress_cohorts', stdout=io.StringIO())
+        response = self.client.get('/progress/cohort/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        weight = response.data['metrics']['weight_change_30d']
+        self.assertAlmostEqual(weight['value'], -0.9)
+        self.assertTrue(15 <= weight['percentile'] <= 25)
+        self.assertIsNone(response.data['metrics']['body_fat_change_30d']['percentile'])
+
+    def test_percentile_of_bounds_and_ties(self):
+        quantiles = [float(q) for q in range(101)]
+        self.assertEqual(percentile_of(-5, quantiles), 0)
+        self.assertEqual(percentile_of(500, quantiles), 100)
+        self.assertEqual(percentile_of(40, quantiles), 40)
+        self.assertEqual(percentile_of(1.0, [1.0] * 101), 50)
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from math import log
+
+import numpy as np
+from django.db import transaction
+
+from .models import ProgressEntry, WeightTrend
+
+# Suavização da EWMA por dia: cada dia sem medição multiplica o peso do histórico por (1 - ALPHA)
+ALPHA = 0.1
+# Projeções acima disso (inclinação quase nula) não viram data
+MAX_ETA_DAYS = 5 * 365
+FIELDS = ['origin', 'count', 'sum_x', 'sum_y', 'sum_xx', 'sum_xy', 'ewma', 'last_date', 'stale']
+
+
+def _decay(days):
+    # Cada medição vale pelo menos um passo, para nunca ser ignorada
+    return (1 - ALPHA) ** max(days, 1)
+
+
+def record_entry(entry):
+    """
+    Atualiza a tendência com uma nova medição em O(1).
+
+    Medições com data anterior à última registrada mudam a ordem da EWMA: nesse
+    caso o estado só é marcado como desatualizado.
+    """
+    with transaction.atomic():
+        WeightTrend.objects.get_or_create(user_id=entry.user_id, defaults={'stale': True})
+        trend = WeightTrend.objects.select_for_update().get(user_id=entry.user_id)
+        if trend.stale:
+            return
+        if trend.last_date and entry.date < trend.last_date:
+            trend.stale = True
+            trend.save(update_fields=['stale', 'updated_at'])
+            return
+
+        if trend.origin is None:
+            trend.origin = entry.date
+        x = float((entry.date - trend.origin).days)
+        y = entry.weight
+        trend.count += 1
+        trend.sum_x += x
+        trend.sum_y += y
+        trend.sum_xx += x * x
+        trend.sum_xy += x * y
+        if trend.ewma is None:
+            trend.ewma = y
+        else:
+            beta = _decay((entry.date - trend.last_date).days)
+            trend.ewma = beta * trend.ewma + (1 - beta) * y
+        trend.last_date = entry.date
+        trend.save(update_fields=FIELDS + ['updated_at'])
+
+
+def mark_stale(user_ids):
+    WeightTrend.objects.filter(user_id__in=user_ids).update(stale=True)
+
+
+def recompute(user_id):
+    """
+    Recalcula o estado a partir de todo o histórico do usuário.
+    """
+    with transaction.atomic():
+        # O bloqueio serializa com record_entry: uma medição nova entra aqui ou no passo O(1) seguinte
+        WeightTrend.objects.get_or_create(user_id=user_id)
+        WeightTrend.objects.select_for_update().get(user_id=user_id)
+        rows = list(
+            ProgressEntry.objects.filter(user_id=user_id).order_by('date', 'id').values_list('date', 'weight')
+        )
+        trend = WeightTrend(user_id=user_id)
+        _fill(trend, rows)
+        trend.save()
+    return trend
+
+
+def _fill(trend, rows):
+    """
+    Preenche o estado a partir de ``[(data, peso), ...]`` ordenado, com NumPy.
+
+    A EWMA final é a soma ponderada de todas as medições: o peso de cada uma é
+    ``(1 - beta_j) * prod(beta_k, k > j)``, calculado em log para não haver
+    underflow em históricos longos.
+    """
+    if rows:
+        ordinals = np.fromiter((day.toordinal() for day, _ in rows), dtype=float, count=len(rows))
+        y = np.fromiter((weight for _, weight in rows), dtype=float, count=len(rows))
+        x = ordinals - ordinals[0]
+
+        steps = np.maximum(np.diff(x), 1)
+        log_beta = np.concatenate(([-np.inf], steps * log(1 - ALPHA)))
+        # Soma de log(beta) dos pontos posteriores a cada medição
+        later = np.concatenate((np.cumsum(log_beta[::-1])[::-1][1:], [0.0]))
+        weights = -np.expm1(log_beta) * np.exp(later)
+
+        trend.origin = rows[0][0]
+        trend.count = len(rows)
+        trend.sum_x = float(x.sum())
+        trend.sum_y = float(y.sum())
+        trend.sum_xx = float((x * x).sum())
+        trend.sum_xy = float((x * y).sum())
+        trend.ewma = float(weights @ y)
+        trend.last_date = rows[-1][0]
+
+
+def get_trend(user_id):
+    trend = WeightTrend.objects.filter(user_id=user_id).first()
+    if trend is None or trend.stale:
+        trend = recompute(user_id)
+    return trend
+
+
+def regression(trend):
+    """
+    Retorna ``(inclinação em kg/dia, peso previsto em last_date)`` ou ``(None, None)``.
+    """
+    n = trend.count
+    denominator = n * trend.sum_xx - trend.sum_x ** 2
+    if n < 2 or denominator <= 0:
+        return None, None
+    slope = (n * trend.sum_xy - trend.sum_x * trend.sum_y) / denominator
+    intercept = (trend.sum_y - slope * trend.sum_x) / n
+    x_last = (trend.last_date - trend.origin).days
+    return slope, intercept + slope * x_last
+
+
+def summarize(trend, target_weight=None):
+    slope, fitted = regression(trend)
+    result = {
+        'entries': trend.count,
+        'last_date': trend.last_date,
+        'ewma': round(trend.ewma, 2) if trend.ewma is not None else None,
+        'regression_weight': round(fitted, 2) if fitted is not None else None,
+        'slope_per_week': round(slope * 7, 3) if slope is not None else None,
+        'target_weight': target_weight,
+        'eta_days': None,
+        'eta_date': None,
+        'status': None,
+    }
+    if target_weight is None or trend.ewma is None:
+        return result
+
+    remaining = target_weight - trend.ewma
+    if abs(remaining) < 0.1:
+        result['status'] = 'reached'
+    elif slope is None or slope == 0 or (remaining > 0) != (slope > 0):
+        result['status'] = 'moving_away'
+    elif remaining / slope > MAX_ETA_DAYS:
+        result['status'] = 'stalled'
+    else:
+        days = int(np.ceil(remaining / slope))
+        result.update(status='on_track', eta_days=days, eta_date=trend.last_date + timedelta(days=days))
+    return result
@@ -1,12 +1,25 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProgressEntryViewSet, ProgressStatsView, export_progress
+from .views import (
+    ProgressEntryViewSet,
+    ProgressSeriesView,
+    ProgressStatsView,
+    cohort_position,
+    export_progress,
+    import_progress_csv,
+    weight_trend,
+)
 
 router = DefaultRouter()
 router.register(r'', ProgressEntryViewSet, basename='progressentry')
 
+# Rotas fixas antes do router: senão "stats/" casaria com o detalhe /<pk>/
 urlpatterns = [
-    path('', include(router.urls)),
     path('stats/', ProgressStatsView.as_view(), name='progress-stats'),
     path('export/', export_progress, name='progress-export'),
+    path('import/', import_progress_csv, name='progress-import'),
+    path('series/', ProgressSeriesView.as_view(), name='progress-series'),
+    path('trend/', weight_trend, name='progress-trend'),
+    path('cohort/', cohort_position, name='progress-cohort'),
+    path('', include(router.urls)),
 ]
@@ -1,67 +1,249 @@
+from math import isfinite
+
 from rest_framework import viewsets, generics, status
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Avg, Max, Min
-from django.http import HttpResponse
-from django.utils.dateparse import parse_date
-import csv
-
-from .models import ProgressEntry
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from fitness_app.mixins import ValuesListMixin
+from fitness_app.versioning import ConditionalGetMixin, cached_per_version
+from .downsampling import lttb
+from .export import FORMATS, astream, stream
+from .cohorts import CHANGE_FIELDS, METRIC_FIELDS, MIN_COHORT_SIZE, annotate_changes, change_per_30_days, percentile_of
+from .filters import ProgressEntryFilter, date_window
+from .importer import ImportFormatError, import_progress
+from .models import CohortPercentiles, ProgressEntry
 from .serializers import ProgressEntrySerializer
+from .stats import progress_stats
+from .trend import get_trend, summarize
 from .permissions import IsOwner
 
 
-class ProgressEntryViewSet(viewsets.ModelViewSet):
+class ProgressEntryViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = ProgressEntrySerializer
     permission_classes = [IsAuthenticated, IsOwner]
+    version_resource = 'progress'
+    ordering = ('-date', '-id')
 
-    def get_queryset(self):
-        user = self.request.user
-        queryset = ProgressEntry.objects.filter(user=user)
-
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
+    filterset_class = ProgressEntryFilter
 
-        if start_date:
-            queryset = queryset.filter(date__gte=parse_date(start_date))
-        if end_date:
-            queryset = queryset.filter(date__lte=parse_date(end_date))
-
-        return queryset
+    def get_queryset(self):
+        # start_date/end_date são aplicados por filter_queryset (ProgressEntryFilter)
+        return ProgressEntry.objects.filter(user=self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class ProgressStatsView(generics.GenericAPIView):
+class ProgressStatsView(ConditionalGetMixin, generics.GenericAPIView):
+    """
+    Estatísticas do progresso, aceitando a mesma janela start_date/end_date da listagem.
+
+    Calculadas em uma consulta e guardadas em cache por versão dos dados do
+    usuário: qualquer save/delete de ProgressEntry invalida o resultado.
+    """
     permission_classes = [IsAuthenticated]
+    version_resource = 'progress'
 
     def get(self, request):
-        entries = ProgressEntry.objects.filter(user=request.user)
-
-        stats = {
-            'total_entries': entries.count(),
-            'avg_weight': entries.aggregate(Avg('weight'))['weight__avg'],
-            'max_weight': entries.aggregate(Max('weight'))['weight__max'],
-            'min_weight': entries.aggregate(Min('weight'))['weight__min'],
-            'avg_body_fat': entries.aggregate(Avg('body_fat'))['body_fat__avg'],
-        }
+        return self.conditional_response(request, self._stats)
+
+    def _stats(self, request):
+        start, end = date_window(request.query_params)
+        stats = cached_per_version(
+            'progress', request.user.id, f'progress-stats:{start}:{end}',
+            lambda: progress_stats(request.user.id, start, end),
+        )
         return Response(stats)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def export_progress(request):
-    entries = ProgressEntry.objects.filter(user=request.user).order_by('date')
+    """
+    Exporta o histórico em streaming (memória constante, também sob ASGI), em ordem de data.
+
+    ``?output=csv`` (padrão), ``ndjson`` ou ``columnar``; aceita ``start_date``/``end_date``.
+    O parâmetro não se chama ``format`` porque o DRF reserva esse nome.
+    """
+    output = request.query_params.get('output', 'csv')
+    if output not in FORMATS:
+        return Response(
+            {'detail': f"Formato inválido. Use: {', '.join(FORMATS)}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    start, end = date_window(request.query_params)
+
+    entries = ProgressEntry.objects.filter(user=request.user).order_by('date', 'id')
+    if start:
+        entries = entries.filter(date__gte=start)
+    if end:
+        entries = entries.filter(date__lte=end)
+
+    output_format, content_type, extension = FORMATS[output]
+    # Sob ASGI o conteúdo precisa ser assíncrono, senão o Django o lê inteiro antes de enviar
+    streamer = astream if isinstance(request._request, ASGIRequest) else stream
+    response = StreamingHttpResponse(streamer(output_format, entries), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="progress_data.{extension}"'
+    return response
 
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="progress_data.csv"'
 
-    writer = csv.writer(response)
-    writer.writerow(['Date', 'Weight', 'Body Fat'])
+class ProgressSeriesView(generics.GenericAPIView):
+    """
+    Séries para gráficos de peso, gordura corporal e massa muscular.
 
-    for entry in entries:
-        writer.writerow([entry.date, entry.weight, entry.body_fat])
+    ``?bucket=day|week|month`` agrupa no banco (média/mínimo/máximo por período);
+    sem ``bucket``, devolve as medições brutas. ``?max_points=N`` reduz a série
+    com LTTB, usando a primeira métrica de ``?metrics=`` para escolher os pontos
+    (períodos sem essa métrica ficam de fora). Aceita a janela ``start_date``/``end_date``.
+    """
+    permission_classes = [IsAuthenticated]
 
-    return response
+    METRICS = ('weight', 'body_fat', 'muscle_mass')
+    BUCKETS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+    MAX_POINTS = 5000
+
+    def get(self, request):
+        params = request.query_params
+        metrics = [name for name in params.get('metrics', ','.join(self.METRICS)).split(',') if name]
+        bucket = params.get('bucket')
+        errors = {}
+        if not metrics or set(metrics) - set(self.METRICS):
+            errors['metrics'] = f"Use uma ou mais de: {', '.join(self.METRICS)}."
+        if bucket and bucket not in self.BUCKETS:
+            errors['bucket'] = f"Use: {', '.join(self.BUCKETS)}."
+        try:
+            max_points = int(params['max_points']) if params.get('max_points') else None
+            if max_points is not None and not 3 <= max_points <= self.MAX_POINTS:
+                raise ValueError
+        except ValueError:
+            errors['max_points'] = f'Deve ser um inteiro entre 3 e {self.MAX_POINTS}.'
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        start, end = date_window(params)
+        entries = ProgressEntry.objects.filter(user=request.user)
+        if start:
+            entries = entries.filter(date__gte=start)
+        if end:
+            entries = entries.filter(date__lte=end)
+
+        if bucket:
+            rows = list(
+                entries.annotate(period=self.BUCKETS[bucket]('date'))
+                .values('period')
+                .annotate(count=Count('id'), **{
+                    f'{metric}_{fn.__name__.lower()}': fn(metric)
+                    for metric in metrics for fn in (Avg, Min, Max)
+                })
+                .order_by('period')
+            )
+            results = [
+                {
+                    'date': row['period'],
+                    'count': row['count'],
+                    **{
+                        metric: {
+                            key: row[f'{metric}_{key}'] for key in ('avg', 'min', 'max')
+                        } if row[f'{metric}_avg'] is not None else None
+                        for metric in metrics
+                    },
+                }
+                for row in rows
+            ]
+            primary = [row[f'{metrics[0]}_avg'] for row in rows]
+        else:
+            rows = list(entries.order_by('date', 'id').values('date', *metrics))
+            results = rows
+            primary = [row[metrics[0]] for row in rows]
+
+        if max_points and len(results) > max_points:
+            points = [(i, results[i]['date'].toordinal(), value) for i, value in enumerate(primary) if value is not None]
+            chosen = lttb([x for _, x, _ in points], [y for _, _, y in points], max_points)
+            results = [results[points[i][0]] for i in chosen]
+
+        return Response({'bucket': bucket, 'metrics': metrics, 'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def weight_trend(request):
+    """
+    Tendência do peso (EWMA e regressão linear) e previsão para ``?target_weight=``.
+    """
+    target_weight = request.query_params.get('target_weight')
+    if target_weight:
+        try:
+            target_weight = float(target_weight)
+            if not isfinite(target_weight) or target_weight <= 0:
+                raise ValueError
+        except ValueError:
+            return Response({'detail': 'target_weight deve ser um número positivo.'}, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        target_weight = None
+
+    return Response(summarize(get_trend(request.user.id), target_weight))
+
+
+@api_view(['POST'])
+@parser_classes([MultiPartParser])
+@permission_classes([IsAuthenticated])
+def import_progress_csv(request):
+    """
+    Importa medições de um CSV (campo ``file``) com upsert por data.
+
+    O arquivo é lido em streaming e gravado em lotes; a resposta traz as
+    contagens de inseridas, atualizadas e rejeitadas, com os erros por linha.
+    """
+    uploaded = request.FILES.get('file')
+    if uploaded is None:
+        return Response({'detail': 'Envie o arquivo CSV no campo file.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        report = import_progress(request.user, uploaded, {'request': request})
+    except ImportFormatError as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cohort_position(request):
+    """
+    Posição do usuário (percentil) entre os usuários com o mesmo objetivo.
+
+    Compara a variação de peso e de gordura corporal a cada 30 dias com os
+    percentis pré-calculados por ``build_progress_cohorts``.
+    """
+    user = request.user
+    if not user.fitness_goal:
+        return Response({'detail': 'Defina um objetivo no perfil para comparar com outros usuários.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    row = annotate_changes(
+        get_user_model().objects.filter(pk=user.pk), timezone.localdate()
+    ).values(*CHANGE_FIELDS).get()
+    cohorts = {
+        cohort.metric: cohort
+        for cohort in CohortPercentiles.objects.filter(fitness_goal=user.fitness_goal)
+    }
+
+    results = {}
+    for metric in METRIC_FIELDS:
+        value = change_per_30_days(row, metric)
+        cohort = cohorts.get(metric)
+        usable = cohort is not None and cohort.sample_size >= MIN_COHORT_SIZE
+        results[metric] = {
+            'value': round(value, 3) if value is not None else None,
+            'percentile': percentile_of(value, cohort.quantiles) if usable and value is not None else None,
+            'median': cohort.quantiles[50] if usable else None,
+            'sample_size': cohort.sample_size if cohort else 0,
+            'computed_at': cohort.computed_at if cohort else None,
+        }
+    return Response({'fitness_goal': user.fitness_goal, 'metrics': results})
@@ -1,7 +1,9 @@
 from django.contrib import admin
-from .models import Workout, WorkoutLog, WorkoutFeedback
+from .models import Exercise, Workout, WorkoutExercise, WorkoutLog, WorkoutFeedback
     
 
 admin.site.register(Workout)
+admin.site.register(Exercise)
+admin.site.register(WorkoutExercise)
 admin.site.register(WorkoutLog)
 admin.site.register(WorkoutFeedback)
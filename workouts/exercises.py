@@ -0,0 +1,129 @@
+import re
+import unicodedata
+
+SEPARADORES = re.compile(r'[,;\n]+')
+SERIES_REPS = re.compile(r'(\d+)\s*(?:x|series?\s+de)\s*(\d+)')
+MAX_NOME = 100
+# Limite de WorkoutExercise.sets/reps (PositiveSmallIntegerField)
+MAX_SERIES_REPS = 32767
+
+
+def normalizar_nome(nome):
+    """
+    Normaliza o nome de um exercício: minúsculas, sem acentos e espaços simples.
+    """
+    sem_acento = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sem_acento.lower().split())[:MAX_NOME]
+
+
+def parse_exercicios(texto):
+    """
+    Separa o texto livre de ``Workout.exercises`` ("Supino, Agachamento") em nomes.
+    """
+    if not texto:
+        return []
+    return [nome.strip()[:MAX_NOME] for nome in SEPARADORES.split(texto) if nome.strip()]
+
+
+def parse_series_reps(texto):
+    """
+    Extrai (séries, repetições) de textos como "3x12" ou "3 séries de 12 repetições".
+
+    Valores que não cabem nas colunas são tratados como texto não reconhecido.
+    """
+    match = SERIES_REPS.search(normalizar_nome(texto or ''))
+    if not match:
+        return None, None
+    sets, reps = int(match.group(1)), int(match.group(2))
+    if max(sets, reps) > MAX_SERIES_REPS:
+        return None, None
+    return sets, reps
+
+
+def sincronizar_exercicios(workout):
+    """
+    Recria as linhas de WorkoutExercise a partir do texto livre do treino.
+    """
+    from .models import Exercise, WorkoutExercise
+
+    nomes = parse_exercicios(workout.exercises)
+    sets, reps = parse_series_reps(workout.series_reps)
+    exercicios = obter_exercicios(Exercise, nomes)
+
+    WorkoutExercise.objects.filter(workout=workout).delete()
+    WorkoutExercise.objects.bulk_create([
+        WorkoutExercise(
+            workout=workout,
+            user_id=workout.user_id,
+            exercise_id=exercicios[normalizar_nome(nome)],
+            position=position,
+            sets=sets,
+            reps=reps,
+            load=workout.carga,
+            created_at=workout.created_at,
+        )
+        for position, nome in enumerate(nomes)
+    ])
+
+
+def sincronizar_em_lote(workouts):
+    """
+    Cria as linhas de WorkoutExercise de treinos recém-criados em massa
+    (bulk_create não dispara o sinal que chama sincronizar_exercicios).
+    """
+    from .models import Exercise, WorkoutExercise
+
+    nomes_por_treino = {workout.pk: parse_exercicios(workout.exercises) for workout in workouts}
+    exercicios = obter_exercicios(Exercise, [nome for nomes in nomes_por_treino.values() for nome in nomes])
+
+    itens = []
+    for workout in workouts:
+        sets, reps = parse_series_reps(workout.series_reps)
+        for position, nome in enumerate(nomes_por_treino[workout.pk]):
+            itens.append(WorkoutExercise(
+                workout=workout,
+                user_id=workout.user_id,
+                exercise_id=exercicios[normalizar_nome(nome)],
+                position=position,
+                sets=sets,
+                reps=reps,
+                load=workout.carga,
+                created_at=workout.created_at,
+            ))
+    WorkoutExercise.objects.bulk_create(itens)
+
+
+def obter_exercicios(exercise_model, nomes):
+    """
+    Garante que os exercícios existam no catálogo e retorna ``{nome_normalizado: id}``.
+    """
+    por_chave = {normalizar_nome(nome): nome for nome in nomes}
+    existentes = dict(
+        exercise_model.objects.filter(normalized_name__in=por_chave).values_list('normalized_name', 'id')
+    )
+    novos = [
+        exercise_model(name=nome, normalized_name=chave)
+        for chave, nome in por_chave.items() if chave not in existentes
+    ]
+    if novos:
+        exercise_model.objects.bulk_create(novos, ignore_conflicts=True)
+        existentes.update(
+            exercise_model.objects.filter(normalized_name__in=[e.normalized_name for e in novos])
+            .values_list('normalized_name', 'id')
+        )
+    return existentes
+
+
+def ultima_carga(user, nome):
+    """
+    Última carga usada pelo usuário no exercício, em uma consulta pelo índice
+    (user, exercise, -created_at). Retorna None se não houver registro.
+    """
+    from .models import WorkoutExercise
+
+    return (
+        WorkoutExercise.objects.filter(user=user, exercise__normalized_name=normalizar_nome(nome))
+        .order_by('-created_at', '-id')
+        .values_list('load', flat=True)
+        .first()
+    )
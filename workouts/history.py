@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from .models import Workout
+
+
+def resumo_historico(user, limite=None, dias=None):
+    """
+    Agregados do histórico de treinos do usuário, calculados no banco.
+
+    A janela é limitada aos últimos ``limite`` treinos e/ou aos últimos ``dias``
+    dias (padrões em WORKOUT_HISTORY_LIMIT / WORKOUT_HISTORY_DAYS), então o custo
+    não cresce com a idade da conta. Retorna ``{"total": n, "carga_media": x}``,
+    o formato aceito por ``ai.trainer.ajustar_treino``.
+    """
+    limite = settings.WORKOUT_HISTORY_LIMIT if limite is None else limite
+    dias = settings.WORKOUT_HISTORY_DAYS if dias is None else dias
+
+    queryset = Workout.objects.filter(user=user)
+    if dias:
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=dias))
+    if limite:
+        # Usa o índice (user, -created_at, -id) para pegar só as N linhas mais recentes
+        recentes = queryset.order_by('-created_at', '-id').values('pk')[:limite]
+        queryset = Workout.objects.filter(pk__in=recentes)
+
+    return queryset.aggregate(total=Count('id'), carga_media=Avg('carga'))
+
+
+def janela_da_requisicao(request):
+    """
+    Lê ``history_limit`` / ``history_days`` do corpo da requisição, limitados aos máximos configurados.
+
+    Valores ausentes ou inválidos retornam None (usa o padrão das configurações).
+    """
+    def _positivo(nome, maximo):
+        try:
+            valor = int(request.data.get(nome))
+        except (TypeError, ValueError):
+            return None
+        return min(valor, maximo) if valor > 0 else None
+
+    return (
+        _positivo('history_limit', settings.WORKOUT_HISTORY_MAX_LIMIT),
+        _positivo('history_days', settings.WORKOUT_HISTORY_MAX_DAYS),
+    )
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from fitness_app.mixins import build_columns, format_rows
+from workouts.models import Workout
+from workouts.serializers import WorkoutSerializer, format_duration
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a vazão da listagem de treinos via WorkoutSerializer com o caminho "
+        "rápido baseado em .values(). Os dados de teste são criados em uma transação desfeita ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, rows, repeat, **options):
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(email='benchmark@example.com', password=None)
+            Workout.objects.bulk_create([
+                Workout(
+                    user=user,
+                    workout_type='musculacao',
+                    intensity='Moderada',
+                    duration=timedelta(minutes=30 + i % 60),
+                    exercises='Supino, Agachamento',
+                    series_reps='3x12',
+                    frequency='3 vezes por semana',
+                    carga=i % 100,
+                )
+                for i in range(rows)
+            ])
+            queryset = Workout.objects.filter(user=user).order_by('-created_at', '-id')
+
+            def serializer_path():
+                return WorkoutSerializer(list(queryset), many=True).data
+
+            def fast_path():
+                columns = build_columns(WorkoutSerializer(), {'duration_display': ('duration', format_duration)})
+                sources = {source for _, source, _ in columns}
+                return format_rows(queryset.values(*sources), columns)
+
+            if [dict(item) for item in serializer_path()] != fast_path():
+                self.stderr.write(self.style.ERROR("As duas saídas diferem!"))
+
+            results = {}
+            for name, func in (('serializer', serializer_path), ('values', fast_path)):
+                best = min(self._time(func) for _ in range(repeat))
+                results[name] = best
+                self.stdout.write(f"{name:>10}: {best * 1000:8.1f} ms  ({rows / best:,.0f} linhas/s)")
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Caminho rápido {results['serializer'] / results['values']:.1f}x mais rápido."
+            ))
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _time(func):
+        start = perf_counter()
+        func()
+        return perf_counter() - start
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from diets.models import Workout as LegacyWorkout
+from fitness_app.versioning import bump_version
+from workouts.exercises import normalizar_nome, sincronizar_em_lote
+from workouts.models import Workout
+
+TYPE_ALIASES = {normalizar_nome(label): value for value, label in Workout.WORKOUT_TYPES}
+INTENSITY_ALIASES = {normalizar_nome(label): value for value, label in Workout.INTENSITY_LEVELS}
+
+
+def _field_limit(name):
+    return Workout._meta.get_field(name).max_length
+
+
+def converter(legacy):
+    """
+    Monta o workouts.Workout equivalente a um diets.Workout, preservando ``created_at``.
+
+    Tipos e intensidades com acento/maiúsculas ("Musculação", "alta") viram os
+    valores canônicos; textos maiores que as colunas do modelo canônico são cortados.
+    """
+    workout_type = normalizar_nome(legacy.workout_type)
+    intensity = normalizar_nome(legacy.intensity)
+    return Workout(
+        user_id=legacy.user_id,
+        workout_type=TYPE_ALIASES.get(workout_type, legacy.workout_type)[:_field_limit('workout_type')],
+        intensity=INTENSITY_ALIASES.get(intensity, legacy.intensity)[:_field_limit('intensity')],
+        duration=legacy.duration,
+        exercises=legacy.exercises,
+        series_reps=legacy.series_reps[:_field_limit('series_reps')],
+        frequency=legacy.frequency[:_field_limit('frequency')],
+        created_at=legacy.created_at,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Move os treinos de diets.Workout para workouts.Workout em lotes curtos. "
+        "Cada lote copia e apaga as linhas antigas na mesma transação, então o "
+        "comando pode rodar com o sistema no ar e ser interrompido/reexecutado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Treinos por transação.')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Pausa (s) entre lotes para aliviar o banco.')
+
+    def handle(self, *args, chunk_size, sleep, **options):
+        total = 0
+        while True:
+            moved = self.move_chunk(chunk_size)
+            if not moved:
+                break
+            total += moved
+            self.stdout.write(f"{total} treinos migrados.")
+            if sleep:
+                time.sleep(sleep)
+
+        self.stdout.write(self.style.SUCCESS(f"Migração concluída: {total} treinos."))
+
+    def move_chunk(self, chunk_size):
+        with transaction.atomic():
+            # skip_locked: linhas presas por outra transação ficam para o próximo lote
+            legacy = list(
+                LegacyWorkout.objects.select_for_update(skip_locked=True).order_by('id')[:chunk_size]
+            )
+            if not legacy:
+                return 0
+
+            workouts = Workout.objects.bulk_create([converter(row) for row in legacy])
+            # bulk_create não dispara post_save: catálogo de exercícios e versão são feitos aqui
+            sincronizar_em_lote(workouts)
+            LegacyWorkout.objects.filter(id__in=[row.id for row in legacy]).delete()
+            for user_id in {row.user_id for row in legacy}:
+                bump_version('workouts', user_id)
+
+        return len(legacy)
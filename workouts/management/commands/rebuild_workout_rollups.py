@@ -0,0 +1,90 @@
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from workouts.models import WorkoutLog
+from workouts.rollups import ROLLUP_FIELDS, TYPE_COLUMNS, accumulate
+
+VALUE_COLUMNS = ['session_count', 'total_minutes', *TYPE_COLUMNS.values()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula do zero os rollups diários/semanais de WorkoutLog, em lotes de usuários. "
+        "Use para backfill e para corrigir divergências."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200, help='Usuários por transação.')
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Restringe a um usuário (repetível).')
+
+    def handle(self, *args, chunk_size, users, **options):
+        user_ids = get_user_model().objects.order_by('id').values_list('id', flat=True)
+        if users:
+            user_ids = user_ids.filter(id__in=users)
+
+        total = 0
+        last_id = 0
+        while True:
+            chunk = list(user_ids.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1]
+            total += self.rebuild_chunk(chunk)
+            self.stdout.write(f"Usuários até id={last_id} processados ({total} linhas de rollup).")
+
+        self.stdout.write(self.style.SUCCESS(f"Rollups recalculados: {total} linhas."))
+
+    def rebuild_chunk(self, user_ids):
+        with transaction.atomic():
+            # Trava os rollups existentes antes de ler os logs: um apply_logs concorrente
+            # ou já terminou (e o log entra na agregação) ou espera este lote e soma o
+            # seu delta por cima dos valores recalculados.
+            existing = {
+                model: {
+                    (row['user_id'], row[field]): row['id']
+                    for row in model.objects.select_for_update()
+                    .filter(user_id__in=user_ids).values('id', 'user_id', field)
+                }
+                for model, field in ROLLUP_FIELDS.items()
+            }
+
+            # Agrupamento por (usuário, dia, tipo) feito no banco; a semana sai dos totais diários.
+            rows = (
+                WorkoutLog.objects.filter(user_id__in=user_ids)
+                .annotate(day=TruncDate('date'))
+                .values('user_id', 'day', 'workout__workout_type')
+                .annotate(sessions=Count('id'), duration=Sum('duration'))
+                .order_by()
+            )
+
+            buckets_by_user = defaultdict(lambda: defaultdict(Counter))
+            for row in rows:
+                accumulate(
+                    buckets_by_user[row['user_id']], row['day'], row['duration'],
+                    row['workout__workout_type'], sessions=row['sessions'],
+                )
+
+            total = 0
+            for model, field in ROLLUP_FIELDS.items():
+                ids = existing[model]
+                to_update, to_create = [], []
+                for user_id, buckets in buckets_by_user.items():
+                    for (bucket_model, key), values in buckets.items():
+                        if bucket_model is not model:
+                            continue
+                        obj = model(id=ids.pop((user_id, key), None), user_id=user_id, **{field: key}, **values)
+                        (to_create if obj.id is None else to_update).append(obj)
+
+                # Atualiza no lugar (em vez de apagar e recriar) para que as escritas
+                # que esperavam o lock encontrem as linhas
+                model.objects.bulk_update(to_update, VALUE_COLUMNS, batch_size=1000)
+                model.objects.bulk_create(to_create, batch_size=1000)
+                model.objects.filter(id__in=ids.values()).delete()
+                total += len(to_update) + len(to_create)
+
+        return total
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 04:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0002_rename_completed_at_workoutlog_date_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', '-created_at'], name='workout_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutlog',
+            index=models.Index(fields=['user', 'date'], name='workoutlog_user_date_idx'),
+        ),
+    ]
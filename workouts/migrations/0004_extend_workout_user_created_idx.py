@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0003_workout_workout_user_created_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='workout',
+            name='workout_user_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='workout_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 04:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_extend_workout_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workoutlog',
+            name='date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
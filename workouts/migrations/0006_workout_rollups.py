@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-18 04:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0005_alter_workoutlog_date_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_count', models.IntegerField(default=0)),
+                ('total_minutes', models.FloatField(default=0)),
+                ('cardio_minutes', models.FloatField(default=0)),
+                ('musculacao_minutes', models.FloatField(default=0)),
+                ('flexibilidade_minutes', models.FloatField(default=0)),
+                ('day', models.DateField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'day'), name='workout_daily_rollup_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkoutWeeklyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_count', models.IntegerField(default=0)),
+                ('total_minutes', models.FloatField(default=0)),
+                ('cardio_minutes', models.FloatField(default=0)),
+                ('musculacao_minutes', models.FloatField(default=0)),
+                ('flexibilidade_minutes', models.FloatField(default=0)),
+                ('week_start', models.DateField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'week_start'), name='workout_weekly_rollup_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 04:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0006_workout_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized_name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WorkoutExercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('sets', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('reps', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('load', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='workout_items', to='workouts.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exercise_items', to='workouts.workout')),
+            ],
+            options={
+                'ordering': ['position'],
+                'indexes': [models.Index(fields=['user', 'exercise', '-created_at'], name='workoutex_user_exercise_idx')],
+            },
+        ),
+    ]
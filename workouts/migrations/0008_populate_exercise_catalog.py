@@ -0,0 +1,104 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+CHUNK_SIZE = 500
+
+# Cópia das regras de workouts.exercises no momento desta migração: mudanças
+# futuras no parser não devem alterar o que esta migração grava.
+SEPARADORES = re.compile(r'[,;\n]+')
+SERIES_REPS = re.compile(r'(\d+)\s*(?:x|series?\s+de)\s*(\d+)')
+MAX_NOME = 100
+# Limite de WorkoutExercise.sets/reps (PositiveSmallIntegerField)
+MAX_SERIES_REPS = 32767
+
+
+def normalizar_nome(nome):
+    sem_acento = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sem_acento.lower().split())[:MAX_NOME]
+
+
+def parse_exercicios(texto):
+    if not texto:
+        return []
+    return [nome.strip()[:MAX_NOME] for nome in SEPARADORES.split(texto) if nome.strip()]
+
+
+def parse_series_reps(texto):
+    match = SERIES_REPS.search(normalizar_nome(texto or ''))
+    if not match:
+        return None, None
+    sets, reps = int(match.group(1)), int(match.group(2))
+    if max(sets, reps) > MAX_SERIES_REPS:
+        return None, None
+    return sets, reps
+
+
+def obter_exercicios(Exercise, nomes):
+    por_chave = {normalizar_nome(nome): nome for nome in nomes}
+    existentes = dict(
+        Exercise.objects.filter(normalized_name__in=por_chave).values_list('normalized_name', 'id')
+    )
+    novos = [
+        Exercise(name=nome, normalized_name=chave)
+        for chave, nome in por_chave.items() if chave not in existentes
+    ]
+    if novos:
+        Exercise.objects.bulk_create(novos, ignore_conflicts=True)
+        existentes.update(
+            Exercise.objects.filter(normalized_name__in=[e.normalized_name for e in novos])
+            .values_list('normalized_name', 'id')
+        )
+    return existentes
+
+
+def popular_catalogo(apps, schema_editor):
+    Workout = apps.get_model('workouts', 'Workout')
+    Exercise = apps.get_model('workouts', 'Exercise')
+    WorkoutExercise = apps.get_model('workouts', 'WorkoutExercise')
+
+    last_id = 0
+    while True:
+        workouts = list(
+            Workout.objects.filter(id__gt=last_id).order_by('id')
+            .values('id', 'user_id', 'exercises', 'series_reps', 'carga', 'created_at')[:CHUNK_SIZE]
+        )
+        if not workouts:
+            break
+        last_id = workouts[-1]['id']
+
+        nomes_por_treino = {w['id']: parse_exercicios(w['exercises']) for w in workouts}
+        exercicios = obter_exercicios(Exercise, [n for nomes in nomes_por_treino.values() for n in nomes])
+
+        itens = []
+        for workout in workouts:
+            sets, reps = parse_series_reps(workout['series_reps'])
+            for position, nome in enumerate(nomes_por_treino[workout['id']]):
+                itens.append(WorkoutExercise(
+                    workout_id=workout['id'],
+                    user_id=workout['user_id'],
+                    exercise_id=exercicios[normalizar_nome(nome)],
+                    position=position,
+                    sets=sets,
+                    reps=reps,
+                    load=workout['carga'] or 0,
+                    created_at=workout['created_at'],
+                ))
+        WorkoutExercise.objects.bulk_create(itens)
+
+
+def limpar_catalogo(apps, schema_editor):
+    apps.get_model('workouts', 'WorkoutExercise').objects.all().delete()
+    apps.get_model('workouts', 'Exercise').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_exercise_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_catalogo, limpar_catalogo),
+    ]
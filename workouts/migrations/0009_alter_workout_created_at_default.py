@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 04:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_populate_exercise_catalog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workout',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 04:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_alter_workout_created_at_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutRatingAggregate',
+            fields=[
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.BigIntegerField(default=0)),
+                ('total_sq', models.BigIntegerField(default=0)),
+                ('workout', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='workouts.workout')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkoutTypeRatingAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.BigIntegerField(default=0)),
+                ('total_sq', models.BigIntegerField(default=0)),
+                ('workout_type', models.CharField(choices=[('cardio', 'Cardio'), ('musculacao', 'Musculação'), ('flexibilidade', 'Flexibilidade')], max_length=30)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'workout_type'), name='workout_type_rating_unique')],
+            },
+        ),
+    ]
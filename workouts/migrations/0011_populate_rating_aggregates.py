@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, F, Sum
+
+
+def popular_agregados(apps, schema_editor):
+    WorkoutFeedback = apps.get_model('workouts', 'WorkoutFeedback')
+    WorkoutRatingAggregate = apps.get_model('workouts', 'WorkoutRatingAggregate')
+    WorkoutTypeRatingAggregate = apps.get_model('workouts', 'WorkoutTypeRatingAggregate')
+    totais = dict(count=Count('id'), total=Sum('rating'), total_sq=Sum(F('rating') * F('rating')))
+
+    # Agrupamento feito no banco; uma linha por treino e por (usuário, tipo de treino)
+    por_treino = WorkoutFeedback.objects.values('workout_id').annotate(**totais).order_by()
+    WorkoutRatingAggregate.objects.bulk_create(
+        [WorkoutRatingAggregate(**row) for row in por_treino.iterator()], batch_size=1000
+    )
+    por_tipo = (
+        WorkoutFeedback.objects.values('workout__user_id', 'workout__workout_type')
+        .annotate(**totais).order_by()
+    )
+    WorkoutTypeRatingAggregate.objects.bulk_create([
+        WorkoutTypeRatingAggregate(
+            user_id=row.pop('workout__user_id'), workout_type=row.pop('workout__workout_type'), **row
+        )
+        for row in por_tipo.iterator()
+    ], batch_size=1000)
+
+
+def limpar_agregados(apps, schema_editor):
+    apps.get_model('workouts', 'WorkoutRatingAggregate').objects.all().delete()
+    apps.get_model('workouts', 'WorkoutTypeRatingAggregate').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_agregados, limpar_agregados),
+    ]
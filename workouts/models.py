@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from fitness_app.ratings import RatingAggregate
 
 class Workout(models.Model):
     WORKOUT_TYPES = [
@@ -22,16 +24,98 @@ class Workout(models.Model):
     series_reps = models.CharField(max_length=100, blank=True)
     frequency = models.CharField(max_length=100)
     carga = models.PositiveIntegerField(default=0)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Não editável pela API; a migração de diets.Workout preserva a data original
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Listagem do usuário ordenada pelos treinos mais recentes
+            models.Index(fields=['user', '-created_at', '-id'], name='workout_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.workout_type} ({self.user.email})"
 
+class Exercise(models.Model):
+    name = models.CharField(max_length=100)
+    # Nome sem acentos/maiúsculas, usado nas buscas (ver exercises.normalizar_nome)
+    normalized_name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class WorkoutExercise(models.Model):
+    """
+    Exercício de um treino com séries, repetições e carga.
+
+    ``user`` e ``created_at`` são copiados do treino para que consultas como
+    "última carga do exercício X" usem um único índice, sem join com Workout.
+    """
+    workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name='exercise_items')
+    exercise = models.ForeignKey(Exercise, on_delete=models.PROTECT, related_name='workout_items')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    position = models.PositiveSmallIntegerField(default=0)
+    sets = models.PositiveSmallIntegerField(null=True, blank=True)
+    reps = models.PositiveSmallIntegerField(null=True, blank=True)
+    load = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['position']
+        indexes = [
+            models.Index(fields=['user', 'exercise', '-created_at'], name='workoutex_user_exercise_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.exercise} ({self.sets}x{self.reps}, {self.load} kg)"
+
+
 class WorkoutLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     workout = models.ForeignKey(Workout, on_delete=models.CASCADE)
     duration = models.DurationField()
-    date = models.DateTimeField(auto_now_add=True)
+    # Padrão é o momento do registro; a ingestão em lote informa a data real da sessão
+    date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='workoutlog_user_date_idx'),
+        ]
+
+class WorkoutRollup(models.Model):
+    """
+    Totais agregados de WorkoutLog, mantidos incrementalmente (ver rollups.py).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    session_count = models.IntegerField(default=0)
+    total_minutes = models.FloatField(default=0)
+    cardio_minutes = models.FloatField(default=0)
+    musculacao_minutes = models.FloatField(default=0)
+    flexibilidade_minutes = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class WorkoutDailyRollup(WorkoutRollup):
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='workout_daily_rollup_unique'),
+        ]
+
+
+class WorkoutWeeklyRollup(WorkoutRollup):
+    # Segunda-feira da semana
+    week_start = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'week_start'], name='workout_weekly_rollup_unique'),
+        ]
+
 
 class WorkoutFeedback(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -39,3 +123,20 @@ class WorkoutFeedback(models.Model):
     rating = models.IntegerField()
     feedback_text = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+
+class WorkoutRatingAggregate(RatingAggregate):
+    workout = models.OneToOneField(Workout, on_delete=models.CASCADE, primary_key=True, related_name='rating')
+
+
+class WorkoutTypeRatingAggregate(RatingAggregate):
+    """
+    Avaliações do usuário por tipo de treino (usado por generate_workout).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    workout_type = models.CharField(max_length=30, choices=Workout.WORKOUT_TYPES)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'workout_type'], name='workout_type_rating_unique'),
+        ]
@@ -0,0 +1,49 @@
+from fitness_app.ratings import apply_ratings
+
+from .models import Workout, WorkoutRatingAggregate, WorkoutTypeRatingAggregate
+
+
+def record_workout_feedbacks(feedbacks, sign=1):
+    """
+    Atualiza os agregados por treino e por (usuário, tipo de treino) com ``feedbacks``.
+
+    Deve rodar na mesma transação que grava (ou apaga) os WorkoutFeedback.
+    """
+    feedbacks = list(feedbacks)
+    workouts = {
+        feedback.workout_id: feedback.workout
+        for feedback in feedbacks if feedback._meta.get_field('workout').is_cached(feedback)
+    }
+    missing = {feedback.workout_id for feedback in feedbacks} - set(workouts)
+    if missing:
+        workouts.update(Workout.objects.only('id', 'user_id', 'workout_type').in_bulk(missing))
+
+    apply_ratings(WorkoutRatingAggregate, [
+        ((('workout_id', feedback.workout_id),), feedback.rating) for feedback in feedbacks
+    ], sign)
+    apply_ratings(WorkoutTypeRatingAggregate, [
+        (
+            (('user_id', workouts[feedback.workout_id].user_id),
+             ('workout_type', workouts[feedback.workout_id].workout_type)),
+            feedback.rating,
+        )
+        for feedback in feedbacks if feedback.workout_id in workouts
+    ], sign)
+
+
+INTENSITY_ORDER = [value for value, _ in Workout.INTENSITY_LEVELS]
+
+
+def ajustar_intensidade(intensity, aggregate):
+    """
+    Sobe um nível de intensidade se o usuário avalia bem esse tipo de treino
+    (média suavizada >= 4) e desce um nível se avalia mal (<= 2).
+    """
+    if aggregate is None or intensity not in INTENSITY_ORDER:
+        return intensity
+    level = INTENSITY_ORDER.index(intensity)
+    if aggregate.smoothed_mean >= 4:
+        level = min(level + 1, len(INTENSITY_ORDER) - 1)
+    elif aggregate.smoothed_mean <= 2:
+        level = max(level - 1, 0)
+    return INTENSITY_ORDER[level]
@@ -0,0 +1,73 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Workout, WorkoutDailyRollup, WorkoutWeeklyRollup
+
+TYPE_COLUMNS = {
+    'cardio': 'cardio_minutes',
+    'musculacao': 'musculacao_minutes',
+    'flexibilidade': 'flexibilidade_minutes',
+}
+
+ROLLUPS = (
+    (WorkoutDailyRollup, 'day'),
+    (WorkoutWeeklyRollup, 'week_start'),
+)
+ROLLUP_FIELDS = dict(ROLLUPS)
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def accumulate(buckets, day, duration, workout_type, sign=1, sessions=1):
+    """
+    Soma uma (ou várias) sessões nos buckets diário e semanal.
+
+    ``buckets`` é um dict ``{(modelo, chave): Counter}`` com os deltas de cada coluna.
+    """
+    minutes = duration.total_seconds() / 60
+    for model, field in ROLLUPS:
+        key = day if field == 'day' else week_start(day)
+        bucket = buckets[(model, key)]
+        bucket['session_count'] += sign * sessions
+        bucket['total_minutes'] += sign * minutes
+        column = TYPE_COLUMNS.get(workout_type)
+        if column:
+            bucket[column] += sign * minutes
+
+
+def apply_logs(user_id, entries, sign=1):
+    """
+    Aplica inserções (sign=1) ou remoções (sign=-1) de logs nos rollups do usuário.
+
+    ``entries`` é um iterável de ``(date, duration, workout_type)``. Cada bucket
+    afetado recebe um único UPDATE com expressões F(), então escritas
+    concorrentes não perdem incrementos. Deve rodar na mesma transação
+    da escrita do WorkoutLog.
+    """
+    buckets = defaultdict(Counter)
+    for date, duration, workout_type in entries:
+        accumulate(buckets, timezone.localdate(date), duration, workout_type, sign)
+
+    with transaction.atomic():
+        for (model, key), deltas in buckets.items():
+            lookup = {'user_id': user_id, ROLLUP_FIELDS[model]: key}
+            if sign > 0:
+                model.objects.get_or_create(**lookup)
+            # Na remoção não cria linhas: o usuário pode estar sendo excluído em cascata.
+            model.objects.filter(**lookup).update(
+                **{column: F(column) + value for column, value in deltas.items()}
+            )
+
+
+def record_log(log, sign=1):
+    if log._meta.get_field('workout').is_cached(log):
+        workout_type = log.workout.workout_type
+    else:
+        workout_type = Workout.objects.filter(pk=log.workout_id).values_list('workout_type', flat=True).first()
+    apply_logs(log.user_id, [(log.date, log.duration, workout_type)], sign)
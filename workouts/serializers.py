@@ -1,8 +1,25 @@
 from rest_framework import serializers
+from fitness_app.serializers import SparseFieldsetMixin
 from .models import Workout
 from datetime import timedelta
 
-class WorkoutSerializer(serializers.ModelSerializer):
+
+def format_duration(duration):
+    """
+    Converte timedelta em formato legível como '1h 30min' ou '45 min'.
+    """
+    if isinstance(duration, timedelta):
+        total_seconds = int(duration.total_seconds())
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, _ = divmod(remainder, 60)
+
+        if hours > 0:
+            return f"{hours}h {minutes}min"
+        return f"{minutes} min"
+    return None
+
+
+class WorkoutSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     duration_display = serializers.SerializerMethodField()
 
     class Meta:
@@ -22,15 +39,4 @@ class WorkoutSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'duration_display']
 
     def get_duration_display(self, obj):
-        """
-        Converte timedelta em formato legível como '1h 30min' ou '45 min'.
-        """
-        if isinstance(obj.duration, timedelta):
-            total_seconds = int(obj.duration.total_seconds())
-            hours, remainder = divmod(total_seconds, 3600)
-            minutes, _ = divmod(remainder, 60)
-
-            if hours > 0:
-                return f"{hours}h {minutes}min"
-            return f"{minutes} min"
-        return None
+        return format_duration(obj.duration)
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from fitness_app.versioning import connect_version_signals
+from .exercises import sincronizar_exercicios
+from .models import Workout, WorkoutFeedback, WorkoutLog
+from .ratings import record_workout_feedbacks
+from .rollups import record_log
+
+EXERCISE_SOURCE_FIELDS = {'exercises', 'series_reps', 'carga'}
+
+connect_version_signals(Workout, 'workouts')
+
+
+@receiver(post_save, sender=WorkoutLog)
+def rollup_log_created(sender, instance, created, raw=False, **kwargs):
+    # Edições de log não alteram os rollups; use rebuild_workout_rollups para corrigir.
+    if created and not raw:
+        record_log(instance, 1)
+
+
+@receiver(post_delete, sender=WorkoutLog)
+def rollup_log_deleted(sender, instance, **kwargs):
+    record_log(instance, -1)
+
+
+@receiver(post_save, sender=Workout)
+def sync_workout_exercises(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Mantém o catálogo estruturado em sincronia com o campo texto Workout.exercises
+    if raw:
+        return
+    if created or update_fields is None or EXERCISE_SOURCE_FIELDS & set(update_fields):
+        sincronizar_exercicios(instance)
+
+
+@receiver(post_save, sender=WorkoutFeedback)
+def rating_feedback_created(sender, instance, created, raw=False, **kwargs):
+    # apply_workout_feedbacks usa bulk_create e atualiza os agregados explicitamente.
+    if created and not raw:
+        record_workout_feedbacks([instance], 1)
+
+
+@receiver(post_delete, sender=WorkoutFeedback)
+def rating_feedback_deleted(sender, instance, **kwargs):
+    record_workout_feedbacks([instance], -1)
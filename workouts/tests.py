@@ -1,7 +1,23 @@
-from django.test import TestCase
+from threading import Barrier, Thread
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
-from workouts.models import Workout
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from diets.models import Workout as LegacyWorkout
+from fitness_app.query_plans import uses_index
+from workouts.exercises import parse_exercicios, parse_series_reps, ultima_carga
+from workouts.history import resumo_historico
+from workouts.models import (
+    Workout, WorkoutFeedback, WorkoutLog, WorkoutDailyRollup, WorkoutTypeRatingAggregate, WorkoutWeeklyRollup,
+)
+from workouts.serializers import WorkoutSerializer
+from workouts.views import WorkoutViewSet, apply_workout_feedbacks
 from datetime import timedelta
+from io import StringIO
 
 User = get_user_model()
 
@@ -29,3 +45,405 @@ class WorkoutModelTest(TestCase):
             carga=40
         )
         self.assertEqual(str(workout), f"musculacao ({self.user.email})")
+
+
+class WorkoutQueryPlanTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="planuser@example.com", password="strongpassword")
+
+    def test_workout_list_uses_user_created_index(self):
+        request = Request(APIRequestFactory().get('/workouts/'))
+        request.user = self.user
+        queryset = WorkoutViewSet(request=request).get_queryset()
+        self.assertTrue(uses_index(queryset, 'workout_user_created_idx'))
+
+    def test_workout_log_uses_user_date_index(self):
+        queryset = WorkoutLog.objects.filter(user=self.user).order_by('-date')
+        self.assertTrue(uses_index(queryset, 'workoutlog_user_date_idx'))
+
+
+class WorkoutLogBatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="batchuser@example.com", password="strongpassword")
+        self.other = User.objects.create_user(email="other@example.com", password="strongpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = '/workouts/log/batch/'
+        workout_data = dict(
+            workout_type='cardio', intensity='Alta', duration=timedelta(minutes=45),
+            exercises="Corrida", frequency="5 vezes por semana",
+        )
+        self.workout = Workout.objects.create(user=self.user, **workout_data)
+        self.foreign_workout = Workout.objects.create(user=self.other, **workout_data)
+
+    def test_batch_creates_all_sessions(self):
+        sessions = [
+            {'workout_id': self.workout.id, 'duration': 30, 'date': '2025-04-01T07:00:00-03:00'},
+            {'workout_id': self.workout.id, 'duration': 45, 'date': '2025-04-02T07:00:00-03:00'},
+        ]
+        response = self.client.post(self.url, sessions, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(WorkoutLog.objects.filter(user=self.user).count(), 2)
+        log = WorkoutLog.objects.get(id=response.data['results'][0]['id'])
+        self.assertEqual(log.date.isoformat(), '2025-04-01T10:00:00+00:00')
+
+    def test_atomic_batch_saves_nothing_on_error(self):
+        sessions = [
+            {'workout_id': self.workout.id, 'duration': 30},
+            {'workout_id': self.foreign_workout.id, 'duration': 30},
+        ]
+        response = self.client.post(self.url, sessions, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r['status'] for r in response.data['results']], ['not_saved', 'rejected'])
+        self.assertFalse(WorkoutLog.objects.exists())
+
+    def test_partial_batch_saves_valid_items(self):
+        payload = {'partial': True, 'sessions': [
+            {'workout_id': self.workout.id, 'duration': 30},
+            {'workout_id': self.workout.id, 'duration': -5},
+            {'workout_id': self.foreign_workout.id, 'duration': 30},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['rejected'], 2)
+        self.assertIn('duration', response.data['results'][1]['errors'])
+        self.assertIn('workout_id', response.data['results'][2]['errors'])
+        self.assertEqual(WorkoutLog.objects.count(), 1)
+
+    def test_non_object_and_oversized_items_are_rejected_per_item(self):
+        payload = {'partial': True, 'sessions': [
+            1,
+            {'workout_id': self.workout.id, 'duration': 30},
+            {'workout_id': self.workout.id, 'duration': 1e20},
+            {'workout_id': self.workout.id, 'duration': 30, 'date': '2025-02-30T10:00:00'},
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([r['status'] for r in response.data['results']], ['rejected', 'created', 'rejected', 'rejected'])
+        self.assertIn('non_field_errors', response.data['results'][0]['errors'])
+        self.assertIn('duration', response.data['results'][2]['errors'])
+        self.assertEqual(list(response.data['results'][3]['errors']), ['date'])
+
+        response = self.client.post(self.url, [1, {'workout_id': self.workout.id, 'duration': 30}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r['status'] for r in response.data['results']], ['rejected', 'not_saved'])
+
+
+class WorkoutRollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="rollupuser@example.com", password="strongpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.cardio = Workout.objects.create(
+            user=self.user, workout_type='cardio', intensity='Alta', duration=timedelta(minutes=45),
+            exercises="Corrida", frequency="5 vezes por semana",
+        )
+        self.strength = Workout.objects.create(
+            user=self.user, workout_type='musculacao', intensity='Moderada', duration=timedelta(hours=1),
+            exercises="Supino", frequency="3 vezes por semana",
+        )
+        # Quarta e quinta da mesma semana
+        self.client.post('/workouts/log/batch/', [
+            {'workout_id': self.cardio.id, 'duration': 30, 'date': '2025-04-02T07:00:00-03:00'},
+            {'workout_id': self.strength.id, 'duration': 60, 'date': '2025-04-02T19:00:00-03:00'},
+            {'workout_id': self.cardio.id, 'duration': 20, 'date': '2025-04-03T07:00:00-03:00'},
+        ], format='json')
+
+    def snapshot(self):
+        fields = ('session_count', 'total_minutes', 'cardio_minutes', 'musculacao_minutes')
+        daily = list(WorkoutDailyRollup.objects.order_by('day').values_list('day', *fields))
+        weekly = list(WorkoutWeeklyRollup.objects.order_by('week_start').values_list('week_start', *fields))
+        return daily, weekly
+
+    def test_rollups_follow_inserts_and_deletes(self):
+        week = WorkoutWeeklyRollup.objects.get(user=self.user)
+        self.assertEqual(str(week.week_start), '2025-03-31')
+        self.assertEqual(week.session_count, 3)
+        self.assertEqual(week.cardio_minutes, 50)
+        self.assertEqual(week.musculacao_minutes, 60)
+
+        WorkoutLog.objects.filter(workout=self.strength).get().delete()
+        day = WorkoutDailyRollup.objects.get(user=self.user, day='2025-04-02')
+        self.assertEqual((day.session_count, day.total_minutes), (1, 30))
+
+    def test_stats_endpoint(self):
+        response = self.client.get('/workouts/stats/', {'start_date': '2025-04-01', 'end_date': '2025-04-30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['session_count'], 3)
+        self.assertEqual(response.data['total_minutes'], 110)
+        self.assertEqual(response.data['results'][0]['minutes_by_type']['musculacao'], 60)
+
+        weekly = self.client.get('/workouts/stats/', {'period': 'weekly', 'start_date': '2025-04-01', 'end_date': '2025-04-30'})
+        self.assertEqual(len(weekly.data['results']), 1)
+
+    def test_rebuild_command_matches_incremental_rollups(self):
+        expected = self.snapshot()
+        WorkoutDailyRollup.objects.update(session_count=99)
+        call_command('rebuild_workout_rollups', chunk_size=1, stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_rebuild_recreates_missing_and_drops_stale_rows(self):
+        expected = self.snapshot()
+        WorkoutDailyRollup.objects.filter(day='2025-04-02').delete()
+        WorkoutDailyRollup.objects.create(user=self.user, day='2024-01-01', session_count=5)
+        call_command('rebuild_workout_rollups', chunk_size=1, stdout=StringIO())
+        self.assertEqual(self.snapshot(), expected)
+
+
+class WorkoutHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="historyuser@example.com", password="strongpassword")
+        for carga in (10, 20, 30, 40):
+            Workout.objects.create(
+                user=self.user, workout_type='musculacao', intensity='Moderada', duration=timedelta(hours=1),
+                exercises="Supino", frequency="3 vezes por semana", carga=carga,
+            )
+
+    def test_window_limits_to_most_recent_workouts(self):
+        self.assertEqual(resumo_historico(self.user, limite=2), {'total': 2, 'carga_media': 35})
+        self.assertEqual(resumo_historico(self.user, limite=0, dias=0), {'total': 4, 'carga_media': 25})
+
+    def test_generate_workout_uses_windowed_history(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post('/workouts/generate/', {'fitness_goal': 'ganho muscular', 'history_limit': 2})
+        self.assertEqual(response.status_code, 201)
+        # Janela = treino recém-criado (carga 15) + o mais recente anterior (carga 40)
+        self.assertEqual(response.data['carga'], int((15 + 40) / 2 * 1.1))
+
+
+def create_strength_workout(user, carga=20):
+    return Workout.objects.create(
+        user=user, workout_type='musculacao', intensity='Moderada', duration=timedelta(minutes=60),
+        exercises="Supino", frequency="3 vezes por semana", carga=carga,
+    )
+
+
+class WorkoutFeedbackBatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="feedbackuser@example.com", password="strongpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.workout = create_strength_workout(self.user)
+
+    def test_batch_applies_every_rating_in_order(self):
+        feedbacks = [
+            {'workout_id': self.workout.id, 'rating': 5},
+            {'workout_id': self.workout.id, 'rating': 5, 'feedback_text': 'Ótimo'},
+            {'workout_id': self.workout.id, 'rating': 1},
+        ]
+        response = self.client.post('/workouts/feedback/batch/', feedbacks, format='json')
+        self.assertEqual(response.status_code, 201)
+        state = response.data['workouts'][0]
+        # +5, +5, -5 na carga; +15, +15, -10 minutos
+        self.assertEqual(state['carga'], 25)
+        self.assertEqual(state['intensity'], 'Baixa')
+        self.assertEqual(state['duration'], '01:20:00')
+        self.assertEqual(WorkoutFeedback.objects.filter(workout=self.workout).count(), 3)
+
+    def test_cardio_adjustments_and_lower_bounds(self):
+        cardio = Workout.objects.create(
+            user=self.user, workout_type='cardio', intensity='Alta', duration=timedelta(minutes=35),
+            exercises="Corrida", frequency="5 vezes por semana", carga=7,
+        )
+        apply_workout_feedbacks(self.user, [(cardio.id, 5, ''), (cardio.id, 1, ''), (cardio.id, 1, ''), (cardio.id, 3, '')])
+        cardio.refresh_from_db()
+        # +10 min sem mudar a carga; depois os pisos de 30 min e 5 kg
+        self.assertEqual((cardio.intensity, cardio.duration, cardio.carga), ('Baixa', timedelta(minutes=30), 5))
+        self.assertEqual(WorkoutFeedback.objects.filter(workout=cardio).count(), 4)
+
+    def test_batch_with_invalid_item_saves_nothing(self):
+        feedbacks = [
+            {'workout_id': self.workout.id, 'rating': 5},
+            {'workout_id': self.workout.id, 'rating': 9},
+        ]
+        response = self.client.post('/workouts/feedback/batch/', feedbacks, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['results'][0]['index'], 1)
+        self.workout.refresh_from_db()
+        self.assertEqual(self.workout.carga, 20)
+        self.assertFalse(WorkoutFeedback.objects.exists())
+
+    def test_non_object_item_is_reported_per_item(self):
+        response = self.client.post(
+            '/workouts/feedback/batch/', [1, {'workout_id': self.workout.id, 'rating': 5}], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['results'][0]['index'], 0)
+        self.assertIn('non_field_errors', response.data['results'][0]['errors'])
+        self.assertFalse(WorkoutFeedback.objects.exists())
+
+    def test_workout_deleted_before_lock_is_skipped(self):
+        deleted = create_strength_workout(self.user)
+        deleted_id = deleted.id
+        deleted.delete()
+        workouts = apply_workout_feedbacks(self.user, [(deleted_id, 5, ''), (self.workout.id, 5, '')])
+        self.assertEqual(list(workouts), [self.workout.id])
+        self.assertEqual(WorkoutFeedback.objects.get().workout_id, self.workout.id)
+        self.assertEqual(apply_workout_feedbacks(self.user, [(deleted_id, 5, '')]), {})
+
+
+class WorkoutFeedbackConcurrencyTest(TransactionTestCase):
+    def test_parallel_feedbacks_do_not_lose_updates(self):
+        user = User.objects.create_user(email="concurrent@example.com", password="strongpassword")
+        workout = create_strength_workout(user)
+        writers = 8
+        barrier = Barrier(writers)
+
+        def send_feedback():
+            try:
+                barrier.wait()
+                apply_workout_feedbacks(user, [(workout.id, 5, '')])
+            finally:
+                connection.close()
+
+        threads = [Thread(target=send_feedback) for _ in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        workout.refresh_from_db()
+        self.assertEqual(workout.carga, 20 + 5 * writers)
+        self.assertEqual(workout.duration, timedelta(minutes=60 + 15 * writers))
+
+
+class ExerciseCatalogTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="exerciseuser@example.com", password="strongpassword")
+
+    def create_workout(self, exercises, carga):
+        return Workout.objects.create(
+            user=self.user, workout_type='musculacao', intensity='Moderada', duration=timedelta(minutes=60),
+            exercises=exercises, series_reps="3 séries de 12 repetições", frequency="3 vezes por semana", carga=carga,
+        )
+
+    def test_parse_free_text(self):
+        self.assertEqual(parse_exercicios("Supino, Agachamento;  Rosca direta\n"), ["Supino", "Agachamento", "Rosca direta"])
+        self.assertEqual(parse_series_reps("3x12"), (3, 12))
+        self.assertEqual(parse_series_reps("4 séries de 10 repetições"), (4, 10))
+        self.assertEqual(parse_series_reps(""), (None, None))
+        self.assertEqual(parse_series_reps("1x99999"), (None, None))
+
+    def test_out_of_range_series_reps_do_not_break_save(self):
+        workout = Workout.objects.create(
+            user=self.user, workout_type='musculacao', intensity='Moderada', duration=timedelta(minutes=60),
+            exercises="Supino", series_reps="1x99999", frequency="3 vezes por semana", carga=10,
+        )
+        item = workout.exercise_items.get()
+        self.assertEqual((item.sets, item.reps), (None, None))
+
+    def test_workout_save_builds_structured_exercises(self):
+        workout = self.create_workout("Supino, Rosca Direta", 12)
+        items = list(workout.exercise_items.select_related('exercise'))
+        self.assertEqual([item.exercise.normalized_name for item in items], ["supino", "rosca direta"])
+        self.assertEqual((items[0].sets, items[0].reps, items[0].load), (3, 12, 12))
+
+        workout.exercises = "Supino"
+        workout.save()
+        self.assertEqual(workout.exercise_items.count(), 1)
+
+    def test_last_load_for_exercise(self):
+        self.create_workout("Rosca direta", 10)
+        self.create_workout("Rosca Direta, Supino", 14)
+        self.create_workout("Agachamento", 60)
+        self.assertEqual(ultima_carga(self.user, "rosca direta"), 14)
+        self.assertIsNone(ultima_carga(self.user, "leg press"))
+
+
+class WorkoutListSerializationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="listuser@example.com", password="strongpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        create_strength_workout(self.user)
+        Workout.objects.create(
+            user=self.user, workout_type='cardio', intensity='Alta', duration=timedelta(minutes=95),
+            exercises="Corrida", frequency="5 vezes por semana",
+        )
+
+    def test_fast_list_matches_serializer_output(self):
+        response = self.client.get('/workouts/')
+        workouts = Workout.objects.filter(user=self.user).order_by('-created_at', '-id')
+        self.assertEqual(response.data['results'], WorkoutSerializer(workouts, many=True).data)
+        self.assertEqual(response.data['results'][0]['duration_display'], '1h 35min')
+
+    def test_sparse_fieldset(self):
+        response = self.client.get('/workouts/', {'fields': 'id,carga,unknown'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'carga'})
+
+        detail = self.client.get(f"/workouts/{response.data['results'][0]['id']}/", {'fields': 'intensity'})
+        self.assertEqual(detail.data, {'intensity': 'Alta'})
+
+
+class LegacyDietWorkoutMigrationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="legacy@example.com", password="strongpassword", fitness_goal='Ganho Muscular')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_command_moves_rows_in_chunks_preserving_dates(self):
+        created_at = timezone.now() - timedelta(days=40)
+        for _ in range(3):
+            LegacyWorkout.objects.create(
+                user=self.user, workout_type='Musculação', intensity='alta', duration=timedelta(minutes=50),
+                exercises='Supino, Remada', series_reps='4x10', frequency='3 vezes por semana',
+            )
+        LegacyWorkout.objects.update(created_at=created_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('migrate_diet_workouts', chunk_size=2, stdout=StringIO())
+
+        self.assertFalse(LegacyWorkout.objects.exists())
+        workouts = Workout.objects.filter(user=self.user)
+        self.assertEqual(workouts.count(), 3)
+        workout = workouts.first()
+        self.assertEqual((workout.workout_type, workout.intensity), ('musculacao', 'Alta'))
+        self.assertEqual(workout.created_at, created_at)
+        self.assertEqual(list(workout.exercise_items.values_list('sets', 'reps')), [(4, 10), (4, 10)])
+
+    def test_legacy_endpoints_write_canonical_workouts(self):
+        response = self.client.post('/diets/generate-workout/', {})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['workout_type'], 'musculacao')
+
+        response = self.client.post('/diets/log-workout/', {
+            'workout_type': 'cardio', 'intensity': 'Alta', 'duration': '00:30:00',
+            'exercises': 'Corrida', 'frequency': '2 vezes por semana',
+        })
+        self.assertEqual(response.status_code, 201)
+
+        listing = self.client.get('/diets/workouts/')
+        self.assertEqual(len(listing.data['results']), 2)
+        self.assertFalse(LegacyWorkout.objects.exists())
+
+
+class WorkoutRatingAggregateTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="wratings@example.com", password="strongpassword")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.workout = create_strength_workout(self.user)
+
+    def test_batch_feedback_updates_aggregates(self):
+        self.client.post('/workouts/feedback/batch/', [
+            {'workout_id': self.workout.id, 'rating': 5},
+            {'workout_id': self.workout.id, 'rating': 4},
+        ], format='json')
+
+        response = self.client.get('/workouts/ratings/', {'workout_id': str(self.workout.id)})
+        self.assertEqual(response.data['workout_types'], [
+            {'workout_type': 'musculacao', 'count': 2, 'mean': 4.5, 'stddev': 0.5},
+        ])
+        self.assertEqual(response.data['workouts'][0]['workout_id'], self.workout.id)
+
+    def test_well_rated_type_raises_generated_intensity(self):
+        WorkoutTypeRatingAggregate.objects.create(user=self.user, workout_type='musculacao', count=10, total=50, total_sq=250)
+        response = self.client.post('/workouts/generate/', {'fitness_goal': 'ganho muscular'})
+        self.assertEqual(response.data['intensity'], 'Alta')
+
+        WorkoutTypeRatingAggregate.objects.filter(user=self.user).update(total=10, total_sq=10)
+        response = self.client.post('/workouts/generate/', {'fitness_goal': 'ganho muscular'})
+        self.assertEqual(response.data['intensity'], 'Baixa')
@@ -1,6 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import generate_workout, log_workout, provide_feedback, WorkoutViewSet
+from .views import (
+    generate_workout,
+    log_workout,
+    log_workout_batch,
+    provide_feedback,
+    provide_feedback_batch,
+    workout_ratings,
+    workout_stats,
+    WorkoutViewSet,
+)
 
 router = DefaultRouter()
 router.register(r'', WorkoutViewSet, basename='workout')
@@ -11,9 +20,17 @@ urlpatterns = [
 
     # Registro de treino realizado (log)
     path('log/', log_workout, name='log_workout'),                 # POST /workouts/log/
+    path('log/batch/', log_workout_batch, name='log_workout_batch'),  # POST /workouts/log/batch/
 
     # Envio de feedback (treino ou dieta)
     path('feedback/', provide_feedback, name='workout_feedback'), # POST /workouts/feedback/
+    path('feedback/batch/', provide_feedback_batch, name='workout_feedback_batch'),  # POST /workouts/feedback/batch/
+
+    # Resumo diário/semanal dos treinos realizados
+    path('stats/', workout_stats, name='workout_stats'),          # GET /workouts/stats/
+
+    # Médias das avaliações por tipo de treino e por treino
+    path('ratings/', workout_ratings, name='workout_ratings'),    # GET /workouts/ratings/
 
     # CRUD de treinos (viewset)
     path('', include(router.urls)),                                # GET, POST, PUT, DELETE /workouts/
@@ -1,19 +1,43 @@
 from datetime import timedelta
+from operator import itemgetter
 
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import status, viewsets
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Workout, WorkoutLog, WorkoutFeedback
-from .serializers import WorkoutSerializer
+from .models import (
+    Workout,
+    WorkoutDailyRollup,
+    WorkoutExercise,
+    WorkoutFeedback,
+    WorkoutLog,
+    WorkoutRatingAggregate,
+    WorkoutTypeRatingAggregate,
+    WorkoutWeeklyRollup,
+)
+from .history import janela_da_requisicao, resumo_historico
+from .ratings import ajustar_intensidade, record_workout_feedbacks
+from .rollups import TYPE_COLUMNS, apply_logs, week_start
+from .serializers import WorkoutSerializer, format_duration
 from ai.trainer import ajustar_treino
+from fitness_app.mixins import ValuesListMixin
+from fitness_app.ratings import MAX_RATING_IDS, parse_ids
+from fitness_app.versioning import ConditionalGetMixin, bump_version
 from diets.models import Diet, DietFeedback
 
 
-class WorkoutViewSet(viewsets.ModelViewSet):
+class WorkoutViewSet(ConditionalGetMixin, ValuesListMixin, viewsets.ModelViewSet):
     serializer_class = WorkoutSerializer
     permission_classes = [IsAuthenticated]
+    version_resource = 'workouts'
+    ordering = ('-created_at', '-id')
+    computed_list_fields = {'duration_display': ('duration', format_duration)}
 
     def get_queryset(self):
         return Workout.objects.filter(user=self.request.user).order_by('-created_at')
@@ -22,27 +46,80 @@ class WorkoutViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-def adjust_workout_based_on_feedback(workout, rating):
+def feedback_adjustment(rating):
+    """
+    Ajuste de uma avaliação como expressões sobre os valores atuais do treino.
+
+    Aplicado com ``update()``, o banco calcula o novo valor a partir do que está
+    gravado, então avaliações concorrentes do mesmo treino não se sobrescrevem.
+    """
+    strength = Q(workout_type__contains='musculacao')
+    cardio = Q(workout_type__contains='cardio')
     if rating >= 4:
-        if 'musculacao' in workout.workout_type:
-            workout.intensity = 'Alta'
-            workout.duration += timedelta(minutes=15)
-            workout.carga += 5
-        elif 'cardio' in workout.workout_type:
-            workout.intensity = 'Moderada'
-            workout.duration += timedelta(minutes=10)
-    elif rating <= 2:
-        workout.intensity = 'Baixa'
-        workout.duration = max(timedelta(minutes=30), workout.duration - timedelta(minutes=10))
-        workout.carga = max(5, workout.carga - 5)
-    return workout
+        return {
+            'intensity': Case(
+                When(strength, then=Value('Alta')), When(cardio, then=Value('Moderada')), default=F('intensity')
+            ),
+            'duration': Case(
+                When(strength, then=F('duration') + timedelta(minutes=15)),
+                When(cardio, then=F('duration') + timedelta(minutes=10)),
+                default=F('duration'),
+            ),
+            'carga': Case(When(strength, then=F('carga') + 5), default=F('carga'), output_field=IntegerField()),
+        }
+    if rating <= 2:
+        return {
+            'intensity': Value('Baixa'),
+            'duration': Greatest(F('duration') - timedelta(minutes=10), Value(timedelta(minutes=30))),
+            'carga': Greatest(F('carga') - 5, Value(5)),
+        }
+    # Sem ajuste, mas o UPDATE ainda confirma que o treino existe e bloqueia a linha
+    return {'intensity': F('intensity')}
+
+
+def apply_workout_feedbacks(user, feedbacks):
+    """
+    Grava os feedbacks e aplica os ajustes de treino sem perder atualizações concorrentes.
+
+    ``feedbacks`` é uma lista de ``(workout_id, rating, feedback_text)`` de treinos
+    do usuário. Cada ajuste é um UPDATE com expressões F() (feedback_adjustment),
+    emitido em ordem de id para evitar deadlock entre lotes, e tudo é gravado em
+    uma transação. Retorna os treinos atualizados, indexados por id. Feedbacks de
+    treinos apagados depois da verificação de posse são ignorados (o treino não
+    está no retorno).
+    """
+    with transaction.atomic():
+        applied = set()
+        # sorted é estável: feedbacks do mesmo treino são aplicados na ordem recebida
+        for workout_id, rating, _ in sorted(feedbacks, key=itemgetter(0)):
+            if Workout.objects.filter(pk=workout_id, user=user).update(**feedback_adjustment(rating)):
+                applied.add(workout_id)
+        if not applied:
+            return {}
+
+        workouts = Workout.objects.in_bulk(applied)
+        # update() não dispara sinais: replica a nova carga nos exercícios estruturados
+        WorkoutExercise.objects.filter(workout_id__in=applied).update(
+            load=Subquery(Workout.objects.filter(pk=OuterRef('workout_id')).values('carga')[:1])
+        )
+        # Os agregados usam o tipo de treino já carregado, sem nova consulta
+        created = WorkoutFeedback.objects.bulk_create([
+            WorkoutFeedback(user=user, workout=workouts[workout_id], rating=rating, feedback_text=text)
+            for workout_id, rating, text in feedbacks if workout_id in workouts
+        ])
+        record_workout_feedbacks(created, 1)
+        # update() não dispara os sinais que versionam a listagem de treinos
+        bump_version('workouts', user.id)
+
+    return workouts
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_workout(request):
     user = request.user
-    fitness_goal = request.data.get('fitness_goal')
+    # Sem objetivo no corpo, usa o do perfil (contrato do antigo /diets/generate-workout/)
+    fitness_goal = (request.data.get('fitness_goal') or user.fitness_goal or '').lower()
 
     if not fitness_goal:
         return Response({'detail': 'Objetivo não fornecido.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -81,14 +158,17 @@ def generate_workout(request):
     if not config:
         return Response({'detail': 'Objetivo de fitness inválido.'}, status=status.HTTP_400_BAD_REQUEST)
 
+    # Intensidade ajustada pelas avaliações do usuário para o tipo de treino (uma linha, por índice único)
+    aggregate = WorkoutTypeRatingAggregate.objects.filter(user=user, workout_type=config['workout_type']).first()
+    config = {**config, 'intensity': ajustar_intensidade(config['intensity'], aggregate)}
+
     try:
         workout = Workout.objects.create(user=user, **config)
     except Exception as e:
         return Response({'detail': f'Erro ao criar treino: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    historico = list(Workout.objects.filter(user=user).values("intensity", "series_reps", "carga"))
-    for h in historico:
-        h.setdefault("carga", 0)
+    limite, dias = janela_da_requisicao(request)
+    historico = resumo_historico(user, limite=limite, dias=dias)
 
     try:
         treino_ajustado = ajustar_treino(historico)
@@ -122,19 +202,14 @@ def provide_feedback(request):
 
     if workout_id:
         try:
-            workout = Workout.objects.get(id=workout_id, user=user)
-        except Workout.DoesNotExist:
+            workout_id = int(workout_id)
+        except (ValueError, TypeError):
+            return Response({'detail': 'Treino não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+        if not Workout.objects.filter(id=workout_id, user=user).exists():
             return Response({'detail': 'Treino não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
 
-        WorkoutFeedback.objects.create(
-            user=user,
-            workout=workout,
-            feedback_text=feedback_text,
-            rating=rating
-        )
-
-        workout = adjust_workout_based_on_feedback(workout, rating)
-        workout.save()
+        if not apply_workout_feedbacks(user, [(workout_id, rating, feedback_text)]):
+            return Response({'detail': 'Treino não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
 
         return Response({'detail': 'Feedback do treino enviado com sucesso!'}, status=status.HTTP_201_CREATED)
 
@@ -178,10 +253,288 @@ def log_workout(request):
     except Workout.DoesNotExist:
         return Response({'detail': 'Treino não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
 
-    WorkoutLog.objects.create(
-        user=user,
-        workout=workout,
-        duration=timedelta(minutes=duration)
-    )
+    # O rollup é atualizado pelo sinal post_save, dentro desta mesma transação
+    with transaction.atomic():
+        WorkoutLog.objects.create(
+            user=user,
+            workout=workout,
+            duration=timedelta(minutes=duration)
+        )
 
     return Response({'detail': 'Treino registrado com sucesso!'}, status=status.HTTP_201_CREATED)
+
+
+
+MAX_LOG_BATCH_SIZE = 500
+# Uma sessão não passa de um dia; também evita estourar o timedelta
+MAX_LOG_DURATION_MINUTES = 24 * 60
+
+
+def _validate_log_item(item):
+    """
+    Valida um item do lote de sessões e retorna (dados, erros).
+    """
+    if not isinstance(item, dict):
+        return {}, {'non_field_errors': 'Cada sessão deve ser um objeto.'}
+
+    errors = {}
+    data = {}
+
+    try:
+        data['workout_id'] = int(item.get('workout_id'))
+    except (ValueError, TypeError):
+        errors['workout_id'] = 'ID do treino é obrigatório.'
+
+    try:
+        duration = float(item.get('duration'))
+        if not 0 < duration <= MAX_LOG_DURATION_MINUTES:
+            raise ValueError
+        data['duration'] = timedelta(minutes=duration)
+    except (ValueError, TypeError, OverflowError):
+        errors['duration'] = f'Duração inválida (entre 0 e {MAX_LOG_DURATION_MINUTES} minutos).'
+
+    raw_date = item.get('date')
+    if raw_date in (None, ''):
+        data['date'] = timezone.now()
+    else:
+        try:
+            date = parse_datetime(str(raw_date))
+        except ValueError:
+            # Bem formada, mas impossível (ex.: 30 de fevereiro)
+            date = None
+        if date is None:
+            errors['date'] = 'Data inválida. Use o formato ISO 8601.'
+        else:
+            data['date'] = timezone.make_aware(date) if timezone.is_naive(date) else date
+
+    return data, errors
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def log_workout_batch(request):
+    """
+    Registra várias sessões de treino de uma vez (ex.: sincronização do relógio).
+
+    Aceita uma lista de ``{workout_id, duration, date}`` ou um objeto
+    ``{"sessions": [...], "partial": bool}``. A posse de todos os treinos é
+    verificada em uma única consulta e os registros são gravados com um
+    ``bulk_create`` dentro de uma transação.
+
+    - ``partial=false`` (padrão): tudo ou nada. Se algum item for inválido,
+      nada é gravado e a resposta é 400 com o resultado de cada item.
+    - ``partial=true``: os itens válidos são gravados e os inválidos são
+      rejeitados; a resposta é 207 quando houver rejeições.
+    """
+    user = request.user
+    payload = request.data
+
+    if isinstance(payload, list):
+        sessions, partial = payload, False
+    else:
+        sessions = payload.get('sessions')
+        partial = str(payload.get('partial', '')).lower() in ('1', 'true')
+
+    if not isinstance(sessions, list) or not sessions:
+        return Response({'detail': 'Envie uma lista de sessões.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(sessions) > MAX_LOG_BATCH_SIZE:
+        return Response(
+            {'detail': f'O lote pode ter no máximo {MAX_LOG_BATCH_SIZE} sessões.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    validated = [_validate_log_item(item) for item in sessions]
+
+    workout_ids = {data['workout_id'] for data, errors in validated if 'workout_id' in data}
+    owned = dict(Workout.objects.filter(user=user, id__in=workout_ids).values_list('id', 'workout_type'))
+
+    results = []
+    logs = []
+    for index, (data, errors) in enumerate(validated):
+        if 'workout_id' in data and data['workout_id'] not in owned:
+            errors['workout_id'] = 'Treino não encontrado.'
+        if errors:
+            results.append({'index': index, 'status': 'rejected', 'errors': errors})
+            continue
+        results.append({'index': index, 'status': 'created'})
+        logs.append(WorkoutLog(user=user, **data))
+
+    rejected = len(sessions) - len(logs)
+    if rejected and not partial:
+        for result in results:
+            if result['status'] == 'created':
+                result['status'] = 'not_saved'
+        return Response(
+            {'created': 0, 'rejected': rejected, 'results': results},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # bulk_create não dispara sinais: os rollups são aplicados explicitamente na mesma transação
+    with transaction.atomic():
+        logs = WorkoutLog.objects.bulk_create(logs)
+        apply_logs(user.id, [(log.date, log.duration, owned[log.workout_id]) for log in logs])
+
+    created = iter(logs)
+    for result in results:
+        if result['status'] == 'created':
+            result['id'] = next(created).id
+
+    return Response(
+        {'created': len(logs), 'rejected': rejected, 'results': results},
+        status=status.HTTP_207_MULTI_STATUS if rejected else status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def workout_stats(request):
+    """
+    Resumo diário ou semanal dos treinos realizados, lido dos rollups.
+
+    Parâmetros: ``period`` (``daily`` ou ``weekly``), ``start_date`` e ``end_date``.
+    Sem datas, retorna os últimos 30 dias (diário) ou 12 semanas (semanal).
+    """
+    period = request.query_params.get('period', 'daily')
+    if period not in ('daily', 'weekly'):
+        return Response({'detail': 'Período inválido. Use daily ou weekly.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        end_date = parse_date(request.query_params.get('end_date', '')) or timezone.localdate()
+        default_start = end_date - (timedelta(days=29) if period == 'daily' else timedelta(weeks=11))
+        start_date = parse_date(request.query_params.get('start_date', '')) or default_start
+    except ValueError:
+        return Response({'detail': 'Data inválida.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if period == 'daily':
+        model, field = WorkoutDailyRollup, 'day'
+    else:
+        model, field = WorkoutWeeklyRollup, 'week_start'
+        start_date = week_start(start_date)
+
+    rows = model.objects.filter(
+        user=request.user,
+        **{f'{field}__gte': start_date, f'{field}__lte': end_date}
+    ).order_by(field).values(field, 'session_count', 'total_minutes', *TYPE_COLUMNS.values())
+
+    results = [
+        {
+            'period_start': row[field],
+            'session_count': row['session_count'],
+            'total_minutes': row['total_minutes'],
+            'minutes_by_type': {workout_type: row[column] for workout_type, column in TYPE_COLUMNS.items()},
+        }
+        for row in rows
+        if row['session_count'] > 0
+    ]
+
+    return Response({
+        'period': period,
+        'start_date': start_date,
+        'end_date': end_date,
+        'session_count': sum(r['session_count'] for r in results),
+        'total_minutes': sum(r['total_minutes'] for r in results),
+        'results': results,
+    })
+
+
+MAX_FEEDBACK_BATCH_SIZE = 200
+
+
+def _validate_feedback_item(item):
+    """
+    Valida um item do lote de feedbacks e retorna (dados, erros).
+    """
+    if not isinstance(item, dict):
+        return {}, {'non_field_errors': 'Cada feedback deve ser um objeto.'}
+
+    errors = {}
+    data = {'feedback_text': str(item.get('feedback_text') or '')}
+
+    try:
+        data['workout_id'] = int(item.get('workout_id'))
+    except (ValueError, TypeError):
+        errors['workout_id'] = 'ID do treino é obrigatório.'
+
+    try:
+        data['rating'] = int(item.get('rating'))
+        if not 1 <= data['rating'] <= 5:
+            raise ValueError
+    except (ValueError, TypeError):
+        errors['rating'] = 'A avaliação deve estar entre 1 e 5.'
+
+    return data, errors
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def provide_feedback_batch(request):
+    """
+    Recebe várias avaliações de treino de uma vez e aplica os ajustes atomicamente.
+
+    Aceita uma lista de ``{workout_id, rating, feedback_text}`` ou
+    ``{"feedbacks": [...]}``. Vários feedbacks do mesmo treino são aplicados em
+    sequência, na ordem enviada. O lote é tudo ou nada: com qualquer item
+    inválido nada é gravado e a resposta é 400 com os erros por item.
+    Em caso de sucesso, retorna o estado final de cada treino ajustado.
+    """
+    user = request.user
+    payload = request.data
+    items = payload if isinstance(payload, list) else payload.get('feedbacks')
+
+    if not isinstance(items, list) or not items:
+        return Response({'detail': 'Envie uma lista de feedbacks.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_FEEDBACK_BATCH_SIZE:
+        return Response(
+            {'detail': f'O lote pode ter no máximo {MAX_FEEDBACK_BATCH_SIZE} feedbacks.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    validated = [_validate_feedback_item(item) for item in items]
+    workout_ids = {data['workout_id'] for data, errors in validated if 'workout_id' in data}
+    owned = set(Workout.objects.filter(user=user, id__in=workout_ids).values_list('id', flat=True))
+
+    results = []
+    for index, (data, errors) in enumerate(validated):
+        if 'workout_id' in data and data['workout_id'] not in owned:
+            errors['workout_id'] = 'Treino não encontrado.'
+        if errors:
+            results.append({'index': index, 'errors': errors})
+
+    if results:
+        return Response({'detail': 'Nenhum feedback foi salvo.', 'results': results}, status=status.HTTP_400_BAD_REQUEST)
+
+    feedbacks = [(data['workout_id'], data['rating'], data['feedback_text']) for data, _ in validated]
+    workouts = apply_workout_feedbacks(user, feedbacks)
+    # Treinos apagados depois da verificação de posse: os feedbacks deles não foram gravados
+    skipped = sorted({workout_id for workout_id, _, _ in feedbacks} - set(workouts))
+
+    return Response({
+        'created': sum(1 for workout_id, _, _ in feedbacks if workout_id in workouts),
+        'skipped_workout_ids': skipped,
+        'workouts': WorkoutSerializer(workouts.values(), many=True).data,
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def workout_ratings(request):
+    """
+    Resumo das avaliações: por tipo de treino e, com ``?workout_id=1,2``, por treino.
+    """
+    user = request.user
+    workout_ids = parse_ids(request.query_params.get('workout_id', ''))
+    if workout_ids is None or len(workout_ids) > MAX_RATING_IDS:
+        return Response(
+            {'detail': f'workout_id deve ser uma lista de até {MAX_RATING_IDS} IDs separados por vírgula.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    types = WorkoutTypeRatingAggregate.objects.filter(user=user, count__gt=0).order_by('workout_type')
+    workouts = WorkoutRatingAggregate.objects.filter(
+        workout__user=user, workout_id__in=workout_ids, count__gt=0
+    ).order_by('workout_id')
+
+    return Response({
+        'workout_types': [{'workout_type': row.workout_type, **row.as_dict()} for row in types],
+        'workouts': [{'workout_id': row.workout_id, **row.as_dict()} for row in workouts],
+    })